@@ -0,0 +1,159 @@
+"""
+Deletion planner: turns a selection of files into as few operations as possible.
+
+Selecting a whole junk category yields one path per file, often every file
+of a few cache folders. A directory is "covered" when the selection holds
+as many entries directly in it as the scan index counted there (regular
+files plus symlinks, special files and entries it could not stat, which
+scans never list) and all of its sub-directories are covered as well;
+such a subtree is deleted as one operation on its topmost covered
+directory. That directory itself is kept (emptied, not removed), as the
+per-file deletion would have left it.
+
+The index only vouches for what it saw, so a directory counts as covered
+only if its mtime still equals the indexed one (no entry was added or
+removed since the scan) and it is on the same device as the top of the
+subtree. Directories missing from the index are never covered.
+"""
+import os
+
+from app.utils.scan_index import ScanIndex
+
+COALESCE_MIN = 8    # fewer covered files are cheaper to delete one by one
+
+
+class DeletePlan:
+    """Operations for a selection and which selected paths each one removes."""
+
+    def __init__(self, ops: list[str], keep_dirs: frozenset[str],
+                 covered: dict[str, list[str]]):
+        self.ops = ops                  # paths to delete, in selection order
+        self.keep_dirs = keep_dirs      # ops to empty rather than remove
+        self.covered = covered          # op -> the selected paths it removes
+
+    def removed(self, results: list) -> set[str]:
+        """Selected paths removed by the successful DeleteResults of the plan's ops."""
+        removed: set[str] = set()
+        for r in results:
+            if r.ok:
+                removed.update(self.covered.get(r.path, (r.path,)))
+        return removed
+
+    @classmethod
+    def identity(cls, paths: list[str]) -> "DeletePlan":
+        return cls(list(paths), frozenset(), {})
+
+
+def plan_deletion(paths: list[str], index: ScanIndex | None) -> DeletePlan:
+    """Coalesce fully selected subtrees of `paths` into directory operations."""
+    if index is None or len(paths) < COALESCE_MIN:
+        return DeletePlan.identity(paths)
+    return _Planner(paths, index).plan()
+
+
+class _Planner:
+    def __init__(self, paths: list[str], index: ScanIndex):
+        self.paths = paths
+        self.index = index
+        self.selected = {index.key(p) for p in paths}
+        self.in_dir: dict[str, int] = {}     # dir key -> selected entries directly in it
+        for key in self.selected:
+            parent = os.path.dirname(key)
+            self.in_dir[parent] = self.in_dir.get(parent, 0) + 1
+        self.devs: dict[str, int] = {}       # dir key -> st_dev, for still-valid index rows
+        self.full: dict[str, bool] = {}      # dir key -> subtree covered
+        self.tops: dict[str, str] = {}       # covered dir key -> topmost covered ancestor
+
+    def plan(self) -> DeletePlan:
+        groups: dict[str, list[str]] = {}
+        for path in self.paths:
+            groups.setdefault(os.path.dirname(path), []).append(path)
+
+        covered: dict[str, list[str]] = {}
+        direct: list[str] = []
+        for parent, members in groups.items():
+            if self._is_full(parent):
+                covered.setdefault(self._top(parent), []).extend(members)
+            else:
+                direct.extend(members)
+
+        ops = [top for top, members in covered.items() if len(members) >= COALESCE_MIN]
+        for top, members in covered.items():
+            if len(members) < COALESCE_MIN:
+                direct.extend(members)
+        return DeletePlan(ops + direct, frozenset(ops), {top: covered[top] for top in ops})
+
+    def _valid_row(self, path: str, key: str):
+        """Index row of `path` if the directory is unchanged since it was indexed."""
+        row = self.index.get(path)
+        if row is None:
+            return None
+        try:
+            st = os.stat(path, follow_symlinks=False)
+        except OSError:
+            return None
+        if st.st_mtime_ns != row.mtime_ns:
+            return None
+        self.devs[key] = st.st_dev
+        return row
+
+    def _is_full(self, path: str) -> bool:
+        """True if every entry under `path` that the index knows of is selected."""
+        # Post-order on an explicit stack: a directory is decided after its children
+        stack: list[tuple[str, object]] = [(path, None)]
+        while stack:
+            cur, row = stack[-1]
+            key = self.index.key(cur)
+            if key in self.full:
+                stack.pop()
+                continue
+            if row is None:
+                row = self._valid_row(cur, key)
+                if row is None:
+                    self.full[key] = False
+                    stack.pop()
+                    continue
+                stack[-1] = (cur, row)
+            children = [(os.path.join(cur, name), self.index.key(os.path.join(cur, name)))
+                        for name in row.children]
+            # Selected directories go as a whole; the other selected entries must be
+            # exactly the non-directory entries indexed here, not only the regular
+            # files. Checked first: it fails before any descent
+            picked = sum(1 for _, child_key in children if child_key in self.selected)
+            result = self.in_dir.get(key, 0) - picked == row.own_count + row.n_other
+            pending = []
+            for child, child_key in children:
+                if not result:
+                    break
+                if child_key in self.selected:
+                    continue
+                if child_key not in self.full:
+                    pending.append((child, None))
+                elif not self.full[child_key] or self.devs[child_key] != self.devs[key]:
+                    result = False
+            if result and pending:
+                stack.extend(pending)
+                continue
+            self.full[key] = result
+            stack.pop()
+        return self.full[self.index.key(path)]
+
+    def _top(self, path: str) -> str:
+        """Topmost covered ancestor of the covered directory `path`."""
+        chain = [path]
+        top = None
+        while top is None:
+            cur = chain[-1]
+            key = self.index.key(cur)
+            if key in self.tops:
+                top = self.tops[key]
+                break
+            parent = os.path.dirname(cur)
+            # A covered parent only has covered children on its own device
+            if parent == cur or not self._is_full(parent):
+                top = cur
+                break
+            chain.append(parent)
+        for p in chain:
+            self.tops[self.index.key(p)] = top
+        return top
@@ -0,0 +1,295 @@
+"""
+Duplicate file finder.
+
+Candidates are narrowed in stages, each cheaper than the next:
+  1. size: only files sharing a size can be equal; hard links to one inode
+     are kept once, since deleting one of them frees nothing;
+  2. fingerprint: hash of the first and last block, which rules out most
+     same-size files after reading 128 KB of each (files that small are
+     covered completely, so their fingerprint needs no full hash);
+  3. full hash of the files whose fingerprints still collide, or with
+     verify a side-by-side byte comparison that stops at the first
+     difference and can't be fooled by a hash collision.
+Reads run on a thread pool through app.utils.hashing. With a
+HashCache, digests of files unchanged since an earlier search are taken
+from it instead of being read again.
+"""
+import os
+import queue
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable
+
+from app.utils.fs_walker import Visitor
+from app.utils.hash_cache import HashCache
+from app.utils.hashing import DEFAULT_ALGORITHM, check_algorithm, hash_file, hash_head_tail
+from app.utils.size_accounting import allocated_size
+
+BLOCK = 64 * 1024
+COMPARE_BLOCK = 256 * 1024
+MAX_OPEN = 64  # files compared side by side at most
+DEFAULT_HASH_WORKERS = min(8, os.cpu_count() or 4)
+
+
+def find_duplicates(file_list: list[dict], algorithm: str = DEFAULT_ALGORITHM,
+                    workers: int = DEFAULT_HASH_WORKERS,
+                    on_group: Callable[[list[dict]], None] | None = None,
+                    on_progress: Callable[[str, int, int], None] | None = None,
+                    is_running: Callable[[], bool] | None = None,
+                    cache: HashCache | None = None,
+                    verify: bool = False) -> list[list[dict]]:
+    """
+    Groups of identical files among `file_list` ({"path", "name", "size"}
+    dicts, optionally with "mtime_ns", "dev", "ino" and "nlink" from the
+    walk). Each group is passed to `on_group` as soon as it is confirmed.
+    `on_progress` gets (stage, done, total) with stage "fingerprint" or "hash".
+
+    With `verify`, every group is confirmed by comparing contents byte by
+    byte. Groups of up to MAX_OPEN files skip the full hash altogether.
+    """
+    check_algorithm(algorithm)
+    running = is_running or (lambda: True)
+    by_size: dict[int, list[dict]] = defaultdict(list)
+    for f in file_list:
+        if f["size"] > 0:
+            by_size[f["size"]].append(f)
+    candidates = [g for g in (_unique_inodes(g) for g in by_size.values() if len(g) > 1)
+                  if len(g) > 1]
+
+    duplicates: list[list[dict]] = []
+
+    def emit(group: list[dict]):
+        group.sort(key=lambda f: f["path"])
+        duplicates.append(group)
+        if on_group:
+            on_group(group)
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        # Stage 2: fingerprints of every candidate
+        by_print: dict[tuple, list[dict]] = defaultdict(list)
+        tasks = _Tasks(pool)
+        for f in (f for g in candidates for f in g):
+            digest = _cached(cache, f, algorithm, "fingerprint")
+            if digest is not None:
+                by_print[(f["size"], digest)].append(f)
+            else:
+                tasks.submit(f, hash_head_tail, f["path"], f["size"], BLOCK, algorithm)
+        for done, (f, digest) in enumerate(tasks.completed(running), 1):
+            if digest is not None:
+                by_print[(f["size"], digest)].append(f)
+                _store(cache, f, algorithm, "fingerprint", digest)
+            if on_progress:
+                on_progress("fingerprint", done, len(tasks))
+        if not running():
+            return duplicates
+
+        # Stage 3: full hashes, a group is reported once all its members are read;
+        # with verify, byte comparison instead of or after hashing
+        pending: dict[int, int] = {}
+        hashes: dict[int, dict[bytes, list[dict]]] = {}
+        tasks = _Tasks(pool)
+
+        def hashed(by_hash: dict[bytes, list[dict]]):
+            for group in by_hash.values():
+                if len(group) < 2:
+                    continue
+                if verify:
+                    tasks.submit(None, compare_files, group)
+                else:
+                    emit(group)
+
+        for gid, ((size, _), group) in enumerate(by_print.items()):
+            if len(group) < 2:
+                continue
+            if verify and len(group) <= MAX_OPEN:
+                tasks.submit(None, compare_files, group)
+                continue
+            if size <= 2 * BLOCK:
+                hashed({b"": group})  # the fingerprint covered the whole file
+                continue
+            pending[gid] = 0
+            hashes[gid] = defaultdict(list)
+            for f in group:
+                digest = _cached(cache, f, algorithm, "full")
+                if digest is not None:
+                    hashes[gid][digest].append(f)
+                else:
+                    pending[gid] += 1
+                    tasks.submit((gid, f), hash_file, f["path"], algorithm)
+            if not pending[gid]:
+                hashed(hashes.pop(gid))
+        for done, (tag, result) in enumerate(tasks.completed(running), 1):
+            if tag is None:
+                for group in result:
+                    emit(group)
+            else:
+                gid, f = tag
+                if result is not None:
+                    hashes[gid][result].append(f)
+                    _store(cache, f, algorithm, "full", result)
+                pending[gid] -= 1
+                if not pending[gid]:
+                    hashed(hashes.pop(gid))
+            if on_progress:
+                on_progress("hash", done, len(tasks))
+    return duplicates
+
+
+def compare_files(files: list[dict], block: int = COMPARE_BLOCK,
+                  max_open: int = MAX_OPEN) -> list[list[dict]]:
+    """
+    Split same-size `files` into groups of identical content by reading them
+    side by side, `block` bytes at a time. A file stops being read as soon as
+    it differs from every other one. Above `max_open` files only those equal
+    to the first one are kept, so pass larger groups already split by hash.
+    """
+    if len(files) > max_open:
+        ref, same = files[0], [files[0]]
+        for i in range(1, len(files), max_open - 1):
+            for group in compare_files([ref, *files[i:i + max_open - 1]], block, max_open):
+                if group[0] is ref:
+                    same.extend(group[1:])
+        return [same] if len(same) > 1 else []
+
+    handles = []
+    try:
+        for f in files:
+            try:
+                handles.append((f, open(f["path"], "rb", buffering=0)))
+            except OSError:
+                pass
+        result = []
+        groups = [handles] if len(handles) > 1 else []
+        while groups:
+            split = []
+            for group in groups:
+                parts: list[tuple[bytes, list]] = []
+                for f, fh in group:
+                    try:
+                        chunk = fh.read(block)
+                    except OSError:
+                        continue
+                    for first, members in parts:
+                        if first == chunk:
+                            members.append((f, fh))
+                            break
+                    else:
+                        parts.append((chunk, [(f, fh)]))
+                for chunk, members in parts:
+                    if len(members) > 1:
+                        (split if chunk else result).append(members)
+            groups = split
+        return [[f for f, _ in members] for members in result]
+    finally:
+        for _, fh in handles:
+            fh.close()
+
+
+def _stat(f: dict) -> bool:
+    """Fill in what the walk could not tell (os.scandir() on Windows has no inode)."""
+    try:
+        st = os.stat(f["path"])
+    except OSError:
+        return False
+    f["mtime_ns"], f["dev"], f["ino"], f["nlink"] = (
+        st.st_mtime_ns, st.st_dev, st.st_ino, st.st_nlink)
+    return True
+
+
+def _identity(f: dict) -> tuple[int, int, int] | None:
+    """(size, mtime_ns, inode) a cached digest of `f` must match."""
+    if (not f.get("ino") or "mtime_ns" not in f) and not _stat(f):
+        return None
+    return f["size"], f["mtime_ns"], f["ino"]
+
+
+def _cached(cache: HashCache | None, f: dict, algorithm: str, kind: str) -> bytes | None:
+    if cache is None:
+        return None
+    ident = _identity(f)
+    return cache.get(f["path"], algorithm, kind, *ident) if ident else None
+
+
+def _store(cache: HashCache | None, f: dict, algorithm: str, kind: str, digest: bytes):
+    ident = _identity(f) if cache is not None else None
+    if ident:
+        cache.put(f["path"], algorithm, kind, *ident, digest)
+
+
+class _Tasks:
+    """Pool tasks yielded as they finish, including tasks submitted meanwhile."""
+
+    def __init__(self, pool: ThreadPoolExecutor):
+        self._pool = pool
+        self._finished: queue.SimpleQueue = queue.SimpleQueue()
+        self._tags: dict = {}
+        self._submitted = 0
+
+    def __len__(self) -> int:
+        return self._submitted
+
+    def submit(self, tag, fn, *args):
+        fut = self._pool.submit(fn, *args)
+        self._tags[fut] = tag
+        self._submitted += 1
+        fut.add_done_callback(self._finished.put)
+
+    def completed(self, running: Callable[[], bool]):
+        """(tag, result) per task; the rest is cancelled once `running` turns False."""
+        while self._tags:
+            if not running():
+                for fut in self._tags:
+                    fut.cancel()
+                self._tags.clear()
+                return
+            try:
+                fut = self._finished.get(timeout=0.2)
+            except queue.Empty:
+                continue
+            yield self._tags.pop(fut), fut.result()
+
+
+def _unique_inodes(files: list[dict]) -> list[dict]:
+    """Drop all but one link of files sharing (dev, ino)."""
+    seen = set()
+    unique = []
+    for f in sorted(files, key=lambda f: f["path"]):
+        key = _inode(f)
+        if key is not None:
+            if key in seen:
+                continue
+            seen.add(key)
+        unique.append(f)
+    return unique
+
+
+def _inode(f: dict) -> tuple[int, int] | None:
+    """(dev, ino) of a file with several hard links, else None."""
+    if not f.get("nlink") and not _stat(f):
+        return None
+    return (f["dev"], f["ino"]) if f["nlink"] > 1 else None
+
+
+class DuplicateCandidateVisitor(Visitor):
+    """Collects files of at least `min_bytes` as duplicate candidates."""
+
+    def __init__(self, min_bytes: int = 1, skip_dirs: frozenset = frozenset(),
+                 skip_prefixes: tuple = ()):
+        self.min_bytes = min_bytes
+        self.skip_dirs = skip_dirs
+        self.skip_prefixes = skip_prefixes
+        self.files: list[dict] = []
+
+    def enter_dir(self, path, name, depth, parent):
+        if depth and (name in self.skip_dirs or name.startswith(self.skip_prefixes)):
+            return None
+        return True
+
+    def visit_files(self, path, files, state):
+        min_bytes = self.min_bytes
+        # dev/ino/nlink are 0 where os.scandir() doesn't report them
+        self.files.extend({
+            "path": file_path, "name": name, "size": st.st_size,
+            "allocated": allocated_size(st), "mtime_ns": st.st_mtime_ns,
+            "dev": st.st_dev, "ino": st.st_ino, "nlink": st.st_nlink,
+        } for file_path, name, st in files if st.st_size >= min_bytes)
@@ -1,48 +1,148 @@
 """
 File operations: delete to recycle bin or permanently.
+
+delete_paths() is the deletion engine: paths are split into batches that
+run on a thread pool, each batch reports its results and the bytes it freed,
+and a stop request is honoured between batches. A recycle-bin batch is
+handed to trash.trash_paths() in one call; directories are deleted with
+tree_delete.remove_tree(), which reports freed bytes while it runs.
+delete_to_trash() and delete_permanent() are thin wrappers over it.
 """
 import os
-import shutil
-from pathlib import Path
+import stat
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, NamedTuple
 
-try:
-    import send2trash
-    HAS_SEND2TRASH = True
-except ImportError:
-    HAS_SEND2TRASH = False
+from app.utils.trash import trash_paths
+from app.utils.tree_delete import remove_tree, tree_size
 
+BATCH_SIZE = 200
+DELETE_WORKERS = min(8, os.cpu_count() or 4)
 
-def delete_to_trash(paths: list[str]) -> tuple[int, list[str]]:
-    """Move files to recycle bin. Returns (success_count, failed_paths)."""
-    success = 0
-    failed = []
+
+class DeleteResult(NamedTuple):
+    path: str
+    ok: bool
+    freed: int        # bytes freed (on failure, what went before the error)
+    error: str = ""
+
+
+def _remove_one(path: str, on_freed: Callable[[int], None], keep: bool):
+    try:
+        st = os.lstat(path)
+    except FileNotFoundError:
+        return
+    if stat.S_ISDIR(st.st_mode) and not os.path.islink(path):
+        remove_tree(path, on_freed=on_freed, keep_root=keep)
+    else:
+        os.unlink(path)
+        on_freed(st.st_size)
+
+
+def _trash_batch(paths: list[str], on_freed: Callable[[int], None] | None,
+                 keep_dirs: frozenset[str]) -> list[DeleteResult]:
+    sizes = [tree_size(path) for path in paths]
+    modes = {}
     for path in paths:
+        if path in keep_dirs:
+            try:
+                modes[path] = os.stat(path).st_mode
+            except OSError:
+                pass
+    failed = trash_paths(paths)
+    results = []
+    for path, size in zip(paths, sizes):
+        if path in failed:
+            results.append(DeleteResult(path, False, 0, failed[path]))
+            continue
+        if path in modes:
+            try:
+                os.mkdir(path, stat.S_IMODE(modes[path]))   # emptied, not removed
+            except OSError:
+                pass
+        if on_freed:
+            on_freed(size)
+        results.append(DeleteResult(path, True, size))
+    return results
+
+
+def _delete_batch(paths: list[str], trash: bool,
+                  on_freed: Callable[[int], None] | None,
+                  keep_dirs: frozenset[str]) -> list[DeleteResult]:
+    if trash:
+        return _trash_batch(paths, on_freed, keep_dirs)
+    results = []
+    for path in paths:
+        freed = [0]
+
+        def count(n: int):
+            freed[0] += n
+            if on_freed:
+                on_freed(n)
+
         try:
-            if HAS_SEND2TRASH:
-                send2trash.send2trash(path)
-            else:
-                os.remove(path)
-            success += 1
+            _remove_one(path, count, path in keep_dirs)
+            results.append(DeleteResult(path, True, freed[0]))
         except Exception as e:
-            failed.append(f"{path}: {e}")
-    return success, failed
+            results.append(DeleteResult(path, False, freed[0], str(e)))
+    return results
+
+
+def delete_paths(paths: list[str], trash: bool,
+                 batch_size: int = BATCH_SIZE, workers: int | None = None,
+                 on_batch: Callable[[list[DeleteResult]], None] | None = None,
+                 on_freed: Callable[[int], None] | None = None,
+                 is_running: Callable[[], bool] | None = None,
+                 keep_dirs: frozenset[str] = frozenset()) -> list[DeleteResult]:
+    """
+    Delete `paths` to the recycle bin or permanently, in batches of
+    `batch_size` on up to `workers` threads (one for the recycle bin, whose
+    shell operations don't run side by side). `on_batch` gets the results of
+    every finished batch and `on_freed` the bytes freed as they go, from
+    the worker threads; once `is_running` returns False no further batch
+    is started and the paths not attempted are left out of the result.
+    Directories in `keep_dirs` are emptied instead of removed. A path given
+    more than once is deleted (and reported) once.
+    """
+    running = is_running or (lambda: True)
+    paths = list(dict.fromkeys(paths))
+    if workers is None:
+        workers = 1 if trash else DELETE_WORKERS
+    batches = [paths[i:i + batch_size] for i in range(0, len(paths), batch_size)]
+    results: list[DeleteResult] = []
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        queued = iter(batches)
+        futures = set()
+        while True:
+            while len(futures) < workers and running():
+                batch = next(queued, None)
+                if batch is None:
+                    break
+                futures.add(pool.submit(_delete_batch, batch, trash, on_freed, keep_dirs))
+            if not futures:
+                break
+            done, futures = wait(futures, return_when=FIRST_COMPLETED)
+            for fut in done:
+                batch_results = fut.result()
+                results.extend(batch_results)
+                if on_batch:
+                    on_batch(batch_results)
+    return results
+
+
+def _summary(results: list[DeleteResult]) -> tuple[int, list[str]]:
+    failed = [f"{r.path}: {r.error}" for r in results if not r.ok]
+    return len(results) - len(failed), failed
+
+
+def delete_to_trash(paths: list[str]) -> tuple[int, list[str]]:
+    """Move files to recycle bin. Returns (success_count, failed_paths)."""
+    return _summary(delete_paths(paths, trash=True))
 
 
 def delete_permanent(paths: list[str]) -> tuple[int, list[str]]:
     """Permanently delete files/directories. Returns (success_count, failed_paths)."""
-    success = 0
-    failed = []
-    for path in paths:
-        try:
-            p = Path(path)
-            if p.is_file() or p.is_symlink():
-                p.unlink()
-            elif p.is_dir():
-                shutil.rmtree(path, ignore_errors=False)
-            success += 1
-        except Exception as e:
-            failed.append(f"{path}: {e}")
-    return success, failed
+    return _summary(delete_paths(paths, trash=False))
 
 
 def get_recycle_bin_size() -> tuple[int, int]:
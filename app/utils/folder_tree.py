@@ -0,0 +1,262 @@
+"""
+Compact in-memory tree of aggregated folder sizes.
+
+Every directory under a root becomes one node stored column-wise in typed
+arrays (parent, name id, first child, next sibling, logical and allocated
+size, file count), about 40 bytes per directory. Names are interned, so the many repeated names on a
+real drive ("cache", "src", "x64"...) are stored once.
+Sizes are summed bottom-up during the same walk by FolderTreeVisitor, with
+hard-linked files counted once (see size_accounting), and
+the tree can be saved to disk and loaded back without rescanning.
+"""
+import hashlib
+import os
+import struct
+import sys
+import time
+from array import array
+from typing import Callable
+
+from app.utils.fs_walker import Visitor, norm_path
+from app.utils.size_accounting import SizeCounter
+from app.version import APP_NAME
+
+TREE_DIR = os.path.join(
+    os.environ.get("APPDATA", os.path.expanduser("~")),
+    APP_NAME,
+    "trees",
+)
+
+_MAGIC = b"SATREE2\0"
+_HEADER = struct.Struct("<8sBdIII")  # magic, little-endian flag, scanned_at, nodes, names, blob bytes
+_NONE = -1
+
+
+class FolderTree:
+    """Directory tree with aggregated sizes. Node 0 is the root."""
+
+    ROOT = 0
+
+    def __init__(self, root: str):
+        self.root = root
+        self.scanned_at = time.time()
+        self._names: list[str] = []
+        self._name_ids: dict[str, int] = {}
+        self._parent = array("i")
+        self._name = array("i")
+        self._first_child = array("i")
+        self._next_sibling = array("i")
+        self._size = array("q")
+        self._alloc = array("q")
+        self._count = array("q")
+        self._append(_NONE, root)
+
+    def __len__(self) -> int:
+        return len(self._parent)
+
+    def _intern(self, name: str) -> int:
+        nid = self._name_ids.get(name)
+        if nid is None:
+            nid = self._name_ids[name] = len(self._names)
+            self._names.append(name)
+        return nid
+
+    def _append(self, parent: int, name: str) -> int:
+        idx = len(self._parent)
+        self._parent.append(parent)
+        self._name.append(self._intern(name))
+        self._first_child.append(_NONE)
+        self._next_sibling.append(_NONE)
+        self._size.append(0)
+        self._alloc.append(0)
+        self._count.append(0)
+        return idx
+
+    def add(self, parent: int, name: str) -> int:
+        """Append a child directory of `parent`; returns its node id."""
+        idx = self._append(parent, name)
+        self._next_sibling[idx] = self._first_child[parent]
+        self._first_child[parent] = idx
+        return idx
+
+    def add_files(self, node: int, size: int, alloc: int, count: int):
+        self._size[node] += size
+        self._alloc[node] += alloc
+        self._count[node] += count
+
+    def roll_up(self, node: int):
+        """Add a finished node's totals to its parent."""
+        parent = self._parent[node]
+        if parent != _NONE:
+            self._size[parent] += self._size[node]
+            self._alloc[parent] += self._alloc[node]
+            self._count[parent] += self._count[node]
+
+    # ── queries ───────────────────────────────
+
+    def name(self, node: int) -> str:
+        return self._names[self._name[node]]
+
+    def parent(self, node: int) -> int | None:
+        parent = self._parent[node]
+        return None if parent == _NONE else parent
+
+    def size(self, node: int) -> int:
+        return self._size[node]
+
+    def allocated(self, node: int) -> int:
+        """Bytes the subtree occupies on disk."""
+        return self._alloc[node]
+
+    def file_count(self, node: int) -> int:
+        return self._count[node]
+
+    def path(self, node: int) -> str:
+        parts = []
+        while node != _NONE:
+            parts.append(self.name(node))
+            node = self._parent[node]
+        return os.path.join(*reversed(parts))
+
+    def children(self, node: int) -> list[int]:
+        """Sub-directories of `node`, largest first."""
+        result = []
+        child = self._first_child[node]
+        while child != _NONE:
+            result.append(child)
+            child = self._next_sibling[child]
+        result.sort(key=lambda c: (-self._size[c], self.name(c)))
+        return result
+
+    def find(self, path: str) -> int | None:
+        """Node id of `path`, or None if it is not in the tree."""
+        root = norm_path(self.root)
+        key = norm_path(path)
+        if key == root:
+            return self.ROOT
+        if not key.startswith(root.rstrip(os.sep) + os.sep):
+            return None
+        node = self.ROOT
+        for part in key[len(root.rstrip(os.sep)) + 1:].split(os.sep):
+            child = self._first_child[node]
+            while child != _NONE and os.path.normcase(self.name(child)) != part:
+                child = self._next_sibling[child]
+            if child == _NONE:
+                return None
+            node = child
+        return node
+
+    # ── serialisation ─────────────────────────
+
+    def _columns(self) -> tuple[array, ...]:
+        return (self._parent, self._name, self._first_child, self._next_sibling,
+                self._size, self._alloc, self._count)
+
+    def save(self, path: str):
+        blob = "\0".join(self._names).encode("utf-8", "surrogatepass")
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(_HEADER.pack(_MAGIC, sys.byteorder == "little", self.scanned_at,
+                                 len(self), len(self._names), len(blob)))
+            f.write(blob)
+            for col in self._columns():
+                col.tofile(f)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path: str) -> "FolderTree":
+        """Read a tree written by save(); ValueError if the file is not one."""
+        with open(path, "rb") as f:
+            head = f.read(_HEADER.size)
+            if len(head) != _HEADER.size:
+                raise ValueError("truncated tree file")
+            magic, little, scanned_at, n_nodes, n_names, n_blob = _HEADER.unpack(head)
+            if magic != _MAGIC:
+                raise ValueError("not a folder tree file")
+            names = f.read(n_blob).decode("utf-8", "surrogatepass").split("\0")
+            if len(names) != n_names:
+                raise ValueError("corrupt name table")
+            tree = cls.__new__(cls)
+            tree._names = names
+            tree._name_ids = {name: i for i, name in enumerate(names)}
+            tree._parent, tree._name = array("i"), array("i")
+            tree._first_child, tree._next_sibling = array("i"), array("i")
+            tree._size, tree._alloc, tree._count = array("q"), array("q"), array("q")
+            for col in tree._columns():
+                try:
+                    col.fromfile(f, n_nodes)
+                except EOFError:
+                    raise ValueError("truncated tree file")
+                if bool(little) != (sys.byteorder == "little"):
+                    col.byteswap()
+        tree.root = tree.name(cls.ROOT)
+        tree.scanned_at = scanned_at
+        return tree
+
+
+def tree_cache_path(root: str) -> str:
+    """Where the last tree of `root` is kept."""
+    digest = hashlib.sha1(norm_path(root).encode("utf-8", "surrogatepass")).hexdigest()[:16]
+    return os.path.join(TREE_DIR, f"{digest}.tree")
+
+
+def load_cached_tree(root: str) -> FolderTree | None:
+    try:
+        tree = FolderTree.load(tree_cache_path(root))
+    except (OSError, ValueError):
+        return None
+    return tree if norm_path(tree.root) == norm_path(root) else None
+
+
+def save_cached_tree(tree: FolderTree) -> bool:
+    try:
+        os.makedirs(TREE_DIR, exist_ok=True)
+        tree.save(tree_cache_path(tree.root))
+        return True
+    except OSError:
+        return False
+
+
+class FolderTreeVisitor(Visitor):
+    """
+    Builds a FolderTree of `root` (other walk roots are ignored).
+    Top-level folders named in `skip_dirs` are left out.
+    """
+
+    def __init__(self, root: str, skip_dirs: frozenset = frozenset(),
+                 on_folder_done: Callable[[str, int], None] | None = None):
+        self.tree = FolderTree(root)
+        self._sizes = SizeCounter()
+        self._root = norm_path(root)
+        self.skip_dirs = skip_dirs
+        self._on_folder_done = on_folder_done
+
+    def enter_dir(self, path, name, depth, parent):
+        if depth == 0:
+            return FolderTree.ROOT if norm_path(path) == self._root else None
+        if depth == 1 and name in self.skip_dirs:
+            return None
+        return self.tree.add(parent, name)
+
+    def visit_files(self, path, files, state):
+        size, alloc = self._sizes.files(files)
+        self.tree.add_files(state, size, alloc, len(files))
+
+    def can_use_summary(self, state, large_min):
+        return True
+
+    def visit_summary(self, path, summary, state):
+        size, alloc = self._sizes.links(summary.links)
+        self.tree.add_files(state, summary.own_size + size, summary.own_alloc + alloc,
+                            summary.own_count)
+
+    def leave_dir(self, path, depth, state):
+        # Post-order: every sub-directory has already been rolled up
+        self.tree.roll_up(state)
+        if depth == 1 and self._on_folder_done:
+            self._on_folder_done(path, self.tree.size(state))
+
+    def results(self) -> list[tuple[str, int]]:
+        """(path, size) of every top-level folder, largest first."""
+        return [(self.tree.path(c), self.tree.size(c))
+                for c in self.tree.children(FolderTree.ROOT)]
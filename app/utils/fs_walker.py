@@ -0,0 +1,490 @@
+"""
+Single-pass filesystem walker shared by all scanners.
+
+walk() lists every directory under the given roots once and feeds the
+entries to a set of visitors. Each visitor decides per directory whether it
+wants to see that subtree; the walk only descends while at least one visitor
+is interested. Quarantine directories are never entered.
+"""
+import heapq
+import os
+import time
+from operator import itemgetter
+from typing import TYPE_CHECKING, Callable, Generator
+
+from app.utils.scan_index import DirSummary, ScanIndex
+from app.utils.size_accounting import SizeCounter, allocated_size, link_key
+from app.version import APP_NAME
+
+if TYPE_CHECKING:
+    from app.utils.mounts import MountFilter
+
+# Holds deleted items until the quarantine purges them: no visitor should
+# count them, so the walker itself leaves these directories out
+QUARANTINE_NAME = f".{APP_NAME}.quarantine"
+
+
+class Visitor:
+    """
+    Base class for walk() visitors.
+
+    enter_dir() returns a state object for the directory (passed back to
+    visit_files/leave_dir and to enter_dir of its sub-directories as `parent`),
+    or None to stop receiving events for the whole subtree.
+    Roots are entered with depth=0 and parent=None.
+
+    The files of a listed directory arrive in one visit_files() call, which
+    by default calls visit_file() for each; visitors on the hot path override
+    visit_files() to save a method call per file.
+
+    Visitors that can work from per-directory totals return True from
+    can_use_summary(); unchanged directories then arrive via visit_summary()
+    instead of visit_files().
+    """
+
+    def enter_dir(self, path: str, name: str, depth: int, parent):
+        return None
+
+    def visit_files(self, path: str, files: list[tuple[str, str, os.stat_result]],
+                    state) -> None:
+        """`files` are the (path, name, stat) of the regular files directly in `path`."""
+        visit_file = self.visit_file
+        for file_path, name, st in files:
+            visit_file(file_path, name, st, state)
+
+    def visit_file(self, path: str, name: str, st: os.stat_result, state) -> None:
+        pass
+
+    def can_use_summary(self, state, large_min: int) -> bool:
+        return False
+
+    def visit_summary(self, path: str, summary: DirSummary, state) -> None:
+        pass
+
+    def leave_dir(self, path: str, depth: int, state) -> None:
+        pass
+
+    def finish(self) -> None:
+        pass
+
+
+def norm_path(path: str) -> str:
+    return os.path.normcase(os.path.abspath(path))
+
+
+def is_within(path: str, root: str) -> bool:
+    """True if normalised `path` equals `root` or lies below it."""
+    return path == root or path.startswith(root.rstrip(os.sep) + os.sep)
+
+
+def ancestors(paths) -> set[str]:
+    """All proper ancestors of the given normalised paths."""
+    result: set[str] = set()
+    for path in paths:
+        parent = os.path.dirname(path)
+        while parent not in result:
+            result.add(parent)
+            if os.path.dirname(parent) == parent:
+                break
+            parent = os.path.dirname(parent)
+    return result
+
+
+def merge_roots(roots: list[str]) -> list[str]:
+    """Drop missing, duplicate and nested roots so no directory is listed twice."""
+    candidates = []
+    for root in roots:
+        if root and os.path.isdir(root):
+            candidates.append((norm_path(root), os.path.abspath(root)))
+
+    kept: list[str] = []
+    for key, _ in sorted(candidates, key=lambda c: len(c[0])):
+        if not any(is_within(key, k) for k in kept):
+            kept.append(key)
+
+    merged = []
+    for key, root in candidates:
+        if key in kept:
+            kept.remove(key)
+            merged.append(root)
+    return merged
+
+
+def walk(roots: list[str], visitors: list[Visitor],
+         is_running: Callable[[], bool] | None = None,
+         index: ScanIndex | None = None,
+         mounts: "MountFilter | None" = None) -> None:
+    """
+    Walk `roots` once, dispatching every entry to the interested visitors.
+
+    With an `index`, directories whose mtime is unchanged since the last scan
+    are replayed from it instead of being listed, provided every active
+    visitor accepts a summary. Freshly listed directories are recorded back.
+
+    With `mounts`, sub-directories it rejects (pseudo filesystems, other
+    devices, bind-mount duplicates) are not entered.
+    """
+    running = is_running or (lambda: True)
+    walker = _Walker(visitors, running, index, mounts)
+    for _ in walker.iter_serial(merge_roots(roots)):
+        pass
+    for v in visitors:
+        v.finish()
+
+
+def iter_walk(roots: list[str], visitors: list[Visitor],
+              is_running: Callable[[], bool] | None = None,
+              index: ScanIndex | None = None,
+              mounts: "MountFilter | None" = None) -> Generator[str, None, None]:
+    """
+    walk() that yields the path of every directory once its entries have
+    been dispatched, so callers can drain visitor output as it grows.
+    """
+    running = is_running or (lambda: True)
+    walker = _Walker(visitors, running, index, mounts)
+    yield from walker.iter_serial(merge_roots(roots))
+    for v in visitors:
+        v.finish()
+
+
+def _list_dir(path: str, hint: int | None = None, stat_dir: bool = False) -> tuple:
+    """
+    (mtime_ns, [(path, name, stat)], [(path, name)], others) for one directory;
+    `others` counts the entries in neither list (symlinks, special files,
+    entries that failed to stat). Both lists are None if the directory mtime
+    equals `hint`.
+    """
+    mtime = None
+    files, dirs = [], []
+    others = 0
+    try:
+        if stat_dir:
+            mtime = os.stat(path).st_mtime_ns
+            if mtime == hint:
+                return mtime, None, None, 0
+        with os.scandir(path) as it:
+            for entry in it:
+                try:
+                    if entry.is_file(follow_symlinks=False):
+                        files.append((entry.path, entry.name, entry.stat(follow_symlinks=False)))
+                    elif entry.is_dir(follow_symlinks=False):
+                        dirs.append((entry.path, entry.name))
+                    else:
+                        others += 1
+                except (PermissionError, OSError):
+                    others += 1
+    except (PermissionError, OSError):
+        return None, files, dirs, others
+    return mtime, files, dirs, others
+
+
+def _large_unchanged(path: str, large: list) -> bool:
+    """True if every indexed large file of `path` is still there with its size."""
+    for name, size, _, _ in large:
+        try:
+            st = os.lstat(os.path.join(path, name))
+        except OSError:
+            return False
+        if st.st_size != size:
+            return False
+    return True
+
+
+class _Node:
+    __slots__ = ("path", "depth", "active", "parent", "pending", "complete",
+                 "cached", "record", "size", "count")
+
+    def __init__(self, path: str, depth: int, active: list, parent: "_Node | None"):
+        self.path = path
+        self.depth = depth
+        self.active = active
+        self.parent = parent
+        self.pending = 1       # own listing + one per entered sub-directory
+        self.complete = True   # False if the walk stopped inside the subtree
+        self.cached = None     # IndexRow the directory may be replayed from
+        self.record = None     # fresh listing data to store in the index
+        self.size = 0          # totals over the walked subtree
+        self.count = 0
+
+
+class _Walker:
+    def __init__(self, visitors: list[Visitor], running: Callable[[], bool],
+                 index: ScanIndex | None, mounts: "MountFilter | None" = None):
+        self.visitors = visitors
+        self.running = running
+        self.index = index
+        self.mounts = mounts
+
+    def root_node(self, root: str) -> _Node | None:
+        name = os.path.basename(root.rstrip(os.sep)) or root
+        active = []
+        for v in self.visitors:
+            state = v.enter_dir(root, name, 0, None)
+            if state is not None:
+                active.append((v, state))
+        return _Node(root, 0, active, None) if active else None
+
+    def task(self, node: _Node) -> tuple:
+        """Arguments for _list_dir(); looks the node up in the index."""
+        index = self.index
+        if index is None:
+            return node.path, None, False
+        if all(v.can_use_summary(state, index.large_min) for v, state in node.active):
+            node.cached = index.get(node.path)
+        return node.path, node.cached.mtime_ns if node.cached else None, True
+
+    def list_node(self, node: _Node) -> tuple:
+        """_list_dir() of the node; a replay whose large files changed is listed afresh."""
+        listing = _list_dir(*self.task(node))
+        if listing[1] is None and not _large_unchanged(node.path, node.cached.large):
+            listing = _list_dir(node.path, None, True)
+        return listing
+
+    def dispatch(self, node: _Node, listing: tuple, on_child: Callable[[_Node], None]):
+        mtime, files, dirs, others = listing
+        if files is None:
+            row = node.cached
+            for v, state in node.active:
+                v.visit_summary(node.path, row.summary, state)
+            node.size += row.own_size + sum(link[3] for link in row.links)
+            node.count += row.own_count
+            dirs = [(os.path.join(node.path, name), name) for name in row.children]
+        else:
+            node.cached = None
+            if not self.running():
+                node.complete = False
+                return
+            for v, state in node.active:
+                v.visit_files(node.path, files, state)
+            node.count += len(files)
+            if self.index is not None:
+                # Subtree totals are only kept for the index
+                node.size += sum(st.st_size for _, _, st in files)
+            if mtime is not None:
+                own_size = own_alloc = 0
+                large, links = [], []
+                large_min = self.index.large_min
+                for _, name, st in files:
+                    alloc = allocated_size(st)
+                    link = link_key(st)
+                    if link is None:
+                        own_size += st.st_size
+                        own_alloc += alloc
+                    else:
+                        links.append((name, *link, st.st_size, alloc))
+                    if st.st_size >= large_min:
+                        large.append((name, st.st_size, alloc, link))
+                node.record = (mtime, own_size, own_alloc, len(files), others,
+                               [n for _, n in dirs], large, links)
+
+        mounts = self.mounts
+        for path, name in dirs:
+            if not self.running():
+                node.complete = False
+                return
+            if name == QUARANTINE_NAME or (mounts is not None and mounts.skip(path)):
+                continue
+            child = []
+            for v, state in node.active:
+                sub = v.enter_dir(path, name, node.depth + 1, state)
+                if sub is not None:
+                    child.append((v, sub))
+            if child:
+                node.pending += 1
+                on_child(_Node(path, node.depth + 1, child, node))
+
+    def leave(self, node: _Node | None):
+        """Drop one pending unit; finish the node (and ancestors) when none is left."""
+        while node is not None:
+            node.pending -= 1
+            if node.pending:
+                return
+            for v, state in node.active:
+                v.leave_dir(node.path, node.depth, state)
+            if node.complete and self.index is not None:
+                if node.record is not None:
+                    (mtime, own_size, own_alloc, own_count, others,
+                     children, large, links) = node.record
+                    self.index.record(node.path, mtime, own_size, own_alloc, own_count, others,
+                                      node.size, node.count, children, large, links)
+                elif node.cached is not None:
+                    self.index.update_totals(node.path, node.size, node.count)
+            parent = node.parent
+            if parent is not None:
+                parent.size += node.size
+                parent.count += node.count
+                parent.complete = parent.complete and node.complete
+            node = parent
+
+    # ── walk order ────────────────────────────
+
+    def iter_serial(self, roots: list[str]) -> Generator[str, None, None]:
+        # Explicit stack: no recursion limit, and no generator frame per level
+        for root in roots:
+            node = self.root_node(root)
+            stack = [node] if node is not None else []
+            while stack and self.running():
+                node = stack.pop()
+                children: list[_Node] = []
+                self.dispatch(node, self.list_node(node), children.append)
+                children.reverse()
+                stack.extend(children)
+                self.leave(node)
+                yield node.path
+            if not self.running():
+                break
+
+
+# ──────────────────────────────────────────────
+# Generic visitors
+# ──────────────────────────────────────────────
+
+class LargeFileVisitor(Visitor):
+    """
+    Collects files of at least `min_bytes`.
+
+    With `limit`, only the `limit` largest are kept (a min-heap, so memory
+    stays bounded however many candidates there are). A file with several
+    hard links is listed once, under the first link found. `on_batch` receives
+    newly found candidates at most every `batch_interval` seconds while the
+    walk runs; the final sorted list is in `files` after finish().
+    """
+
+    def __init__(self, min_bytes: int, skip_dirs: frozenset = frozenset(),
+                 skip_prefixes: tuple = (), max_depth: int | None = None,
+                 limit: int | None = None,
+                 on_batch: Callable[[list], None] | None = None,
+                 batch_interval: float = 0.5):
+        self.min_bytes = min_bytes
+        self.skip_dirs = skip_dirs
+        self.skip_prefixes = skip_prefixes
+        self.max_depth = max_depth
+        self.limit = limit
+        self.files: list[dict] = []
+        self._heap: list[tuple[int, str, str, int]] = []  # (size, path, name, allocated)
+        self._links = SizeCounter()
+        self._on_batch = on_batch
+        self._batch_interval = batch_interval
+        self._pending: list[tuple[int, str, str, int]] = []
+        self._last_flush = time.monotonic()
+
+    def enter_dir(self, path, name, depth, parent):
+        if depth == 0:
+            return True
+        if name in self.skip_dirs or name.startswith(self.skip_prefixes):
+            return None
+        if self.max_depth is not None and depth > self.max_depth:
+            return None
+        return True
+
+    def visit_files(self, path, files, state):
+        min_bytes = self.min_bytes
+        # Filtered in one comprehension: on real trees almost no file qualifies
+        big = [f for f in files if f[2].st_size >= min_bytes]
+        if not big:
+            return
+        first = self._links.first
+        if self.limit is None:
+            # Unbounded: append straight away instead of one _add() per file
+            items = [(st.st_size, file_path, name, allocated_size(st))
+                     for file_path, name, st in big
+                     if st.st_nlink <= 1 or first((st.st_dev, st.st_ino))]
+            self._heap.extend(items)
+            if self._on_batch:
+                self._pending.extend(items)
+            return
+        for file_path, name, st in big:
+            if first(link_key(st)):
+                self._add(st.st_size, file_path, name, allocated_size(st))
+
+    def can_use_summary(self, state, large_min):
+        return self.min_bytes >= large_min
+
+    def visit_summary(self, path, summary, state):
+        for name, size, alloc, link in summary.large:
+            if size >= self.min_bytes and self._links.first(link):
+                self._add(size, os.path.join(path, name), name, alloc)
+
+    def leave_dir(self, path, depth, state):
+        if self._pending and time.monotonic() - self._last_flush >= self._batch_interval:
+            self._flush()
+
+    def _add(self, size: int, path: str, name: str, alloc: int):
+        item = (size, path, name, alloc)
+        if self.limit is None:
+            self._heap.append(item)     # no bound, no heap order needed
+        elif len(self._heap) < self.limit:
+            heapq.heappush(self._heap, item)
+        elif item > self._heap[0]:
+            heapq.heapreplace(self._heap, item)
+        else:
+            return
+        if self._on_batch:
+            self._pending.append(item)
+
+    def _flush(self):
+        # Drop candidates already pushed out of the top-K by larger files
+        floor = self._heap[0] if self.limit and len(self._heap) >= self.limit else None
+        batch = [{"path": p, "name": n, "size": s, "allocated": a}
+                 for s, p, n, a in self._pending if floor is None or (s, p, n, a) >= floor]
+        self._pending.clear()
+        self._last_flush = time.monotonic()
+        if batch:
+            self._on_batch(batch)
+
+    def finish(self):
+        if self._pending:
+            self._flush()
+        # Largest first, ties by path: two stable sorts on C-level keys
+        items = sorted(self._heap, key=itemgetter(1))
+        items.sort(key=itemgetter(0), reverse=True)
+        self.files = [{"path": p, "name": n, "size": s, "allocated": a}
+                      for s, p, n, a in items]
+
+
+class FolderSizeVisitor(Visitor):
+    """
+    Sums file sizes per top-level folder of a root, counting hard-linked
+    files once. If `root` is given, other walk roots are ignored.
+    """
+
+    def __init__(self, root: str | None = None, skip_dirs: frozenset = frozenset(),
+                 on_folder_done: Callable[[str, int], None] | None = None):
+        self.root = norm_path(root) if root else None
+        self.skip_dirs = skip_dirs
+        self._on_folder_done = on_folder_done
+        self._sizes = SizeCounter()
+        self._root_cell = [0]  # files directly in the root are not reported
+        self.folders: list[tuple[str, list[int]]] = []
+
+    def enter_dir(self, path, name, depth, parent):
+        if depth == 0:
+            if self.root and norm_path(path) != self.root:
+                return None
+            return self._root_cell
+        if depth == 1:
+            if name in self.skip_dirs:
+                return None
+            cell = [0]
+            self.folders.append((path, cell))
+            return cell
+        return parent
+
+    def visit_files(self, path, files, state):
+        state[0] += self._sizes.files(files)[0]
+
+    def can_use_summary(self, state, large_min):
+        return True
+
+    def visit_summary(self, path, summary, state):
+        state[0] += summary.own_size + self._sizes.links(summary.links)[0]
+
+    def leave_dir(self, path, depth, state):
+        if depth == 1 and self._on_folder_done:
+            self._on_folder_done(path, state[0])
+
+    def results(self) -> list[tuple[str, int]]:
+        """(path, size) of every top-level folder, largest first."""
+        res = [(p, cell[0]) for p, cell in self.folders]
+        res.sort(key=lambda x: (-x[1], x[0]))
+        return res
@@ -0,0 +1,136 @@
+"""
+Persistent cache of file hashes for repeated duplicate searches.
+
+A digest is stored per (path, algorithm, kind) together with the file's
+size, mtime_ns and inode at the time it was read, and is only returned while
+all three still match: rewriting a file in place changes its mtime (and
+usually its size), replacing it changes the inode. `kind` tells fingerprints
+(first and last block) from full hashes.
+The database is kept under `max_bytes` by dropping the least recently used
+entries when the cache is closed.
+"""
+import os
+import sqlite3
+import time
+
+from app.version import APP_NAME
+
+DB_FILE = os.path.join(
+    os.environ.get("APPDATA", os.path.expanduser("~")),
+    APP_NAME,
+    "hash_cache.db",
+)
+
+MAX_BYTES = 256 * 1024 * 1024
+_COMMIT_EVERY = 5000
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS hashes (
+    path      TEXT NOT NULL,
+    algorithm TEXT NOT NULL,
+    kind      TEXT NOT NULL,  -- "fingerprint" or "full"
+    size      INTEGER NOT NULL,
+    mtime_ns  INTEGER NOT NULL,
+    ino       INTEGER NOT NULL,
+    digest    BLOB NOT NULL,
+    used      REAL NOT NULL,
+    PRIMARY KEY (path, algorithm, kind)
+);
+CREATE INDEX IF NOT EXISTS hashes_used ON hashes(used);
+"""
+
+
+class HashCache:
+    """SQLite-backed hash cache. Use from a single thread."""
+
+    def __init__(self, db_path: str = DB_FILE, max_bytes: int = MAX_BYTES):
+        self.max_bytes = max_bytes
+        if db_path != ":memory:":
+            os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self._db = sqlite3.connect(db_path, timeout=30)
+        # Must precede the first table so freed pages can be returned to the OS
+        self._db.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(_SCHEMA)
+        self._now = time.time()
+        self._writes = 0
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(path: str) -> str:
+        return os.path.normcase(path)
+
+    def get(self, path: str, algorithm: str, kind: str,
+            size: int, mtime_ns: int, ino: int) -> bytes | None:
+        """Cached digest, or None if missing or the file changed since."""
+        key = self.key(path)
+        row = self._db.execute(
+            "SELECT size, mtime_ns, ino, digest FROM hashes "
+            "WHERE path = ? AND algorithm = ? AND kind = ?", (key, algorithm, kind)
+        ).fetchone()
+        if row is None or row[:3] != (size, mtime_ns, ino):
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._db.execute(
+            "UPDATE hashes SET used = ? WHERE path = ? AND algorithm = ? AND kind = ?",
+            (self._now, key, algorithm, kind),
+        )
+        self._tick()
+        return row[3]
+
+    def put(self, path: str, algorithm: str, kind: str,
+            size: int, mtime_ns: int, ino: int, digest: bytes):
+        self._db.execute(
+            "INSERT OR REPLACE INTO hashes VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (self.key(path), algorithm, kind, size, mtime_ns, ino, digest, self._now),
+        )
+        self._tick()
+
+    def size_bytes(self) -> int:
+        pages = self._db.execute("PRAGMA page_count").fetchone()[0]
+        free = self._db.execute("PRAGMA freelist_count").fetchone()[0]
+        return (pages - free) * self._db.execute("PRAGMA page_size").fetchone()[0]
+
+    def evict(self):
+        """Drop least recently used entries until the database fits `max_bytes`."""
+        size = self.size_bytes()
+        if size <= self.max_bytes:
+            return
+        rows = self._db.execute("SELECT COUNT(*) FROM hashes").fetchone()[0]
+        # Aim below the limit so eviction does not run on every close
+        drop = rows - int(rows * self.max_bytes * 0.8 / size)
+        self._db.execute(
+            "DELETE FROM hashes WHERE rowid IN "
+            "(SELECT rowid FROM hashes ORDER BY used LIMIT ?)", (drop,)
+        )
+        self._db.commit()
+        self._db.execute("PRAGMA incremental_vacuum")
+
+    def _tick(self):
+        self._writes += 1
+        if self._writes % _COMMIT_EVERY == 0:
+            self._db.commit()
+
+    def close(self):
+        try:
+            self._db.commit()
+            self.evict()
+        finally:
+            self._db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def open_hash_cache() -> HashCache | None:
+    """Open the default cache; None if the database can't be used."""
+    try:
+        return HashCache()
+    except (sqlite3.Error, OSError):
+        return None
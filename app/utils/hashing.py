@@ -0,0 +1,94 @@
+"""
+File hashing backend: every content hash in the app goes through here.
+
+Files are read with readinto() into one preallocated buffer per thread, so
+no bytes object is allocated per chunk. Files of at least MMAP_MIN bytes are
+hashed from a read-only memory map instead, passing the hash slices of the
+page cache without any copy; if the map can't be created (e.g. address
+space on 32-bit builds) the buffered reader is used.
+hashlib releases the GIL for large updates, so hashing threads overlap.
+"""
+import hashlib
+import mmap
+import threading
+
+DEFAULT_ALGORITHM = "blake2b"
+BUFFER_SIZE = 1024 * 1024
+MMAP_MIN = 64 * 1024 * 1024
+MMAP_SLICE = 16 * 1024 * 1024
+
+_local = threading.local()
+
+
+def read_buffer() -> memoryview:
+    """This thread's reusable read buffer."""
+    view = getattr(_local, "view", None)
+    if view is None:
+        view = _local.view = memoryview(bytearray(BUFFER_SIZE))
+    return view
+
+
+def check_algorithm(algorithm: str) -> str:
+    """`algorithm` if hashlib provides it; ValueError otherwise."""
+    hashlib.new(algorithm)
+    return algorithm
+
+
+def hash_file(path: str, algorithm: str = DEFAULT_ALGORITHM,
+              mmap_min: int | None = MMAP_MIN) -> bytes | None:
+    """Digest of the whole file, or None if it can't be read."""
+    h = hashlib.new(algorithm)
+    try:
+        with open(path, "rb", buffering=0) as f:
+            if mmap_min is not None and _hash_mapped(h, f, mmap_min):
+                return h.digest()
+            return _update(h, f, read_buffer()).digest()
+    except OSError:
+        return None
+
+
+def hash_head_tail(path: str, size: int, block: int,
+                   algorithm: str = DEFAULT_ALGORITHM) -> bytes | None:
+    """Digest of the first and last `block` bytes; of the whole file if it is no larger."""
+    h = hashlib.new(algorithm)
+    try:
+        with open(path, "rb", buffering=0) as f:
+            if size <= 2 * block:
+                return _update(h, f, read_buffer()).digest()
+            view = read_buffer()[:block]
+            n = f.readinto(view)
+            h.update(view[:n])
+            f.seek(size - block)
+            n = f.readinto(view)
+            h.update(view[:n])
+    except OSError:
+        return None
+    return h.digest()
+
+
+def _update(h, f, view: memoryview):
+    while True:
+        n = f.readinto(view)
+        if not n:
+            return h
+        h.update(view[:n])
+
+
+def _hash_mapped(h, f, mmap_min: int) -> bool:
+    """Feed `f` to `h` through mmap; False (nothing hashed) if it is too small or can't be mapped."""
+    try:
+        if f.seek(0, 2) < mmap_min:
+            f.seek(0)
+            return False
+        f.seek(0)
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError, OverflowError):
+        f.seek(0)
+        return False
+    with mm:
+        if hasattr(mm, "madvise"):
+            mm.madvise(mmap.MADV_SEQUENTIAL)
+        with memoryview(mm) as view:
+            for pos in range(0, len(view), MMAP_SLICE):
+                h.update(view[pos:pos + MMAP_SLICE])
+    return True
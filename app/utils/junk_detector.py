@@ -2,9 +2,12 @@
 Junk file categories and detection logic.
 """
 import os
-import hashlib
-from pathlib import Path
-from typing import Generator
+from typing import Callable, Generator
+
+from app.utils import duplicates
+from app.utils.fs_walker import Visitor, LargeFileVisitor, ancestors, iter_walk, norm_path
+from app.utils.hash_cache import open_hash_cache
+from app.utils.size_accounting import allocated_size
 
 
 JUNK_CATEGORIES = {
@@ -82,122 +85,202 @@ JUNK_CATEGORIES = {
 }
 
 
+BATCH_SIZE = 1000
+
+
 def scan_junk_category(category_key: str) -> Generator[dict, None, None]:
     """Yields file info dicts for a junk category."""
-    cat = JUNK_CATEGORIES.get(category_key, {})
-    if not cat:
+    for batch in iter_junk_batches(category_key):
+        yield from batch
+
+
+def iter_junk_batches(category_key: str, batch_size: int = BATCH_SIZE) -> Generator[list[dict], None, None]:
+    """Yields lists of up to `batch_size` file info dicts as the walk finds them."""
+    if category_key not in JUNK_CATEGORIES:
         return
+    batch: list[dict] = []
+    visitor = JunkVisitor([category_key], sink=lambda key, info: batch.append(info))
+    for _ in iter_walk(visitor.roots(), [visitor]):
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
 
-    for base_path in cat.get("paths", []):
-        if not base_path or not os.path.exists(base_path):
-            continue
-        yield from _scan_dir(
-            base_path,
-            cat.get("extensions", set()),
-            cat.get("recursive", True),
-            cat.get("name_patterns", []),
-        )
 
+def _suffix(name: str) -> str:
+    """Path(name).suffix.lower() without building a Path."""
+    i = name.rfind(".")
+    return name[i:].lower() if 0 < i < len(name) - 1 else ""
 
-def _scan_dir(path: str, extensions: set, recursive: bool, name_patterns: list) -> Generator[dict, None, None]:
-    try:
-        with os.scandir(path) as it:
-            for entry in it:
-                try:
-                    if entry.is_file(follow_symlinks=False):
-                        ext = Path(entry.name).suffix.lower()
-                        if not extensions or ext in extensions:
-                            if not name_patterns or any(entry.name.startswith(p) for p in name_patterns):
-                                try:
-                                    size = entry.stat().st_size
-                                    yield {
-                                        "path": entry.path,
-                                        "name": entry.name,
-                                        "size": size,
-                                    }
-                                except (PermissionError, OSError):
-                                    pass
-                        elif not extensions:
-                            try:
-                                size = entry.stat().st_size
-                                yield {
-                                    "path": entry.path,
-                                    "name": entry.name,
-                                    "size": size,
-                                }
-                            except (PermissionError, OSError):
-                                pass
-                    elif entry.is_dir(follow_symlinks=False) and recursive:
-                        yield from _scan_dir(entry.path, extensions, recursive, name_patterns)
-                except (PermissionError, OSError):
-                    pass
-    except (PermissionError, OSError):
-        pass
+
+class JunkRules:
+    """
+    Category rules for one set of active categories, compiled into lookups.
+
+    Every known extension maps to the categories it satisfies, split into
+    those that match outright and those that still need a name prefix;
+    prefixes are looked up by slicing the name at each distinct pattern
+    length, so one file is classified into all its categories at once.
+    """
+
+    def __init__(self, keys: tuple[str, ...]):
+        plain_any, prefixed_any = [], []
+        exts: set[str] = set()
+        self._prefixes: dict[str, set[str]] = {}
+        for key in keys:
+            cat = JUNK_CATEGORIES[key]
+            patterns = cat.get("name_patterns", [])
+            for p in patterns:
+                self._prefixes.setdefault(p, set()).add(key)
+            if not cat.get("extensions"):
+                (prefixed_any if patterns else plain_any).append(key)
+            exts.update(cat.get("extensions", ()))
+        self._lengths = sorted({len(p) for p in self._prefixes})
+        self._default = (tuple(plain_any), tuple(prefixed_any))
+        self._by_ext: dict[str, tuple[tuple, tuple]] = {}
+        for ext in exts:
+            plain, prefixed = list(plain_any), list(prefixed_any)
+            for key in keys:
+                cat = JUNK_CATEGORIES[key]
+                if ext in cat.get("extensions", ()):
+                    (prefixed if cat.get("name_patterns") else plain).append(key)
+            self._by_ext[ext] = (tuple(plain), tuple(prefixed))
+
+    def classify(self, name: str) -> tuple[str, ...]:
+        """Keys of all categories `name` belongs to."""
+        plain, prefixed = self._by_ext.get(_suffix(name), self._default)
+        if not prefixed:
+            return plain
+        hits: set[str] = set()
+        for n in self._lengths:
+            hits.update(self._prefixes.get(name[:n], ()))
+        return plain + tuple(k for k in prefixed if k in hits)
+
+
+class JunkVisitor(Visitor):
+    """
+    Collects junk files for several categories during one walk.
+    State of a directory is the tuple of categories collecting there;
+    an empty tuple marks an ancestor of some category root.
+    """
+
+    def __init__(self, categories: list[str] | None = None,
+                 on_category_done: Callable[[str, list], None] | None = None,
+                 sink: Callable[[str, dict], None] | None = None):
+        wanted = set(categories or JUNK_CATEGORIES)
+        keys = [k for k in JUNK_CATEGORIES if k in wanted]
+        self.files: dict[str, list[dict]] = {k: [] for k in keys}
+        self._on_category_done = on_category_done
+        self._sink = sink  # if set, files are handed over instead of kept
+        self._roots: dict[str, list[str]] = {}     # normalised root -> categories
+        self._pending: dict[str, int] = {k: 0 for k in keys}
+        self._done: set[str] = set()
+        self._emitted = 0                          # categories reported, in order
+        self._rules: dict[tuple, JunkRules] = {}   # compiled once per category set
+
+        for key in keys:
+            for base_path in JUNK_CATEGORIES[key].get("paths", []):
+                if not base_path or not os.path.isdir(base_path):
+                    continue
+                norm = norm_path(base_path)
+                cats = self._roots.setdefault(norm, [])
+                if key in cats:
+                    continue
+                cats.append(key)
+                self._pending[key] += 1
+        self._ancestors = ancestors(self._roots)
+
+    def roots(self) -> list[str]:
+        return list(self._roots)
+
+    def enter_dir(self, path, name, depth, parent):
+        norm = os.path.normcase(path)
+        cats = tuple(k for k in parent if JUNK_CATEGORIES[k].get("recursive", True)) if parent else ()
+        own = self._roots.get(norm)
+        if own:
+            cats += tuple(k for k in own if k not in cats)
+        if cats and cats not in self._rules:
+            self._rules[cats] = JunkRules(cats)
+        if cats or norm in self._ancestors:
+            return cats
+        return None
+
+    def visit_files(self, path, files, state):
+        if not state:
+            return
+        classify = self._rules[state].classify
+        for file_path, name, st in files:
+            for key in classify(name):
+                info = {"path": file_path, "name": name, "size": st.st_size,
+                        "allocated": allocated_size(st)}
+                if self._sink:
+                    self._sink(key, info)
+                else:
+                    self.files[key].append(info)
+
+    def can_use_summary(self, state, large_min):
+        return not state  # only directories on the way to a category root
+
+    def leave_dir(self, path, depth, state):
+        own = self._roots.get(os.path.normcase(path))
+        if not own:
+            return
+        for key in own:
+            self._pending[key] -= 1
+            if self._pending[key] == 0:
+                self._emit(key)
+
+    def finish(self):
+        # Categories without reachable roots (e.g. recycle_bin) or cut short by a stop
+        for key in self.files:
+            self._emit(key)
+
+    def _emit(self, key: str):
+        # Categories finish in walk order but are reported in JUNK_CATEGORIES
+        # order: a finished one waits until every category before it is done
+        self._done.add(key)
+        keys = list(self.files)
+        while self._emitted < len(keys) and keys[self._emitted] in self._done:
+            done = keys[self._emitted]
+            self._emitted += 1
+            self.files[done].sort(key=lambda f: f["path"])
+            if self._on_category_done:
+                self._on_category_done(done, self.files[done])
+
+
+_LARGE_SKIP_DIRS = frozenset({
+    "Windows", "System Volume Information", "$Recycle.Bin",
+    "Recovery", "ProgramData\\Microsoft\\Windows\\WER",
+})
 
 
 def find_large_files(drives: list[str], min_size_mb: int = 500) -> Generator[dict, None, None]:
     """Find files larger than min_size_mb MB."""
-    min_bytes = min_size_mb * 1024 * 1024
-    for drive in drives:
-        yield from _scan_large(drive, min_bytes)
+    for batch in iter_large_batches(drives, min_size_mb):
+        yield from batch
 
 
-def _scan_large(path: str, min_bytes: int) -> Generator[dict, None, None]:
-    SKIP_DIRS = {
-        "Windows", "System Volume Information", "$Recycle.Bin",
-        "Recovery", "ProgramData\\Microsoft\\Windows\\WER",
-    }
-    try:
-        with os.scandir(path) as it:
-            for entry in it:
-                try:
-                    if entry.is_file(follow_symlinks=False):
-                        try:
-                            size = entry.stat().st_size
-                            if size >= min_bytes:
-                                yield {"path": entry.path, "name": entry.name, "size": size}
-                        except (PermissionError, OSError):
-                            pass
-                    elif entry.is_dir(follow_symlinks=False):
-                        if entry.name not in SKIP_DIRS:
-                            yield from _scan_large(entry.path, min_bytes)
-                except (PermissionError, OSError):
-                    pass
-    except (PermissionError, OSError):
-        pass
+def iter_large_batches(drives: list[str], min_size_mb: int = 500) -> Generator[list[dict], None, None]:
+    """Yields lists of large files per directory as the walk finds them."""
+    batches: list[list[dict]] = []
+    visitor = LargeFileVisitor(min_size_mb * 1024 * 1024, skip_dirs=_LARGE_SKIP_DIRS,
+                               on_batch=batches.append, batch_interval=0)
+    for _ in iter_walk(drives, [visitor]):
+        while batches:
+            yield batches.pop(0)
+    while batches:
+        yield batches.pop(0)
 
 
 def find_duplicates(file_list: list[dict]) -> list[list[dict]]:
-    """Group duplicate files by size then MD5 hash."""
-    from collections import defaultdict
-    by_size = defaultdict(list)
-    for f in file_list:
-        by_size[f["size"]].append(f)
-
-    duplicates = []
-    for size, files in by_size.items():
-        if len(files) < 2 or size == 0:
-            continue
-        by_hash = defaultdict(list)
-        for f in files:
-            h = _md5(f["path"])
-            if h:
-                by_hash[h].append(f)
-        for group in by_hash.values():
-            if len(group) >= 2:
-                duplicates.append(group)
-    return duplicates
-
-
-def _md5(path: str) -> str | None:
+    """Group identical files; see app.utils.duplicates for the stages."""
+    cache = open_hash_cache()
     try:
-        h = hashlib.md5()
-        with open(path, "rb") as f:
-            for chunk in iter(lambda: f.read(65536), b""):
-                h.update(chunk)
-        return h.hexdigest()
-    except (PermissionError, OSError):
-        return None
+        return duplicates.find_duplicates(file_list, cache=cache)
+    finally:
+        if cache:
+            cache.close()
 
 
 def format_size(size_bytes: int) -> str:
@@ -0,0 +1,148 @@
+"""
+Mount table and filesystem-boundary pruning for drive scans.
+
+MountFilter decides, for the few directories that are mount points, whether
+walk() should descend into them:
+  - mounts of pseudo, virtual and network filesystems (EXCLUDED_FSTYPES)
+    are never entered;
+  - with one_device, mounts whose st_dev differs from every walk root are
+    left out, unless the mount point is itself one of the roots;
+  - a bind mount (or a second mount of the same filesystem) whose source
+    directory is already reachable from the roots is skipped, so every
+    physical directory is walked at most once.
+Ordinary directories only cost one set lookup. Bind mounts are recognised
+from /proc/self/mountinfo on Linux; elsewhere the table comes from psutil
+and only the fstype and device rules apply.
+"""
+import os
+import re
+from typing import NamedTuple
+
+from app.utils.fs_walker import is_within
+
+MOUNTINFO = "/proc/self/mountinfo"
+
+EXCLUDED_FSTYPES = frozenset({
+    # kernel and virtual filesystems
+    "proc", "sysfs", "devtmpfs", "devpts", "tmpfs", "ramfs", "cgroup", "cgroup2",
+    "securityfs", "debugfs", "tracefs", "pstore", "bpf", "configfs", "fusectl",
+    "mqueue", "hugetlbfs", "autofs", "binfmt_misc", "efivarfs", "rpc_pipefs",
+    "nsfs", "selinuxfs", "overlay", "squashfs",
+    # network shares
+    "nfs", "nfs4", "cifs", "smbfs", "smb3", "sshfs", "fuse.sshfs", "9p",
+    "afs", "ceph", "glusterfs", "fuse.gvfsd-fuse",
+})
+
+
+class Mount(NamedTuple):
+    point: str    # where it is mounted
+    fstype: str
+    dev: str      # "major:minor" from mountinfo, else the device name
+    root: str     # directory of the filesystem shown at `point` ("/" if unknown)
+
+
+def _unescape(field: str) -> str:
+    # mountinfo writes space, tab, newline and backslash as \ooo
+    return re.sub(r"\\([0-7]{3})", lambda m: chr(int(m.group(1), 8)), field)
+
+
+def read_mounts() -> list[Mount]:
+    """Every mounted filesystem, including pseudo ones."""
+    try:
+        with open(MOUNTINFO, encoding="utf-8", errors="surrogateescape") as f:
+            lines = f.read().splitlines()
+    except OSError:
+        lines = None
+    if lines is not None:
+        mounts = []
+        for line in lines:
+            head, sep, tail = line.partition(" - ")
+            fields = head.split()
+            if not sep or len(fields) < 5 or not tail:
+                continue
+            mounts.append(Mount(_unescape(fields[4]), tail.split()[0],
+                                fields[2], _unescape(fields[3])))
+        return mounts
+
+    try:
+        import psutil
+        parts = psutil.disk_partitions(all=True)
+    except Exception:
+        return []
+    return [Mount(p.mountpoint, p.fstype, p.device, "/") for p in parts]
+
+
+class MountFilter:
+    """Mount points under `roots` that walk() must not descend into."""
+
+    def __init__(self, roots: list[str], one_device: bool = True,
+                 exclude_fstypes: frozenset = EXCLUDED_FSTYPES,
+                 mounts: list[Mount] | None = None):
+        mounts = read_mounts() if mounts is None else mounts
+        keys = [os.path.normcase(os.path.abspath(r)) for r in roots if r]
+        self._roots = set(keys)
+        self._devices = set()
+        for root in keys:
+            try:
+                self._devices.add(os.stat(root).st_dev)
+            except OSError:
+                pass
+        self.one_device = one_device
+
+        self._excluded: set[str] = set()
+        self._points: set[str] = set()   # mount points that need a device check
+        duplicates = _duplicates(mounts, keys)
+        for m in mounts:
+            key = os.path.normcase(m.point)
+            if key in self._roots or not any(is_within(key, r) for r in keys):
+                continue
+            if m.fstype in exclude_fstypes or m in duplicates:
+                self._excluded.add(key)
+            else:
+                self._points.add(key)
+
+    def skip(self, path: str) -> bool:
+        """True if the directory at `path` is on a mount the walk should leave out."""
+        key = os.path.normcase(path)
+        if key in self._excluded:
+            return True
+        if not self.one_device or key not in self._points:
+            return False
+        try:
+            return os.stat(path).st_dev not in self._devices
+        except OSError:
+            return True
+
+
+def device_root(path: str, dev: int) -> str:
+    """Topmost ancestor of `path` still on device `dev`: the mount point holding it."""
+    cur = os.path.dirname(path)
+    while True:
+        parent = os.path.dirname(cur)
+        if parent == cur:
+            return cur
+        try:
+            if os.lstat(parent).st_dev != dev:
+                return cur
+        except OSError:
+            return cur
+        cur = parent
+
+
+def _duplicates(mounts: list[Mount], roots: list[str]) -> set[Mount]:
+    """Mounts showing a directory that another mount under `roots` already shows."""
+    reachable = [m for m in mounts
+                 if any(is_within(os.path.normcase(m.point), r) for r in roots)]
+    dups = set()
+    for m in mounts:
+        for s in reachable:
+            if s is m or s.dev != m.dev or not is_within(m.root, s.root):
+                continue
+            if s.root == m.root and (len(s.point), s.point) > (len(m.point), m.point):
+                continue  # of two identical mounts the shorter path is walked
+            rel = os.path.relpath(m.root, s.root)
+            source = os.path.normpath(os.path.join(s.point, rel))
+            if not is_within(source, m.point):
+                dups.add(m)
+                break
+    return dups
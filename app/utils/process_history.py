@@ -0,0 +1,164 @@
+"""
+Recent metric history per process: CPU %, RSS and disk I/O.
+
+Each process gets a ring of samples (HISTORY_SAMPLES, five minutes at the
+monitor's 2 s tick) in typed arrays, so a sample costs 20 bytes whatever
+the number of ticks. HISTORY_BUDGET is a hard bound on all rings together:
+
+- rings of exited processes are kept while they fit, then dropped least
+  recently updated first;
+- when the live processes alone would not fit, every ring is halved
+  (keeping its newest samples) until they do, so all of them keep a
+  shorter window rather than some losing theirs; rings grow back, again
+  by doubling, once enough processes have exited;
+- at one sample per ring, processes beyond the budget get no history.
+
+Written by the monitor thread and read by the UI, hence the lock.
+"""
+import threading
+from array import array
+from collections import OrderedDict
+
+HISTORY_SAMPLES = 150                 # 5 min at a 2 s tick
+HISTORY_BUDGET = 4 * 1024 * 1024      # bytes for all rings together
+_RING_OVERHEAD = 300                  # object, arrays and dict slot
+
+
+def _ring_bytes(samples: int) -> int:
+    return samples * 20 + _RING_OVERHEAD
+
+
+class _Ring:
+    __slots__ = ("cpu", "rss", "io", "count", "last_io")
+
+    def __init__(self, size: int):
+        self.cpu = array("f", bytes(4 * size))
+        self.rss = array("q", bytes(8 * size))
+        self.io = array("q", bytes(8 * size))    # bytes read + written during the tick
+        self.count = 0
+        self.last_io = None
+
+    def add(self, cpu: float, rss: int, io_total: int | None):
+        i = self.count % len(self.cpu)
+        self.cpu[i] = cpu
+        self.rss[i] = rss
+        if io_total is None or self.last_io is None:
+            self.io[i] = 0
+        else:
+            self.io[i] = max(io_total - self.last_io, 0)
+        self.last_io = io_total
+        self.count += 1
+
+    def resized(self, size: int) -> "_Ring":
+        """A ring of `size` samples holding the newest samples of this one."""
+        ring = _Ring(size)
+        n = min(self.count, len(self.cpu), size)
+        if n:
+            for src, dst in ((self.cpu, ring.cpu), (self.rss, ring.rss), (self.io, ring.io)):
+                dst[:n] = array(dst.typecode, self.series(src)[-n:])
+        ring.count = n
+        ring.last_io = self.last_io
+        return ring
+
+    def series(self, values: array) -> list:
+        """The samples of `values` oldest first."""
+        size = len(values)
+        if self.count <= size:
+            return values[:self.count].tolist()
+        i = self.count % size
+        return (values[i:] + values[:i]).tolist()
+
+    def avg_cpu(self) -> float:
+        n = min(self.count, len(self.cpu))
+        return sum(self.cpu[:n]) / n if n else 0.0
+
+
+class ProcessHistory:
+    """Rings keyed by (pid, create_time); safe to share between threads."""
+
+    def __init__(self, samples: int = HISTORY_SAMPLES, budget: int = HISTORY_BUDGET):
+        self.samples = samples          # ring size while the budget allows it
+        self._budget = budget
+        self._size = samples            # current ring size
+        self._max_rings = max(budget // _ring_bytes(samples), 1)
+        self._rings: OrderedDict[tuple, _Ring] = OrderedDict()   # least recently updated first
+        self._live: set[tuple] = set()          # recorded this tick
+        self._last_live: set[tuple] = set()     # recorded last tick
+        self._wanted = 0                        # record() calls this tick, with or without a ring
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._rings)
+
+    @property
+    def ring_size(self) -> int:
+        """Samples each ring currently holds (`samples` unless over the budget)."""
+        return self._size
+
+    def memory(self) -> int:
+        """Estimated bytes held by all rings; never above the budget."""
+        return len(self._rings) * _ring_bytes(self._size)
+
+    def record(self, key: tuple, cpu: float, rss: int, io_total: int | None) -> float:
+        """Add one tick's sample for `key`; returns its average CPU % over the window."""
+        with self._lock:
+            self._wanted += 1
+            ring = self._rings.get(key)
+            if ring is None:
+                if not self._make_room():
+                    return cpu      # budget full of live rings until end_tick() shrinks them
+                ring = self._rings[key] = _Ring(self._size)
+            else:
+                self._rings.move_to_end(key)
+            ring.add(cpu, rss, io_total)
+            self._live.add(key)
+            return ring.avg_cpu()
+
+    def _make_room(self) -> bool:
+        """Drop exited rings until one more fits; False if only live ones are left."""
+        while len(self._rings) >= self._max_rings:
+            key = next(iter(self._rings))
+            if key in self._live or key in self._last_live:
+                return False
+            del self._rings[key]
+        return True
+
+    def end_tick(self):
+        """
+        Call after recording every live process: fits the ring size to the
+        number of live processes and drops exited rings over the budget.
+        """
+        with self._lock:
+            live = self._wanted
+            size = self._size
+            while size > 1 and live * _ring_bytes(size) > self._budget:
+                size //= 2
+            while size < self.samples:
+                bigger = min(size * 2, self.samples)
+                if live * _ring_bytes(bigger) > self._budget:
+                    break
+                size = bigger
+            self._max_rings = max(self._budget // _ring_bytes(size), 1)
+            # Exited rings go first, so growing never resizes rings about to be dropped
+            while len(self._rings) > self._max_rings:
+                key = next(iter(self._rings))
+                if key in self._live:
+                    break
+                del self._rings[key]
+            if size != self._size:
+                self._size = size
+                for key, ring in self._rings.items():
+                    self._rings[key] = ring.resized(size)
+            self._last_live = self._live
+            self._live = set()
+            self._wanted = 0
+
+    def series(self, key: tuple) -> dict[str, list] | None:
+        """{"cpu", "rss", "io"} samples of `key`, oldest first; None if it has no history."""
+        with self._lock:
+            ring = self._rings.get(key)
+            if ring is None:
+                return None
+            return {"cpu": ring.series(ring.cpu),
+                    "rss": ring.series(ring.rss),
+                    "io": ring.series(ring.io)}
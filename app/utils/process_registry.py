@@ -0,0 +1,107 @@
+"""
+Registry of running processes that outlives a single refresh.
+
+psutil.Process objects are kept from one poll to the next, keyed by
+(pid, create_time): cpu_percent() then measures since the previous poll
+on the same object instead of starting from zero, and the attributes that
+never change for a process (exe, username, cmdline) are queried once per
+process lifetime rather than every cycle. The changing ones are read
+together under oneshot(). Processes that exited, or whose PID was reused,
+are dropped at the next poll. A process whose create time is denied is
+keyed (pid, 0.0) and stays listed.
+
+The last polled state is kept as a ProcessSnapshot; poll() returns only
+what changed since the previous poll. Every sample also goes into a
+ProcessHistory, whose five-minute CPU average is reported as `avg_cpu`.
+"""
+import psutil
+
+from app.utils.process_history import ProcessHistory
+from app.utils.process_snapshot import ProcessDelta, ProcessSnapshot
+
+# Per-attribute failures that still leave the process listed
+_ACCESS_ERRORS = (psutil.AccessDenied, psutil.ZombieProcess)
+_HAS_IO = hasattr(psutil.Process, "io_counters")     # not on macOS
+
+
+def _query(method, default=""):
+    try:
+        return method() or default
+    except _ACCESS_ERRORS:
+        return default
+
+
+class ProcessRegistry:
+    """Polls running processes; keep one instance across refreshes."""
+
+    def __init__(self, history: ProcessHistory | None = None):
+        self._procs: dict[int, psutil.Process] = {}
+        self.state = ProcessSnapshot()
+        self.history = history if history is not None else ProcessHistory()
+
+    def __len__(self) -> int:
+        return len(self._procs)
+
+    def poll(self) -> ProcessDelta:
+        """Sample every process and return the delta from the previous poll."""
+        state = self.state
+        alive: dict[int, psutil.Process] = {}
+        seen: set[tuple] = set()
+        added, changed = [], []
+        for pid in psutil.pids():
+            try:
+                proc = self._procs.get(pid)
+                # Same check process_iter() makes: a reused PID has another create time
+                if proc is None or not proc.is_running():
+                    proc = psutil.Process(pid)
+                # Denied for some protected processes: keyed by PID alone then
+                key = (pid, _query(proc.create_time, 0.0))
+                if key in state:
+                    fields = state.changes(state.row_of(key), self._volatile(proc, key))
+                    if fields:
+                        changed.append((key, fields))
+                else:
+                    added.append(self._first_sample(proc, key))
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                continue
+            alive[pid] = proc
+            seen.add(key)
+        self.history.end_tick()
+        removed = [k for k in state.keys if k not in seen]
+        self._procs = alive
+        delta = ProcessDelta(False, added, removed, changed)
+        state.apply(delta)
+        return delta
+
+    def keyframe(self) -> ProcessDelta:
+        """The last polled state in full."""
+        return ProcessDelta(True, self.state.rows(), [], [])
+
+    def _volatile(self, proc: psutil.Process, key: tuple) -> dict:
+        with proc.oneshot():
+            mem = _query(proc.memory_info, None)
+            io = _query(proc.io_counters, None) if _HAS_IO else None
+            values = {
+                "ppid": _query(proc.ppid, 0),
+                "name": _query(proc.name),
+                "cpu": _query(proc.cpu_percent, 0.0),
+                "ram": mem.rss if mem else 0,
+                "threads": _query(proc.num_threads, 0),
+                "status": _query(proc.status),
+            }
+        io_total = io.read_bytes + io.write_bytes if io else None
+        avg = self.history.record(key, values["cpu"], values["ram"], io_total)
+        values["avg_cpu"] = round(avg, 1)     # rounded: an idle process yields no delta
+        return values
+
+    def _first_sample(self, proc: psutil.Process, key: tuple) -> dict:
+        with proc.oneshot():
+            row = {
+                "pid": proc.pid,
+                "user": _query(proc.username),
+                "exe": _query(proc.exe),
+                "cmdline": " ".join(_query(proc.cmdline, [])),
+                "create_time": key[1],
+            }
+        row.update(self._volatile(proc, key))  # starts cpu_percent
+        return row
@@ -0,0 +1,140 @@
+"""
+Columnar process snapshots and the deltas between them.
+
+A ProcessSnapshot holds one list (or array) per field rather than a dict
+per process. ProcessMonitor sends a ProcessDelta each tick: the processes
+that started (full rows), the keys of those that exited, and for the rest
+only the fields that changed, so on a quiet machine most ticks carry
+little. Every few ticks a keyframe carries the full state instead; a
+consumer reconciles its copy against it with diff(), so it recovers from
+anything it missed.
+
+Processes are keyed by (pid, create_time), which stays unique when a PID
+is reused.
+"""
+from array import array
+from typing import NamedTuple
+
+FIELDS = ("pid", "ppid", "name", "cpu", "avg_cpu", "ram", "threads", "status",
+          "user", "exe", "cmdline", "create_time")
+# The rest is fixed for a process's lifetime. ppid is not: orphans are reparented
+VOLATILE = ("ppid", "name", "cpu", "avg_cpu", "ram", "threads", "status")
+
+_ARRAYS = {"pid": "q", "ppid": "q", "cpu": "d", "avg_cpu": "d", "ram": "q",
+           "threads": "q", "create_time": "d"}
+
+
+class ProcessDelta(NamedTuple):
+    keyframe: bool                          # `added` is the full state, nothing else is set
+    added: list[dict]                       # rows of processes that started
+    removed: list[tuple]                    # keys of processes that exited
+    changed: list[tuple[tuple, dict]]       # (key, {field: new value}) of volatile fields
+
+    def __bool__(self) -> bool:
+        return self.keyframe or bool(self.added or self.removed or self.changed)
+
+
+def proc_key(proc: dict) -> tuple:
+    return proc["pid"], proc["create_time"]
+
+
+class ProcessSnapshot:
+    """State of all processes, one column per field; row order is insertion order."""
+
+    def __init__(self):
+        self.keys: list[tuple] = []
+        self._rows: dict[tuple, int] = {}
+        self.columns: dict[str, list] = {
+            f: array(_ARRAYS[f]) if f in _ARRAYS else [] for f in FIELDS
+        }
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def __contains__(self, key: tuple) -> bool:
+        return key in self._rows
+
+    def row_of(self, key: tuple) -> int:
+        return self._rows[key]
+
+    def get(self, row: int, field: str):
+        return self.columns[field][row]
+
+    def row(self, row: int) -> dict:
+        return {f: col[row] for f, col in self.columns.items()}
+
+    def rows(self) -> list[dict]:
+        return [self.row(i) for i in range(len(self.keys))]
+
+    # ── changes ──────────────────────────────
+
+    def append(self, procs: list[dict]):
+        start = len(self.keys)
+        for f, col in self.columns.items():
+            col.extend(p[f] for p in procs)
+        for i, p in enumerate(procs, start):
+            key = proc_key(p)
+            self.keys.append(key)
+            self._rows[key] = i
+
+    def set(self, key: tuple, fields: dict):
+        row = self._rows[key]
+        for f, value in fields.items():
+            self.columns[f][row] = value
+
+    def remove_rows(self, first: int, last: int):
+        """Drop rows first..last; call reindex() once all removals are done."""
+        for col in self.columns.values():
+            del col[first:last + 1]
+        for key in self.keys[first:last + 1]:
+            del self._rows[key]
+        del self.keys[first:last + 1]
+
+    def reindex(self):
+        self._rows = {k: i for i, k in enumerate(self.keys)}
+
+    def changes(self, row: int, values: dict) -> dict:
+        """The volatile fields of `values` that differ from `row`."""
+        return {f: values[f] for f in VOLATILE if self.columns[f][row] != values[f]}
+
+    # ── deltas ───────────────────────────────
+
+    def diff(self, procs: list[dict]) -> ProcessDelta:
+        """The delta that turns this snapshot into the full state `procs`."""
+        fresh = {proc_key(p): p for p in procs}
+        removed = [k for k in self.keys if k not in fresh]
+        added, changed = [], []
+        for key, proc in fresh.items():
+            row = self._rows.get(key)
+            if row is None:
+                added.append(proc)
+                continue
+            fields = self.changes(row, proc)
+            if fields:
+                changed.append((key, fields))
+        return ProcessDelta(False, added, removed, changed)
+
+    def apply(self, delta: ProcessDelta):
+        if delta.keyframe:
+            delta = self.diff(delta.added)
+        for first, last in reversed(list(runs(sorted(self._rows[k] for k in delta.removed)))):
+            self.remove_rows(first, last)
+        if delta.removed:
+            self.reindex()
+        for key, fields in delta.changed:
+            self.set(key, fields)
+        self.append(delta.added)
+
+
+def runs(rows: list[int]):
+    """(first, last) of each run of consecutive numbers in ascending `rows`."""
+    start = prev = None
+    for r in rows:
+        if prev is not None and r == prev + 1:
+            prev = r
+            continue
+        if start is not None:
+            yield start, prev
+        start = prev = r
+    if start is not None:
+        yield start, prev
@@ -0,0 +1,293 @@
+"""
+Quarantine: instant deletion with a deferred purge and undo.
+
+move() renames each item into a quarantine directory on the same
+filesystem, one rename per item however large it is, so the selection is
+gone from view at once. The directory is QUARANTINE_NAME at the root of the
+item's filesystem, or in the home directory when the root is not writable;
+if the rename still fails (bind mounts, no permission) one next to the item
+is used. A SQLite journal maps every stored entry back to its original path:
+restore() undoes the last move for whatever is still there, and purge()
+removes entries older than the grace period for good.
+
+Journal rows are committed before their renames, so a crash can leave rows
+whose entry was never moved (purge and restore just drop them) but never
+an unrecorded entry in a quarantine directory.
+"""
+import os
+import sqlite3
+import stat
+import time
+import uuid
+from typing import Callable
+
+from app.utils.file_utils import DeleteResult
+from app.utils.fs_walker import QUARANTINE_NAME
+from app.utils.mounts import device_root
+from app.utils.tree_delete import remove_tree
+from app.version import APP_NAME
+
+DB_FILE = os.path.join(
+    os.environ.get("APPDATA", os.path.expanduser("~")),
+    APP_NAME,
+    "quarantine.db",
+)
+
+GRACE_SECONDS = 15 * 60     # how long undo stays possible
+MOVE_BATCH = 500
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS items (
+    id       INTEGER PRIMARY KEY,
+    batch    INTEGER NOT NULL,   -- one per move() call, the unit of undo
+    original TEXT NOT NULL,
+    stored   TEXT NOT NULL,
+    size     INTEGER NOT NULL,   -- 0 for directories (not measured)
+    moved    REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS items_batch ON items(batch);
+CREATE INDEX IF NOT EXISTS items_moved ON items(moved);
+CREATE TABLE IF NOT EXISTS dirs (
+    path TEXT PRIMARY KEY
+);
+"""
+
+
+class Quarantine:
+    """SQLite-journaled quarantine. Use from a single thread."""
+
+    def __init__(self, db_path: str = DB_FILE, grace: float = GRACE_SECONDS):
+        self.grace = grace
+        if db_path != ":memory:":
+            os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self._db = sqlite3.connect(db_path, timeout=30)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(_SCHEMA)
+        self._by_dev: dict[int, str | None] = {}
+
+    # -- moving in --------------------------------------------------------
+
+    def move(self, paths: list[str],
+             on_batch: Callable[[list[DeleteResult]], None] | None = None,
+             is_running: Callable[[], bool] | None = None,
+             keep_dirs: frozenset[str] = frozenset()) -> list[DeleteResult]:
+        """
+        Move `paths` into quarantine as one undoable batch. A result's
+        `freed` is the file size the purge will free (0 for directories).
+        Directories in `keep_dirs` are replaced by an empty one.
+        """
+        running = is_running or (lambda: True)
+        batch = self._db.execute("SELECT COALESCE(MAX(batch), 0) + 1 FROM items").fetchone()[0]
+        results: list[DeleteResult] = []
+        for i in range(0, len(paths), MOVE_BATCH):
+            if not running():
+                break
+            chunk = self._move_chunk(paths[i:i + MOVE_BATCH], batch, keep_dirs)
+            results.extend(chunk)
+            if on_batch:
+                on_batch(chunk)
+        return results
+
+    def _move_chunk(self, paths: list[str], batch: int,
+                    keep_dirs: frozenset[str]) -> list[DeleteResult]:
+        now = time.time()
+        planned = []     # (path, row id, size, stored, mode to recreate)
+        results = []
+        for path in paths:
+            keep = path in keep_dirs
+            path = os.path.abspath(path)
+            try:
+                st = os.lstat(path)
+            except FileNotFoundError:
+                results.append(DeleteResult(path, True, 0))
+                continue
+            except OSError as e:
+                results.append(DeleteResult(path, False, 0, str(e)))
+                continue
+            qdir = self._dir_for(path, st.st_dev)
+            stored = os.path.join(qdir or self._local_dir(path), uuid.uuid4().hex)
+            size = 0 if stat.S_ISDIR(st.st_mode) else st.st_size
+            cur = self._db.execute(
+                "INSERT INTO items (batch, original, stored, size, moved) VALUES (?, ?, ?, ?, ?)",
+                (batch, path, stored, size, now),
+            )
+            planned.append((path, cur.lastrowid, size, stored, st.st_mode if keep else None))
+        self._db.commit()
+
+        for path, row_id, size, stored, keep_mode in planned:
+            try:
+                self._rename_in(path, stored)
+            except OSError:
+                # Other mount of the same filesystem, or a directory moved into
+                # its own quarantine: fall back to one next to the item
+                local = os.path.join(self._local_dir(path), os.path.basename(stored))
+                # Journaled before the rename, like the first attempt
+                self._db.execute("UPDATE items SET stored = ? WHERE id = ?", (local, row_id))
+                self._db.commit()
+                try:
+                    self._rename_in(path, local)
+                except OSError as e:
+                    self._db.execute("DELETE FROM items WHERE id = ?", (row_id,))
+                    results.append(DeleteResult(path, False, 0, str(e)))
+                    continue
+            if keep_mode is not None:
+                try:
+                    os.mkdir(path, stat.S_IMODE(keep_mode))
+                except OSError:
+                    pass
+            results.append(DeleteResult(path, True, size))
+        self._db.commit()
+        return results
+
+    def _rename_in(self, path: str, stored: str):
+        qdir = os.path.dirname(stored)
+        if not os.path.isdir(qdir):
+            self._make_dir(qdir)
+        os.rename(path, stored)
+
+    def _dir_for(self, path: str, dev: int) -> str | None:
+        """Quarantine directory for device `dev`, created on first use; None if none is writable."""
+        if dev in self._by_dev:
+            return self._by_dev[dev]
+        candidates = [os.path.join(device_root(path, dev), QUARANTINE_NAME)]
+        home = os.path.expanduser("~")
+        try:
+            if os.stat(home).st_dev == dev:
+                candidates.append(os.path.join(home, QUARANTINE_NAME))
+        except OSError:
+            pass
+        qdir = None
+        for candidate in candidates:
+            try:
+                self._make_dir(candidate)
+            except OSError:
+                continue
+            qdir = candidate
+            break
+        self._by_dev[dev] = qdir
+        return qdir
+
+    def _local_dir(self, path: str) -> str:
+        return os.path.join(os.path.dirname(path), QUARANTINE_NAME)
+
+    def _make_dir(self, qdir: str):
+        os.makedirs(qdir, exist_ok=True)
+        if not os.access(qdir, os.W_OK):
+            raise PermissionError(f"{qdir}: нет прав на запись")
+        self._db.execute("INSERT OR IGNORE INTO dirs VALUES (?)", (qdir,))
+
+    # -- undo and purge ---------------------------------------------------
+
+    def last_batch(self) -> int | None:
+        return self._db.execute("SELECT MAX(batch) FROM items").fetchone()[0]
+
+    def pending(self) -> tuple[int, int]:
+        """(entries, known bytes) waiting in quarantine."""
+        count, size = self._db.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM items").fetchone()
+        return count, size
+
+    def restore(self, batch: int | None = None) -> tuple[list[str], list[str]]:
+        """
+        Move the entries of `batch` (the last one by default) back where they
+        came from. Returns (restored paths, failure messages); entries already
+        purged are dropped from the journal, entries whose original path is
+        taken again (other than by an empty directory) stay in quarantine.
+        """
+        if batch is None:
+            batch = self.last_batch()
+        restored, failed = [], []
+        rows = self._db.execute(
+            "SELECT id, original, stored FROM items WHERE batch = ? ORDER BY id", (batch,)
+        ).fetchall()
+        for row_id, original, stored in rows:
+            if not os.path.lexists(stored):
+                self._db.execute("DELETE FROM items WHERE id = ?", (row_id,))
+                continue
+            try:
+                if os.path.isdir(original) and not os.path.islink(original):
+                    os.rmdir(original)      # the empty stand-in of an emptied directory
+            except OSError:
+                pass
+            if os.path.lexists(original):
+                failed.append(f"{original}: путь уже занят")
+                continue
+            try:
+                os.makedirs(os.path.dirname(original), exist_ok=True)
+                os.rename(stored, original)
+            except OSError as e:
+                failed.append(f"{original}: {e}")
+                continue
+            self._db.execute("DELETE FROM items WHERE id = ?", (row_id,))
+            restored.append(original)
+        self._db.commit()
+        return restored, failed
+
+    def purge(self, older_than: float | None = None,
+              on_freed: Callable[[int], None] | None = None,
+              is_running: Callable[[], bool] | None = None) -> tuple[int, int]:
+        """
+        Permanently remove entries moved more than `older_than` seconds ago
+        (the grace period by default). Returns (entries removed, bytes freed).
+        """
+        running = is_running or (lambda: True)
+        age = self.grace if older_than is None else older_than
+        rows = self._db.execute(
+            "SELECT id, stored FROM items WHERE moved <= ? ORDER BY id", (time.time() - age,)
+        ).fetchall()
+        removed = freed = 0
+        for row_id, stored in rows:
+            if not running():
+                break
+            try:
+                st = os.lstat(stored)
+                if stat.S_ISDIR(st.st_mode) and not os.path.islink(stored):
+                    freed += remove_tree(stored, workers=1, on_freed=on_freed)
+                else:
+                    os.unlink(stored)
+                    freed += st.st_size
+                    if on_freed:
+                        on_freed(st.st_size)
+            except FileNotFoundError:
+                pass
+            except OSError:
+                continue    # stays journaled; retried by the next purge
+            self._db.execute("DELETE FROM items WHERE id = ?", (row_id,))
+            removed += 1
+            if removed % MOVE_BATCH == 0:
+                self._db.commit()
+        self._db.commit()
+        self._drop_empty_dirs()
+        return removed, freed
+
+    def _drop_empty_dirs(self):
+        for (qdir,) in self._db.execute("SELECT path FROM dirs").fetchall():
+            try:
+                os.rmdir(qdir)
+            except FileNotFoundError:
+                pass
+            except OSError:
+                continue    # not empty yet
+            self._db.execute("DELETE FROM dirs WHERE path = ?", (qdir,))
+            self._by_dev = {}
+        self._db.commit()
+
+    def close(self):
+        try:
+            self._db.commit()
+        finally:
+            self._db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def open_quarantine() -> Quarantine | None:
+    """Open the default journal; None if the database can't be used."""
+    try:
+        return Quarantine()
+    except (sqlite3.Error, OSError):
+        return None
@@ -0,0 +1,223 @@
+"""
+Persistent directory index for incremental rescans.
+
+Stores, per directory: parent, mtime, own and aggregated size / file count,
+the names of its sub-directories, its large files and its hard-linked files.
+fs_walker.walk() uses it to skip listing and stat-ing directories whose
+mtime did not change since the last scan: creating, deleting or renaming an
+entry updates the mtime of the containing directory on both NTFS and POSIX
+filesystems.
+
+In-place size changes of existing files do not. The large files recorded
+for a directory are re-stat'ed before it is replayed, and any change makes
+the walk list the directory afresh, so the large-file results stay exact.
+Growth of the small files is only picked up by the full-rescan option.
+"""
+import os
+import sqlite3
+from typing import NamedTuple
+
+from app.version import APP_NAME
+
+DB_FILE = os.path.join(
+    os.environ.get("APPDATA", os.path.expanduser("~")),
+    APP_NAME,
+    "scan_index.db",
+)
+
+LARGE_MIN = 50 * 1024 * 1024  # files >= 50 MB are kept individually
+_COMMIT_EVERY = 5000
+_SCHEMA_VERSION = 3
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS dirs (
+    path       TEXT PRIMARY KEY,
+    parent     TEXT,
+    mtime_ns   INTEGER NOT NULL,
+    own_size   INTEGER NOT NULL,  -- files with a single link only
+    own_alloc  INTEGER NOT NULL,
+    own_count  INTEGER NOT NULL,
+    n_other    INTEGER NOT NULL,  -- symlinks, special files, entries that failed to stat
+    size       INTEGER NOT NULL,
+    file_count INTEGER NOT NULL,
+    children   TEXT NOT NULL,  -- sub-directory names joined with "/"
+    n_large    INTEGER NOT NULL,
+    n_links    INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS dirs_parent ON dirs(parent);
+CREATE TABLE IF NOT EXISTS large_files (
+    dir  TEXT NOT NULL,
+    name TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    alloc INTEGER NOT NULL,
+    dev  INTEGER,  -- set for hard-linked files only
+    ino  INTEGER,
+    PRIMARY KEY (dir, name)
+);
+CREATE TABLE IF NOT EXISTS links (
+    dir   TEXT NOT NULL,
+    name  TEXT NOT NULL,
+    dev   INTEGER NOT NULL,
+    ino   INTEGER NOT NULL,
+    size  INTEGER NOT NULL,
+    alloc INTEGER NOT NULL,
+    PRIMARY KEY (dir, name)
+);
+"""
+
+_TABLES = ("dirs", "large_files", "links")
+
+
+class DirSummary(NamedTuple):
+    """
+    What a visitor gets for a directory replayed from the index.
+    own_size / own_alloc cover single-linked files; files with several hard
+    links are listed in `links` so the visitor can count each inode once.
+    """
+    own_size: int
+    own_alloc: int
+    own_count: int
+    large: list  # [(name, size, alloc, (dev, ino) or None)] of files >= LARGE_MIN
+    links: list  # [(name, dev, ino, size, alloc)]
+
+
+class IndexRow(NamedTuple):
+    mtime_ns: int
+    own_size: int
+    own_alloc: int
+    own_count: int
+    n_other: int     # non-directory entries not counted in own_count
+    size: int
+    file_count: int
+    children: list[str]
+    large: list
+    links: list
+
+    @property
+    def summary(self) -> DirSummary:
+        return DirSummary(self.own_size, self.own_alloc, self.own_count,
+                          self.large, self.links)
+
+
+class ScanIndex:
+    """SQLite-backed directory index. Use from a single thread."""
+
+    def __init__(self, db_path: str = DB_FILE, full_rescan: bool = False,
+                 large_min: int = LARGE_MIN):
+        self.full_rescan = full_rescan
+        self.large_min = large_min
+        if db_path != ":memory:":
+            os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self._db = sqlite3.connect(db_path, timeout=30)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        if self._db.execute("PRAGMA user_version").fetchone()[0] != _SCHEMA_VERSION:
+            # Older layout: the index is only a cache, start it over
+            for table in _TABLES:
+                self._db.execute(f"DROP TABLE IF EXISTS {table}")
+            self._db.execute(f"PRAGMA user_version = {_SCHEMA_VERSION}")
+        self._db.executescript(_SCHEMA)
+        self._writes = 0
+
+    @staticmethod
+    def key(path: str) -> str:
+        return os.path.normcase(path)
+
+    def get(self, path: str) -> IndexRow | None:
+        """Indexed row for `path`, or None (always None on a full rescan)."""
+        if self.full_rescan:
+            return None
+        return self._get(self.key(path))
+
+    def _get(self, key: str) -> IndexRow | None:
+        row = self._db.execute(
+            "SELECT mtime_ns, own_size, own_alloc, own_count, n_other, size, file_count, "
+            "children, n_large, n_links FROM dirs WHERE path = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        large, links = [], []
+        if row[8]:
+            large = [(name, size, alloc, None if dev is None else (dev, ino))
+                     for name, size, alloc, dev, ino in self._db.execute(
+                         "SELECT name, size, alloc, dev, ino FROM large_files WHERE dir = ?",
+                         (key,))]
+        if row[9]:
+            links = self._db.execute(
+                "SELECT name, dev, ino, size, alloc FROM links WHERE dir = ?", (key,)
+            ).fetchall()
+        children = row[7].split("/") if row[7] else []
+        return IndexRow(row[0], row[1], row[2], row[3], row[4], row[5], row[6], children,
+                        large, links)
+
+    def record(self, path: str, mtime_ns: int, own_size: int, own_alloc: int,
+               own_count: int, n_other: int, size: int, file_count: int,
+               children: list[str], large: list, links: list):
+        """Store a freshly listed directory, dropping subtrees of removed children."""
+        key = self.key(path)
+        old = self._get(key)
+        if old is not None:
+            for name in set(old.children) - set(children):
+                self.drop_subtree(os.path.join(path, name))
+            if old.large:
+                self._db.execute("DELETE FROM large_files WHERE dir = ?", (key,))
+            if old.links:
+                self._db.execute("DELETE FROM links WHERE dir = ?", (key,))
+        self._db.execute(
+            "INSERT OR REPLACE INTO dirs VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (key, self.key(os.path.dirname(path)), mtime_ns, own_size, own_alloc,
+             own_count, n_other, size, file_count, "/".join(children), len(large), len(links)),
+        )
+        if large:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO large_files VALUES (?, ?, ?, ?, ?, ?)",
+                [(key, name, sz, al, *(link or (None, None))) for name, sz, al, link in large],
+            )
+        if links:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO links VALUES (?, ?, ?, ?, ?, ?)",
+                [(key, *link) for link in links],
+            )
+        self._tick()
+
+    def update_totals(self, path: str, size: int, file_count: int):
+        """Refresh aggregated totals of a directory replayed from the index."""
+        self._db.execute(
+            "UPDATE dirs SET size = ?, file_count = ? WHERE path = ?",
+            (size, file_count, self.key(path)),
+        )
+        self._tick()
+
+    def drop_subtree(self, path: str):
+        key = self.key(path)
+        lo, hi = key.rstrip(os.sep) + os.sep, key.rstrip(os.sep) + chr(ord(os.sep) + 1)
+        for table, col in (("dirs", "path"), ("large_files", "dir"), ("links", "dir")):
+            self._db.execute(
+                f"DELETE FROM {table} WHERE {col} = ? OR ({col} >= ? AND {col} < ?)",
+                (key, lo, hi),
+            )
+
+    def _tick(self):
+        self._writes += 1
+        if self._writes % _COMMIT_EVERY == 0:
+            self._db.commit()
+
+    def close(self):
+        try:
+            self._db.commit()
+        finally:
+            self._db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def open_index(full_rescan: bool = False) -> ScanIndex | None:
+    """Open the default index; None if the database can't be used."""
+    try:
+        return ScanIndex(full_rescan=full_rescan)
+    except (sqlite3.Error, OSError):
+        return None
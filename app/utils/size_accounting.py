@@ -0,0 +1,71 @@
+"""
+Size accounting that matches what deleting files would actually free.
+
+Every file has a logical size (st_size) and an allocated size: the blocks it
+occupies on disk, st_blocks * 512 on POSIX. Sparse files allocate less than
+their logical size, small files usually more. Windows stat results carry no
+st_blocks, so there the allocated size falls back to st_size.
+
+A file with several hard links is counted once, at the first link the walk
+reaches, keyed by (st_dev, st_ino). Only files with st_nlink > 1 are
+remembered, so the set stays small on ordinary trees. os.scandir() reports
+st_nlink = 0 on Windows, where no deduplication takes place.
+"""
+import os
+
+HAS_BLOCKS = hasattr(os.stat_result, "st_blocks")
+
+
+def allocated_size(st: os.stat_result) -> int:
+    """Bytes `st` occupies on disk."""
+    return st.st_blocks * 512 if HAS_BLOCKS else st.st_size
+
+
+def link_key(st: os.stat_result) -> tuple[int, int] | None:
+    """(st_dev, st_ino) of a file with other hard links, else None."""
+    return (st.st_dev, st.st_ino) if st.st_nlink > 1 else None
+
+
+class SizeCounter:
+    """Counts each hard-linked file once across one walk."""
+
+    def __init__(self):
+        self._seen: set[tuple[int, int]] = set()
+
+    def first(self, key: tuple[int, int] | None) -> bool:
+        """True unless `key` is a hard link already counted."""
+        if key is None:
+            return True
+        if key in self._seen:
+            return False
+        self._seen.add(key)
+        return True
+
+    def file(self, st: os.stat_result) -> tuple[int, int]:
+        """(logical, allocated) bytes `st` adds; (0, 0) for a repeated hard link."""
+        if not self.first(link_key(st)):
+            return 0, 0
+        return st.st_size, allocated_size(st)
+
+    def files(self, files: list) -> tuple[int, int]:
+        """(logical, allocated) bytes of walker (path, name, stat) entries, as file() sums."""
+        size = alloc = 0
+        seen = self._seen
+        for _, _, st in files:
+            if st.st_nlink > 1:
+                key = (st.st_dev, st.st_ino)
+                if key in seen:
+                    continue
+                seen.add(key)
+            size += st.st_size
+            alloc += st.st_blocks * 512 if HAS_BLOCKS else st.st_size
+        return size, alloc
+
+    def links(self, links: list) -> tuple[int, int]:
+        """(logical, allocated) bytes added by indexed (name, dev, ino, size, alloc) links."""
+        size = alloc = 0
+        for _, dev, ino, sz, al in links:
+            if self.first((dev, ino)):
+                size += sz
+                alloc += al
+        return size, alloc
@@ -0,0 +1,149 @@
+"""
+Recycle bin backend that takes whole batches of paths.
+
+On Linux (and other freedesktop systems) items are trashed directly per the
+freedesktop.org Trash specification: a .trashinfo file is created
+exclusively in info/, then the item is renamed into files/. The trash
+directory is resolved once per device: the home trash for the home
+filesystem, else $topdir/.Trash/$uid (if the admin made .Trash a sticky
+directory) or $topdir/.Trash-$uid. This does not re-resolve the trash
+location for every file.
+
+Elsewhere the batch goes to send2trash in its list form, which on Windows is
+a single shell file operation instead of one per item. If the batch call
+fails, only the paths still in place are retried one by one, to find out
+which of them failed.
+"""
+import itertools
+import os
+import stat
+import sys
+import threading
+import time
+from urllib.parse import quote
+
+from app.utils.mounts import device_root
+
+try:
+    import send2trash
+    HAS_SEND2TRASH = True
+except ImportError:
+    HAS_SEND2TRASH = False
+
+USE_FREEDESKTOP = os.name == "posix" and sys.platform != "darwin"
+
+
+class FreedesktopTrash:
+    """Trashes items per the freedesktop.org spec; trash directories are cached per device."""
+
+    def __init__(self, data_home: str | None = None):
+        data_home = data_home or os.environ.get("XDG_DATA_HOME") or \
+            os.path.join(os.path.expanduser("~"), ".local", "share")
+        self.home = os.path.join(data_home, "Trash")
+        self._dirs: dict[int, tuple[str, str | None]] = {}   # dev -> (trash dir, topdir)
+        self._next: dict[tuple[str, str], int] = {}          # (trash dir, name) -> next suffix
+        self._lock = threading.Lock()
+
+    def trash(self, path: str):
+        path = os.path.abspath(path)
+        st = os.lstat(path)
+        with self._lock:
+            trash_dir, topdir = self._trash_dir(path, st.st_dev)
+            original = os.path.relpath(path, topdir) if topdir else path
+            info, name = self._reserve(trash_dir, os.path.basename(path), original)
+        try:
+            os.rename(path, os.path.join(trash_dir, "files", name))
+        except OSError:
+            os.unlink(info)
+            raise
+
+    def _trash_dir(self, path: str, dev: int) -> tuple[str, str | None]:
+        if dev in self._dirs:
+            return self._dirs[dev]
+        _make_trash(self.home)
+        if os.stat(self.home).st_dev == dev:
+            self._dirs[dev] = (self.home, None)
+            return self._dirs[dev]
+        topdir = device_root(path, dev)
+        uid = os.getuid()
+        admin = os.path.join(topdir, ".Trash")
+        candidates = []
+        try:
+            st = os.lstat(admin)
+            if stat.S_ISDIR(st.st_mode) and st.st_mode & stat.S_ISVTX:
+                candidates.append(os.path.join(admin, str(uid)))
+        except OSError:
+            pass
+        candidates.append(os.path.join(topdir, f".Trash-{uid}"))
+        for trash_dir in candidates:
+            try:
+                _make_trash(trash_dir)
+                st = os.lstat(trash_dir)
+            except OSError:
+                continue
+            if stat.S_ISDIR(st.st_mode) and st.st_uid == uid:
+                self._dirs[dev] = (trash_dir, topdir)
+                return self._dirs[dev]
+        raise OSError(f"Нет доступной корзины на {topdir}")
+
+    def _reserve(self, trash_dir: str, base: str, original: str) -> tuple[str, str]:
+        """Create a unique info/<name>.trashinfo for `original`; returns (info path, name)."""
+        content = ("[Trash Info]\n"
+                   f"Path={quote(os.fsencode(original), safe='/')}\n"
+                   f"DeletionDate={time.strftime('%Y-%m-%dT%H:%M:%S')}\n").encode()
+        key = (trash_dir, base)
+        for n in itertools.count(self._next.get(key, 1)):
+            name = base if n == 1 else f"{base}.{n}"
+            info = os.path.join(trash_dir, "info", name + ".trashinfo")
+            try:
+                fd = os.open(info, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o600)
+            except FileExistsError:
+                continue
+            if os.path.lexists(os.path.join(trash_dir, "files", name)):
+                os.close(fd)      # stray entry without info: leave it alone
+                os.unlink(info)
+                continue
+            with os.fdopen(fd, "wb") as f:
+                f.write(content)
+            self._next[key] = n + 1
+            return info, name
+
+
+def _make_trash(trash_dir: str):
+    for sub in ("files", "info"):
+        os.makedirs(os.path.join(trash_dir, sub), mode=0o700, exist_ok=True)
+
+
+_freedesktop = FreedesktopTrash() if USE_FREEDESKTOP else None
+
+
+def trash_paths(paths: list[str]) -> dict[str, str]:
+    """Send `paths` to the recycle bin as one batch; returns {path: error} for those that failed."""
+    failed: dict[str, str] = {}
+    if _freedesktop is not None:
+        for path in paths:
+            try:
+                _freedesktop.trash(path)
+            except OSError as e:
+                failed[path] = str(e)
+        return failed
+    if not HAS_SEND2TRASH:
+        for path in paths:
+            try:
+                os.remove(path)
+            except OSError as e:
+                failed[path] = str(e)
+        return failed
+    try:
+        send2trash.send2trash(list(paths))
+        return failed
+    except Exception:
+        pass
+    for path in paths:
+        if not os.path.lexists(path):
+            continue        # went with the batch call
+        try:
+            send2trash.send2trash(path)
+        except Exception as e:
+            failed[path] = str(e)
+    return failed
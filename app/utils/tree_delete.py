@@ -0,0 +1,214 @@
+"""
+Recursive delete on open directory descriptors.
+
+shutil.rmtree by path makes the kernel resolve the full path again for every
+unlink, which dominates on deep cache trees of tiny files. remove_tree()
+instead keeps each directory open while emptying it: entries are listed with
+os.scandir(fd) and removed with os.unlink(name, dir_fd=fd), so every call
+resolves a single name. Subdirectories are opened with O_NOFOLLOW, so a
+symlink swapped in mid-delete is never followed out of the tree.
+
+The root's subdirectories are emptied side by side on a small thread pool
+(unlink releases the GIL); within a subtree the walk is serial on an
+explicit stack, holding one descriptor per level. Freed bytes are reported
+as they accumulate. An entry that cannot be removed does not stop the
+walk: every failure is collected and raised together at the end. Where
+the platform lacks dir_fd support (Windows) the tree is measured and
+removed with shutil.rmtree.
+"""
+import os
+import shutil
+import stat
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable
+
+HAS_DIR_FD = ({os.open, os.unlink, os.rmdir} <= os.supports_dir_fd
+              and os.scandir in os.supports_fd)
+TREE_WORKERS = 2   # more threads contend on the same directory locks
+REPORT_BYTES = 4 * 1024 * 1024
+
+_DIR_FLAGS = os.O_RDONLY | getattr(os, "O_DIRECTORY", 0) | getattr(os, "O_NOFOLLOW", 0)
+
+
+class TreeDeleteError(OSError):
+    """Several entries of a tree could not be removed; `errors` holds each failure."""
+
+    def __init__(self, errors: list[OSError]):
+        self.errors = errors
+        first = errors[0]
+        super().__init__(first.errno, f"{first.strerror} (ещё ошибок: {len(errors) - 1})",
+                         first.filename)
+
+
+class _Freed:
+    """Thread-safe byte counter that passes increments of REPORT_BYTES on to `on_freed`."""
+
+    def __init__(self, on_freed: Callable[[int], None] | None):
+        self.total = 0
+        self._on_freed = on_freed
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    def add(self, n: int):
+        with self._lock:
+            self.total += n
+            self._pending += n
+            if self._pending < REPORT_BYTES or not self._on_freed:
+                return
+            n, self._pending = self._pending, 0
+        self._on_freed(n)
+
+    def flush(self):
+        with self._lock:
+            n, self._pending = self._pending, 0
+        if n and self._on_freed:
+            self._on_freed(n)
+
+
+def remove_tree(path: str, workers: int = TREE_WORKERS,
+                on_freed: Callable[[int], None] | None = None,
+                keep_root: bool = False) -> int:
+    """
+    Delete the directory `path` and everything under it (everything but the
+    empty directory itself with `keep_root`); returns the bytes freed.
+    `on_freed` gets the bytes freed since its last call, from any of the
+    worker threads. Entries that fail are skipped and the rest is removed;
+    then a single error is raised as is, several as a TreeDeleteError.
+    `on_freed` has by then seen what was removed.
+    """
+    freed = _Freed(on_freed)
+    try:
+        if HAS_DIR_FD:
+            _remove_fd(path, max(1, workers), freed, keep_root)
+        elif keep_root:
+            with os.scandir(path) as it:
+                entries = list(it)
+            for entry in entries:
+                size = tree_size(entry.path)
+                if entry.is_dir(follow_symlinks=False):
+                    shutil.rmtree(entry.path)
+                else:
+                    os.unlink(entry.path)
+                freed.add(size)
+        else:
+            size = tree_size(path)
+            shutil.rmtree(path)
+            freed.add(size)
+    finally:
+        freed.flush()
+    return freed.total
+
+
+def _remove_fd(path: str, workers: int, freed: _Freed, keep_root: bool):
+    errors: list[OSError] = []
+    top = os.open(path, _DIR_FLAGS)
+    try:
+        subdirs = _unlink_files(top, freed, errors)
+        if workers > 1 and len(subdirs) > 1:
+            with ThreadPoolExecutor(max_workers=min(workers, len(subdirs))) as pool:
+                for fut in [pool.submit(_remove_subtree, top, name, freed) for name in subdirs]:
+                    errors.extend(fut.result())
+        else:
+            for name in subdirs:
+                errors.extend(_remove_subtree(top, name, freed))
+    finally:
+        os.close(top)
+    if not keep_root and not errors:
+        os.rmdir(path)
+    if len(errors) == 1:
+        raise errors[0]
+    if errors:
+        raise TreeDeleteError(errors)
+
+
+def _unlink_files(dir_fd: int, freed: _Freed, errors: list[OSError]) -> list[str]:
+    """Unlink every non-directory in `dir_fd`; returns the subdirectory names."""
+    subdirs = []
+    try:
+        with os.scandir(dir_fd) as it:
+            entries = list(it)
+    except OSError as e:
+        errors.append(e)
+        return subdirs
+    for entry in entries:
+        try:
+            if entry.is_dir(follow_symlinks=False):
+                subdirs.append(entry.name)
+                continue
+            try:
+                size = entry.stat(follow_symlinks=False).st_size
+            except OSError:
+                size = 0
+            os.unlink(entry.name, dir_fd=dir_fd)
+        except OSError as e:
+            errors.append(e)
+            continue
+        freed.add(size)
+    return subdirs
+
+
+def _remove_subtree(parent_fd: int, name: str, freed: _Freed) -> list[OSError]:
+    """
+    Remove directory `name` in `parent_fd`, depth first on an explicit stack
+    of open fds; returns the failures. The directories above one are kept.
+    """
+    errors: list[OSError] = []
+    try:
+        fd = os.open(name, _DIR_FLAGS, dir_fd=parent_fd)
+    except OSError as e:
+        return [e]
+    # Frames are [fd, subdirectories left (None until listed), name in the frame below,
+    # number of errors when the frame was entered]
+    stack: list[list] = [[fd, None, name, len(errors)]]
+    try:
+        while stack:
+            frame = stack[-1]
+            if frame[1] is None:
+                frame[1] = _unlink_files(frame[0], freed, errors)
+            if frame[1]:
+                child = frame[1].pop()
+                try:
+                    stack.append([os.open(child, _DIR_FLAGS, dir_fd=frame[0]), None, child,
+                                  len(errors)])
+                except OSError as e:
+                    errors.append(e)
+                continue
+            stack.pop()
+            os.close(frame[0])
+            if len(errors) > frame[3]:
+                continue    # something below is left, so this directory is not empty
+            try:
+                os.rmdir(frame[2], dir_fd=stack[-1][0] if stack else parent_fd)
+            except OSError as e:
+                errors.append(e)
+    finally:
+        for frame in stack:
+            os.close(frame[0])
+    return errors
+
+
+def tree_size(path: str) -> int:
+    """Bytes held by a file or a whole directory tree (symlinks not followed)."""
+    try:
+        st = os.lstat(path)
+    except OSError:
+        return 0
+    if not stat.S_ISDIR(st.st_mode) or os.path.islink(path):
+        return st.st_size
+    total = 0
+    stack = [path]
+    while stack:
+        try:
+            with os.scandir(stack.pop()) as it:
+                for entry in it:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            stack.append(entry.path)
+                        else:
+                            total += entry.stat(follow_symlinks=False).st_size
+                    except OSError:
+                        pass
+        except OSError:
+            pass
+    return total
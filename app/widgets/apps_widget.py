@@ -12,8 +12,8 @@ from PyQt6.QtCore import Qt, pyqtSignal, QSize
 from PyQt6.QtGui import QFont, QColor
 
 from app.workers.app_scanner import AppInfo, FileEntry, AppFileScanner, get_installed_apps
+from app.workers.delete_worker import DeleteWorker
 from app.utils.file_description import CATEGORY_NAMES, CATEGORY_COLORS, CATEGORY_ORDER
-from app.utils.file_utils import delete_permanent, delete_to_trash
 from app.utils.junk_detector import format_size
 
 
@@ -64,6 +64,7 @@ class AppsWidget(QWidget):
         self._all_apps: list[AppInfo] = []
         self._current_app: AppInfo | None = None
         self._scanner: AppFileScanner | None = None
+        self._deleter: DeleteWorker | None = None
         self._all_files: list[FileEntry] = []
         self._build_ui()
 
@@ -551,9 +552,22 @@ class AppsWidget(QWidget):
         if reply != QMessageBox.StandardButton.Yes:
             return
 
-        ok, failed = delete_to_trash(paths)
+        self.uninstall_full_btn.setEnabled(False)
+        # An app's files, not a selection of whole folders: nothing to coalesce
+        self._deleter = DeleteWorker(paths, trash=True, coalesce=False)
+        self._deleter.progress.connect(
+            lambda done, total, freed: self.summary_lbl.setText(
+                f"Удаление: {done} из {total} · освобождено {format_size(freed)}")
+        )
+        self._deleter.deletion_done.connect(self._on_files_deleted)
+        self._deleter.start()
+
+    def _on_files_deleted(self, results: list):
+        ok = len(self._deleter.plan.removed(results))
+        failed = [f"{r.path}: {r.error}" for r in results if not r.ok]
         msg = f"Отправлено в корзину: {ok} файлов"
         if failed:
+            self.uninstall_full_btn.setEnabled(True)
             msg += f"\nОшибки ({len(failed)}):\n" + "\n".join(failed[:5])
             QMessageBox.warning(self, "Частичное удаление", msg)
         else:
@@ -1,15 +1,20 @@
+from datetime import datetime
+
 import psutil
 from PyQt6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QLabel,
     QProgressBar, QTableWidget, QTableWidgetItem,
-    QPushButton, QComboBox, QFrame, QScrollArea
+    QPushButton, QComboBox, QFrame, QScrollArea, QCheckBox
 )
 from PyQt6.QtCore import Qt, pyqtSignal, QThread
 from PyQt6.QtGui import QFont, QColor
 
 from app.workers.file_scanner import DiskScanner
+from app.utils.folder_tree import FolderTree, load_cached_tree
 from app.utils.junk_detector import format_size
 
+MAX_ROWS = 200
+
 
 class DiskBar(QWidget):
     def __init__(self, drive: str, usage, parent=None):
@@ -70,6 +75,8 @@ class DiskWidget(QWidget):
     def __init__(self, parent=None):
         super().__init__(parent)
         self._scanner = None
+        self._tree: FolderTree | None = None
+        self._node = FolderTree.ROOT
         self._build_ui()
 
     def _build_ui(self):
@@ -110,11 +117,18 @@ class DiskWidget(QWidget):
 
         scan_header = QHBoxLayout()
         self.drive_combo = QComboBox()
+        self.drive_combo.currentIndexChanged.connect(self._load_cached)
         scan_header.addWidget(self.drive_combo)
 
         self.scan_btn = QPushButton("  Сканировать папки")
         self.scan_btn.clicked.connect(self._start_scan)
         scan_header.addWidget(self.scan_btn)
+
+        self.full_rescan_chk = QCheckBox("Полное сканирование")
+        self.full_rescan_chk.setToolTip(
+            "Не использовать сохранённый индекс — заново прочитать все папки"
+        )
+        scan_header.addWidget(self.full_rescan_chk)
         scan_header.addStretch()
 
         self.scan_status = QLabel("")
@@ -122,15 +136,30 @@ class DiskWidget(QWidget):
         scan_header.addWidget(self.scan_status)
         outer.addLayout(scan_header)
 
-        self.folder_table = QTableWidget(0, 3)
-        self.folder_table.setHorizontalHeaderLabels(["ПАПКА", "РАЗМЕР", "%"])
+        nav = QHBoxLayout()
+        self.up_btn = QPushButton("  ⬆ Вверх")
+        self.up_btn.setEnabled(False)
+        self.up_btn.clicked.connect(self._go_up)
+        nav.addWidget(self.up_btn)
+        self.path_lbl = QLabel("")
+        self.path_lbl.setStyleSheet("color: #8080a0; font-size: 9pt;")
+        nav.addWidget(self.path_lbl, 1)
+        outer.addLayout(nav)
+
+        self.folder_table = QTableWidget(0, 4)
+        self.folder_table.setHorizontalHeaderLabels(["ПАПКА", "РАЗМЕР", "НА ДИСКЕ", "%"])
         hdr = self.folder_table.horizontalHeader()
         hdr.setStretchLastSection(False)
         hdr.setSectionResizeMode(0, hdr.ResizeMode.Stretch)
         hdr.setSectionResizeMode(1, hdr.ResizeMode.Fixed)
         hdr.setSectionResizeMode(2, hdr.ResizeMode.Fixed)
+        hdr.setSectionResizeMode(3, hdr.ResizeMode.Fixed)
         self.folder_table.setColumnWidth(1, 120)
-        self.folder_table.setColumnWidth(2, 70)
+        self.folder_table.setColumnWidth(2, 120)
+        self.folder_table.setColumnWidth(3, 70)
+        self.folder_table.horizontalHeaderItem(2).setToolTip(
+            "Занятое на диске место; жёсткие ссылки на один файл учтены один раз"
+        )
         self.folder_table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
         self.folder_table.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectRows)
         self.folder_table.verticalHeader().setVisible(False)
@@ -138,6 +167,8 @@ class DiskWidget(QWidget):
         self.folder_table.setStyleSheet(
             "QTableWidget { alternate-background-color: #111128; }"
         )
+        self.folder_table.setToolTip("Двойной щелчок — открыть папку")
+        self.folder_table.cellDoubleClicked.connect(self._drill_down)
         outer.addWidget(self.folder_table, 1)
 
     def on_shown(self):
@@ -172,32 +203,86 @@ class DiskWidget(QWidget):
 
         self.scan_btn.setEnabled(False)
         self.folder_table.setRowCount(0)
+        self._tree = None
+        self.up_btn.setEnabled(False)
+        self.path_lbl.setText("")
         self.scan_status.setText("Сканирование...")
 
-        self._scanner = DiskScanner(drive)
+        self._scanner = DiskScanner(drive, full_rescan=self.full_rescan_chk.isChecked())
         self._scanner.progress.connect(lambda pct, msg: self.scan_status.setText(msg))
-        self._scanner.results_ready.connect(self._on_scan_done)
+        self._scanner.tree_ready.connect(self._on_scan_done)
         self._scanner.start()
 
-    def _on_scan_done(self, results: list):
-        self.scan_btn.setEnabled(True)
-        self.folder_table.setRowCount(0)
+    def _load_cached(self):
+        """Show the saved tree of the selected drive, if there is one."""
+        drive = self.drive_combo.currentData()
+        if not drive or (self._scanner and self._scanner.isRunning()):
+            return
+        tree = load_cached_tree(drive)
+        self._tree = tree
+        if tree is None:
+            self.folder_table.setRowCount(0)
+            self.up_btn.setEnabled(False)
+            self.path_lbl.setText("")
+            self.scan_status.setText("")
+            return
+        when = datetime.fromtimestamp(tree.scanned_at).strftime("%d.%m.%Y %H:%M")
+        self.scan_status.setText(f"Сканирование от {when} · Всего: {format_size(tree.size(tree.ROOT))}"
+                                 f" · На диске: {format_size(tree.allocated(tree.ROOT))}")
+        self._show_node(tree.ROOT)
 
-        if not results:
+    def _on_scan_done(self, tree: FolderTree):
+        self.scan_btn.setEnabled(True)
+        self._tree = tree
+        folders = len(tree) - 1
+        if not folders:
+            self.folder_table.setRowCount(0)
             self.scan_status.setText("Нет данных")
             return
 
-        total_size = sum(s for _, s in results)
-        self.scan_status.setText(f"Найдено {len(results)} папок · Всего: {format_size(total_size)}")
-        self.status_message.emit(f"Сканирование диска завершено: {len(results)} папок")
+        self.scan_status.setText(f"Найдено {folders} папок · Всего: {format_size(tree.size(tree.ROOT))}"
+                                 f" · На диске: {format_size(tree.allocated(tree.ROOT))}")
+        self.status_message.emit(f"Сканирование диска завершено: {folders} папок")
+        self._show_node(tree.ROOT)
+
+    def _drill_down(self, row: int, _col: int):
+        item = self.folder_table.item(row, 0)
+        node = item.data(Qt.ItemDataRole.UserRole) if item else None
+        if self._tree is not None and node is not None and self._tree.children(node):
+            self._show_node(node)
+
+    def _go_up(self):
+        if self._tree is not None:
+            parent = self._tree.parent(self._node)
+            if parent is not None:
+                self._show_node(parent)
+
+    def _show_node(self, node: int):
+        tree = self._tree
+        self._node = node
+        self.up_btn.setEnabled(tree.parent(node) is not None)
+        self.path_lbl.setText(f"📂  {tree.path(node)}")
+        self.folder_table.setRowCount(0)
+
+        total_size = tree.size(node)
+        children = tree.children(node)
+        rows = [(tree.name(c), tree.size(c), tree.allocated(c), c) for c in children[:MAX_ROWS]]
+        own = total_size - sum(tree.size(c) for c in children)
+        own_alloc = tree.allocated(node) - sum(tree.allocated(c) for c in children)
+        if own > 0 or own_alloc > 0:
+            rows.append(("[файлы в этой папке]", own, own_alloc, None))
+            rows.sort(key=lambda r: -r[1])
 
-        for path, size in results[:200]:  # show top 200
+        for name, size, alloc, child in rows:
             row = self.folder_table.rowCount()
             self.folder_table.insertRow(row)
 
-            name_item = QTableWidgetItem(path)
+            name_item = QTableWidgetItem(name)
+            name_item.setData(Qt.ItemDataRole.UserRole, child)
             size_item = QTableWidgetItem(format_size(size))
             size_item.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
+            alloc_item = QTableWidgetItem(format_size(alloc))
+            alloc_item.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
 
             pct = (size / total_size * 100) if total_size else 0
             pct_item = QTableWidgetItem(f"{pct:.1f}%")
@@ -210,9 +295,10 @@ class DiskWidget(QWidget):
             else:
                 color = QColor("#e0e0e0")
 
-            for item in [name_item, size_item, pct_item]:
+            for item in [name_item, size_item, alloc_item, pct_item]:
                 item.setForeground(color)
 
             self.folder_table.setItem(row, 0, name_item)
             self.folder_table.setItem(row, 1, size_item)
-            self.folder_table.setItem(row, 2, pct_item)
+            self.folder_table.setItem(row, 2, alloc_item)
+            self.folder_table.setItem(row, 3, pct_item)
@@ -0,0 +1,180 @@
+"""
+File table model for scan results: junk, large files, duplicates.
+
+Rows are kept as columns (names, paths, sizes, group numbers) rather than
+as five QTableWidgetItems each, so 150k junk files cost a few compact
+arrays and an append is one beginInsertRows. Size strings and colours are
+produced in data() for the rows actually painted. Sorting reorders a
+row -> entry permutation using the stored values as keys; appending to a
+sorted table merges the new rows in instead of re-sorting everything.
+"""
+import heapq
+from array import array
+
+from PyQt6.QtCore import QAbstractTableModel, QModelIndex, Qt
+from PyQt6.QtGui import QColor
+
+from app.utils.junk_detector import format_size
+
+COLUMNS = ["Файл", "Категория", "Размер", "На диске", "Путь"]
+COL_NAME, COL_GROUP, COL_SIZE, COL_ALLOCATED, COL_PATH = range(len(COLUMNS))
+
+_RIGHT = Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter
+_TOOLTIPS = {
+    COL_ALLOCATED: "Сколько места файл реально занимает: меньше размера у разреженных файлов",
+}
+
+
+class FileTableModel(QAbstractTableModel):
+    def __init__(self, colored_columns: frozenset[int] | None = None, parent=None):
+        super().__init__(parent)
+        # Columns painted in the group colour; all of them by default
+        self._colored = frozenset(range(len(COLUMNS))) if colored_columns is None else colored_columns
+        self._groups: list[tuple[str, QColor]] = []    # (label, colour) per append() call
+        self._clear_entries()
+        self._sort_column = -1
+        self._sort_order = Qt.SortOrder.AscendingOrder
+
+    def _clear_entries(self):
+        self._names: list[str] = []
+        self._paths: list[str] = []
+        self._sizes = array("q")
+        self._allocated = array("q")
+        self._group = array("I")        # entry -> index into _groups
+        self._order = array("I")        # row -> entry
+
+    # ── Qt model interface ───────────────────
+
+    def rowCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._order)
+
+    def columnCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(COLUMNS)
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if orientation != Qt.Orientation.Horizontal:
+            return None
+        if role == Qt.ItemDataRole.DisplayRole:
+            return COLUMNS[section]
+        if role == Qt.ItemDataRole.ToolTipRole:
+            return _TOOLTIPS.get(section)
+        return None
+
+    def data(self, index: QModelIndex, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        entry = self._order[index.row()]
+        col = index.column()
+        if role == Qt.ItemDataRole.DisplayRole:
+            if col == COL_NAME:
+                return self._names[entry]
+            if col == COL_GROUP:
+                return self._groups[self._group[entry]][0]
+            if col == COL_SIZE:
+                return format_size(self._sizes[entry])
+            if col == COL_ALLOCATED:
+                return format_size(self._allocated[entry])
+            return self._paths[entry]
+        if role == Qt.ItemDataRole.ForegroundRole:
+            if col in self._colored:
+                return self._groups[self._group[entry]][1]
+            return None
+        if role == Qt.ItemDataRole.TextAlignmentRole:
+            return _RIGHT if col in (COL_SIZE, COL_ALLOCATED) else None
+        return None
+
+    def sort(self, column: int, order=Qt.SortOrder.AscendingOrder):
+        self._sort_column, self._sort_order = column, order
+        if column < 0 or not self._order:
+            return
+        self.layoutAboutToBeChanged.emit()
+        old = self._order
+        self._order = array("I", sorted(old, key=self._key(column),
+                                        reverse=order == Qt.SortOrder.DescendingOrder))
+        self._move_persistent(old)
+        self.layoutChanged.emit()
+
+    # ── access ───────────────────────────────
+
+    def path_at(self, row: int) -> str:
+        return self._paths[self._order[row]]
+
+    # ── changes ──────────────────────────────
+
+    def clear(self):
+        self.beginResetModel()
+        self._groups = []
+        self._clear_entries()
+        self.endResetModel()
+
+    def append(self, files: list[dict], label: str, color: str):
+        """Add `files` (scan result dicts) as one group shown as `label` in `color`."""
+        if not files:
+            return
+        group = len(self._groups)
+        self._groups.append((label, QColor(color)))
+        start = len(self._names)
+        first = len(self._order)
+        self.beginInsertRows(QModelIndex(), first, first + len(files) - 1)
+        self._names.extend(f["name"] for f in files)
+        self._paths.extend(f["path"] for f in files)
+        self._sizes.extend(f["size"] for f in files)
+        self._allocated.extend(f.get("allocated", f["size"]) for f in files)  # older producers
+        self._group.extend([group] * len(files))
+        self._order.extend(range(start, start + len(files)))
+        self.endInsertRows()
+        if self._sort_column >= 0:
+            self._merge_tail(first)
+
+    def remove_paths(self, paths: set[str]) -> int:
+        """Drop the rows of `paths` in one pass; returns how many were removed."""
+        keep = [i for i, path in enumerate(self._paths) if path not in paths]
+        removed = len(self._paths) - len(keep)
+        if not removed:
+            return 0
+        self.beginResetModel()
+        renumber = {old: new for new, old in enumerate(keep)}
+        self._names = [self._names[i] for i in keep]
+        self._paths = [self._paths[i] for i in keep]
+        self._sizes = array("q", (self._sizes[i] for i in keep))
+        self._allocated = array("q", (self._allocated[i] for i in keep))
+        self._group = array("I", (self._group[i] for i in keep))
+        self._order = array("I", (renumber[i] for i in self._order if i in renumber))
+        self.endResetModel()
+        return removed
+
+    # ── sorting helpers ──────────────────────
+
+    def _key(self, column: int):
+        if column == COL_NAME:
+            return self._names.__getitem__
+        if column == COL_GROUP:
+            labels = [label for label, _ in self._groups]
+            return lambda i: labels[self._group[i]]
+        if column == COL_SIZE:
+            return self._sizes.__getitem__
+        if column == COL_ALLOCATED:
+            return self._allocated.__getitem__
+        return self._paths.__getitem__
+
+    def _merge_tail(self, first: int):
+        """Merge the unsorted rows from `first` on into the sorted rows before them."""
+        key = self._key(self._sort_column)
+        reverse = self._sort_order == Qt.SortOrder.DescendingOrder
+        self.layoutAboutToBeChanged.emit()
+        old = self._order
+        tail = sorted(old[first:], key=key, reverse=reverse)
+        self._order = array("I", heapq.merge(old[:first], tail, key=key, reverse=reverse))
+        self._move_persistent(old)
+        self.layoutChanged.emit()
+
+    def _move_persistent(self, old: array):
+        """Point persistent indexes (selection, current row) at their entries' new rows."""
+        indexes = self.persistentIndexList()
+        if not indexes:
+            return
+        row_of = {entry: row for row, entry in enumerate(self._order)}
+        self.changePersistentIndexList(
+            indexes,
+            [self.index(row_of[old[i.row()]], i.column()) for i in indexes],
+        )
@@ -1,15 +1,20 @@
 from PyQt6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QLabel,
-    QTableWidget, QTableWidgetItem, QTableWidgetSelectionRange,
+    QTableView,
     QPushButton, QProgressBar, QTabWidget, QMessageBox,
-    QCheckBox, QFrame, QScrollArea
+    QCheckBox, QFrame, QScrollArea, QFileDialog
 )
-from PyQt6.QtCore import Qt, pyqtSignal
-from PyQt6.QtGui import QFont, QColor
+from PyQt6.QtCore import Qt, QTimer, pyqtSignal
+from PyQt6.QtGui import QFont
 
-from app.workers.file_scanner import FileScanner
+from app.workers.file_scanner import FileScanner, LARGE_FILE_MIN_BYTES
+from app.workers.duplicate_scanner import DuplicateScanner, DedupEstimator
 from app.utils.junk_detector import JUNK_CATEGORIES, format_size
-from app.utils.file_utils import delete_to_trash, delete_permanent, get_recycle_bin_size, empty_recycle_bin
+from app.utils.file_utils import get_recycle_bin_size, empty_recycle_bin
+from app.utils.quarantine import GRACE_SECONDS
+from app.workers.delete_worker import DeleteWorker
+from app.workers.quarantine_worker import QuarantineWorker, RestoreWorker, PurgeWorker
+from app.widgets.file_table_model import COL_GROUP, COL_SIZE, COL_ALLOCATED, FileTableModel
 
 
 class FilesWidget(QWidget):
@@ -18,8 +23,13 @@ class FilesWidget(QWidget):
     def __init__(self, parent=None):
         super().__init__(parent)
         self._scanner = None
-        self._category_files: dict[str, list] = {}
-        self._large_files: list = []
+        self._dup_scanner = None
+        self._estimator = None
+        self._deleter = None
+        self._restorer = None
+        self._purger = None
+        self._undo_pending = False   # undo clicked, waiting for a purge to stop
+        self._dup_groups = 0
         self._build_ui()
 
     def _build_ui(self):
@@ -34,6 +44,12 @@ class FilesWidget(QWidget):
         header.addWidget(title)
         header.addStretch()
 
+        self.full_rescan_chk = QCheckBox("Полное сканирование")
+        self.full_rescan_chk.setToolTip(
+            "Не использовать сохранённый индекс — заново прочитать все папки"
+        )
+        header.addWidget(self.full_rescan_chk)
+
         self.scan_btn = QPushButton("  Начать сканирование")
         self.scan_btn.clicked.connect(self._start_scan)
         header.addWidget(self.scan_btn)
@@ -46,9 +62,19 @@ class FilesWidget(QWidget):
         prog_vl.setContentsMargins(14, 10, 14, 10)
         prog_vl.setSpacing(6)
 
+        label_row = QHBoxLayout()
         self.progress_label = QLabel("Нажмите «Начать сканирование» чтобы найти мусор и большие файлы")
         self.progress_label.setStyleSheet("color: #404060; font-size: 9pt;")
-        prog_vl.addWidget(self.progress_label)
+        label_row.addWidget(self.progress_label, 1)
+        self.undo_btn = QPushButton("Отменить удаление")
+        self.undo_btn.setObjectName("secondary_btn")
+        self.undo_btn.setToolTip(
+            f"Вернуть файлы из карантина на место (пока не прошло {GRACE_SECONDS // 60} мин)"
+        )
+        self.undo_btn.clicked.connect(self._undo_quarantine)
+        self.undo_btn.hide()
+        label_row.addWidget(self.undo_btn)
+        prog_vl.addLayout(label_row)
 
         self.progress_bar = QProgressBar()
         self.progress_bar.setRange(0, 100)
@@ -102,6 +128,8 @@ class FilesWidget(QWidget):
         self.del_perm_btn.setObjectName("danger_btn")
         self.del_perm_btn.setEnabled(False)
         self.del_perm_btn.clicked.connect(lambda: self._delete_selected(trash=False))
+        self.del_quarantine_btn = self._make_quarantine_button(self.junk_table)
+        junk_btn_row.addWidget(self.del_quarantine_btn)
         junk_btn_row.addWidget(self.del_trash_btn)
         junk_btn_row.addWidget(self.del_perm_btn)
         junk_layout.addLayout(junk_btn_row)
@@ -111,7 +139,8 @@ class FilesWidget(QWidget):
         self.large_tab = QWidget()
         large_layout = QVBoxLayout(self.large_tab)
         large_layout.setContentsMargins(8, 8, 8, 8)
-        self.large_table = self._make_file_table()
+        self.large_table = self._make_file_table(
+            colored_columns=frozenset({COL_GROUP, COL_SIZE, COL_ALLOCATED}))
         large_layout.addWidget(self.large_table)
 
         large_btn_row = QHBoxLayout()
@@ -127,10 +156,57 @@ class FilesWidget(QWidget):
         self.del_large_perm_btn.setObjectName("danger_btn")
         self.del_large_perm_btn.setEnabled(False)
         self.del_large_perm_btn.clicked.connect(lambda: self._delete_large(trash=False))
+        self.del_large_quarantine_btn = self._make_quarantine_button(self.large_table)
+        large_btn_row.addWidget(self.del_large_quarantine_btn)
         large_btn_row.addWidget(self.del_large_trash_btn)
         large_btn_row.addWidget(self.del_large_perm_btn)
         large_layout.addLayout(large_btn_row)
-        self.tabs.addTab(self.large_tab, "Большие файлы (>200 МБ)")
+        self.tabs.addTab(self.large_tab, f"Большие файлы (>{LARGE_FILE_MIN_BYTES // 1024**2} МБ)")
+
+        # Tab: Duplicates
+        self.dup_tab = QWidget()
+        dup_layout = QVBoxLayout(self.dup_tab)
+        dup_layout.setContentsMargins(8, 8, 8, 8)
+        dup_header = QHBoxLayout()
+        self.dup_scan_btn = QPushButton("  Найти дубликаты")
+        self.dup_scan_btn.clicked.connect(self._start_dup_scan)
+        dup_header.addWidget(self.dup_scan_btn)
+        self.dup_verify_chk = QCheckBox("Побайтовая проверка")
+        self.dup_verify_chk.setToolTip(
+            "Сравнить файлы целиком байт за байтом — надёжнее перед массовым удалением"
+        )
+        dup_header.addWidget(self.dup_verify_chk)
+        self.dedup_btn = QPushButton("Блочная дедупликация…")
+        self.dedup_btn.setObjectName("secondary_btn")
+        self.dedup_btn.setToolTip(
+            "Оценить, сколько места освободит дедупликация по блокам "
+            "(образы ВМ, резервные копии)"
+        )
+        self.dedup_btn.clicked.connect(self._start_dedup_estimate)
+        dup_header.addWidget(self.dedup_btn)
+        self.dup_status = QLabel("")
+        self.dup_status.setStyleSheet("color: #505070; font-size: 9pt;")
+        dup_header.addWidget(self.dup_status, 1)
+        dup_layout.addLayout(dup_header)
+        self.dup_table = self._make_file_table(sortable=False)
+        dup_layout.addWidget(self.dup_table)
+
+        dup_btn_row = QHBoxLayout()
+        dup_btn_row.addStretch()
+        self.del_dup_trash_btn = QPushButton("В корзину")
+        self.del_dup_trash_btn.setObjectName("secondary_btn")
+        self.del_dup_trash_btn.setEnabled(False)
+        self.del_dup_trash_btn.clicked.connect(lambda: self._delete_dups(trash=True))
+        self.del_dup_perm_btn = QPushButton("Удалить навсегда")
+        self.del_dup_perm_btn.setObjectName("danger_btn")
+        self.del_dup_perm_btn.setEnabled(False)
+        self.del_dup_perm_btn.clicked.connect(lambda: self._delete_dups(trash=False))
+        self.del_dup_quarantine_btn = self._make_quarantine_button(self.dup_table)
+        dup_btn_row.addWidget(self.del_dup_quarantine_btn)
+        dup_btn_row.addWidget(self.del_dup_trash_btn)
+        dup_btn_row.addWidget(self.del_dup_perm_btn)
+        dup_layout.addLayout(dup_btn_row)
+        self.tabs.addTab(self.dup_tab, "Дубликаты")
 
         # Tab: Recycle bin
         self.recycle_tab = QWidget()
@@ -166,25 +242,40 @@ class FilesWidget(QWidget):
         card.setProperty("val_label", val)
         return card
 
-    def _make_file_table(self) -> QTableWidget:
-        table = QTableWidget(0, 4)
-        table.setHorizontalHeaderLabels(["Файл", "Категория", "Размер", "Путь"])
+    def _make_quarantine_button(self, table: QTableView) -> QPushButton:
+        btn = QPushButton("Быстро удалить")
+        btn.setObjectName("secondary_btn")
+        btn.setToolTip(
+            "Мгновенно убрать выбранное в карантин. Окончательно удаляется в фоне "
+            f"через {GRACE_SECONDS // 60} мин, до этого удаление можно отменить"
+        )
+        btn.setEnabled(False)
+        btn.clicked.connect(lambda: self._quarantine_selected(table))
+        return btn
+
+    def _make_file_table(self, colored_columns: frozenset[int] | None = None,
+                         sortable: bool = True) -> QTableView:
+        table = QTableView()
+        table.setModel(FileTableModel(colored_columns, parent=table))
         hdr = table.horizontalHeader()
         hdr.setSectionResizeMode(0, hdr.ResizeMode.Fixed)
         hdr.setSectionResizeMode(1, hdr.ResizeMode.Fixed)
         hdr.setSectionResizeMode(2, hdr.ResizeMode.Fixed)
-        hdr.setSectionResizeMode(3, hdr.ResizeMode.Stretch)
+        hdr.setSectionResizeMode(3, hdr.ResizeMode.Fixed)
+        hdr.setSectionResizeMode(4, hdr.ResizeMode.Stretch)
         table.setColumnWidth(0, 200)
         table.setColumnWidth(1, 180)
         table.setColumnWidth(2, 100)
-        table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
-        table.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectRows)
+        table.setColumnWidth(3, 100)
+        table.setEditTriggers(QTableView.EditTrigger.NoEditTriggers)
+        table.setSelectionBehavior(QTableView.SelectionBehavior.SelectRows)
         table.verticalHeader().setVisible(False)
-        table.setSortingEnabled(True)
+        table.setSortingEnabled(sortable)
         return table
 
     def on_shown(self):
         self._update_recycle_bin()
+        self._start_purge()
 
     def _update_recycle_bin(self):
         count, size = get_recycle_bin_size()
@@ -200,19 +291,20 @@ class FilesWidget(QWidget):
         self.scan_btn.setText("Остановить")
         self.progress_bar.show()
         self.progress_bar.setValue(0)
-        self.junk_table.setRowCount(0)
-        self.large_table.setRowCount(0)
-        self._category_files.clear()
-        self._large_files.clear()
+        self.junk_table.model().clear()
+        self.large_table.model().clear()
         self.del_trash_btn.setEnabled(False)
         self.del_perm_btn.setEnabled(False)
+        self.del_quarantine_btn.setEnabled(False)
         self.del_large_trash_btn.setEnabled(False)
         self.del_large_perm_btn.setEnabled(False)
+        self.del_large_quarantine_btn.setEnabled(False)
         self.summary_widget.hide()
 
-        self._scanner = FileScanner()
+        self._scanner = FileScanner(full_rescan=self.full_rescan_chk.isChecked())
         self._scanner.progress.connect(self._on_progress)
         self._scanner.category_done.connect(self._on_category)
+        self._scanner.large_files_batch.connect(self._on_large_batch)
         self._scanner.large_files_done.connect(self._on_large_files)
         self._scanner.scan_complete.connect(self._on_scan_complete)
         self._scanner.start()
@@ -223,62 +315,30 @@ class FilesWidget(QWidget):
         self.status_message.emit(msg)
 
     def _on_category(self, cat_key: str, files: list):
-        self._category_files[cat_key] = files
         cat = JUNK_CATEGORIES.get(cat_key, {})
-        label = cat.get("label", cat_key)
-        color = cat.get("color", "#e0e0e0")
-
-        self.junk_table.setSortingEnabled(False)
-        for f in files:
-            row = self.junk_table.rowCount()
-            self.junk_table.insertRow(row)
-
-            name_item = QTableWidgetItem(f["name"])
-            cat_item = QTableWidgetItem(label)
-            size_item = QTableWidgetItem(format_size(f["size"]))
-            size_item.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
-            path_item = QTableWidgetItem(f["path"])
-
-            q_color = QColor(color)
-            for item in [name_item, cat_item, size_item, path_item]:
-                item.setForeground(q_color)
-            name_item.setData(Qt.ItemDataRole.UserRole, f["path"])
-
-            self.junk_table.setItem(row, 0, name_item)
-            self.junk_table.setItem(row, 1, cat_item)
-            self.junk_table.setItem(row, 2, size_item)
-            self.junk_table.setItem(row, 3, path_item)
-        self.junk_table.setSortingEnabled(True)
-
-        if self.junk_table.rowCount() > 0:
+        self.junk_table.model().append(files, cat.get("label", cat_key),
+                                       cat.get("color", "#e0e0e0"))
+
+        if self.junk_table.model().rowCount() > 0:
             self.del_trash_btn.setEnabled(True)
             self.del_perm_btn.setEnabled(True)
+            self.del_quarantine_btn.setEnabled(True)
+
+    def _on_large_batch(self, files: list):
+        self._append_large_rows(files)
 
     def _on_large_files(self, files: list):
-        self._large_files = files
-        self.large_table.setSortingEnabled(False)
-        for f in files:
-            row = self.large_table.rowCount()
-            self.large_table.insertRow(row)
-
-            name_item = QTableWidgetItem(f["name"])
-            cat_item = QTableWidgetItem("Большой файл")
-            cat_item.setForeground(QColor("#f39c12"))
-            size_item = QTableWidgetItem(format_size(f["size"]))
-            size_item.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
-            size_item.setForeground(QColor("#f39c12"))
-            path_item = QTableWidgetItem(f["path"])
-            name_item.setData(Qt.ItemDataRole.UserRole, f["path"])
-
-            self.large_table.setItem(row, 0, name_item)
-            self.large_table.setItem(row, 1, cat_item)
-            self.large_table.setItem(row, 2, size_item)
-            self.large_table.setItem(row, 3, path_item)
-        self.large_table.setSortingEnabled(True)
-
-        if self.large_table.rowCount() > 0:
+        # Final top-K replaces whatever the incremental batches showed
+        self.large_table.model().clear()
+        self._append_large_rows(files)
+
+    def _append_large_rows(self, files: list):
+        self.large_table.model().append(files, "Большой файл", "#f39c12")
+
+        if self.large_table.model().rowCount() > 0:
             self.del_large_trash_btn.setEnabled(True)
             self.del_large_perm_btn.setEnabled(True)
+            self.del_large_quarantine_btn.setEnabled(True)
 
     def _on_scan_complete(self, summary: dict):
         self.scan_btn.setText("Начать сканирование")
@@ -297,7 +357,7 @@ class FilesWidget(QWidget):
             count_val.setText(str(junk_count))
         large_val = self.summary_large.property("val_label")
         if large_val:
-            large_val.setText(str(len(self._large_files)))
+            large_val.setText(str(self.large_table.model().rowCount()))
 
         self.progress_label.setText(
             f"Готово! Найдено мусора: {format_size(junk_size)} ({junk_count} файлов)"
@@ -305,28 +365,95 @@ class FilesWidget(QWidget):
         self.status_message.emit(f"Сканирование завершено. Мусор: {format_size(junk_size)}")
         self._update_recycle_bin()
 
+    def _start_dup_scan(self):
+        if self._dup_scanner and self._dup_scanner.isRunning():
+            self._dup_scanner.stop()
+            return
+
+        self.dup_scan_btn.setText("Остановить")
+        self.dup_table.model().clear()
+        self._dup_groups = 0
+        self.del_dup_trash_btn.setEnabled(False)
+        self.del_dup_perm_btn.setEnabled(False)
+        self.del_dup_quarantine_btn.setEnabled(False)
+
+        self._dup_scanner = DuplicateScanner(verify=self.dup_verify_chk.isChecked())
+        self._dup_scanner.progress.connect(lambda pct, msg: self.dup_status.setText(msg))
+        self._dup_scanner.group_found.connect(self._on_dup_group)
+        self._dup_scanner.scan_complete.connect(self._on_dup_complete)
+        self._dup_scanner.start()
+
+    def _on_dup_group(self, group: list):
+        self._dup_groups += 1
+        label = f"Группа {self._dup_groups} · {len(group)} копии"
+        color = "#3498db" if self._dup_groups % 2 else "#9b59b6"
+        self.dup_table.model().append(group, label, color)
+
+        self.del_dup_trash_btn.setEnabled(True)
+        self.del_dup_perm_btn.setEnabled(True)
+        self.del_dup_quarantine_btn.setEnabled(True)
+
+    def _on_dup_complete(self, summary: dict):
+        self.dup_scan_btn.setText("  Найти дубликаты")
+        msg = (f"Групп дубликатов: {summary.get('groups', 0)} · "
+               f"Можно освободить: {format_size(summary.get('wasted', 0))}")
+        self.dup_status.setText(msg)
+        self.status_message.emit(msg)
+
+    def _start_dedup_estimate(self):
+        if self._estimator and self._estimator.isRunning():
+            self._estimator.stop()
+            return
+        folder = QFileDialog.getExistingDirectory(self, "Папка для анализа")
+        if not folder:
+            return
+        self.dedup_btn.setText("Остановить")
+        self._estimator = DedupEstimator([folder])
+        self._estimator.progress.connect(lambda pct, msg: self.dup_status.setText(msg))
+        self._estimator.report_ready.connect(self._on_dedup_report)
+        self._estimator.start()
+
+    def _on_dedup_report(self, report):
+        self.dedup_btn.setText("Блочная дедупликация…")
+        pct = report.saved / report.total * 100 if report.total else 0
+        msg = (f"Блочная дедупликация освободит {format_size(report.saved)} "
+               f"из {format_size(report.total)} ({pct:.1f}%)")
+        self.dup_status.setText(msg)
+        lines = ["Папки:"]
+        lines += [f"  {format_size(saved)} из {format_size(total)} — {folder}"
+                  for folder, total, saved in report.folders[:20] if saved]
+        lines += ["", "Пары файлов:"]
+        lines += [f"  {format_size(shared)} — {a} ↔ {b}" for a, b, shared in report.pairs[:20]]
+        box = QMessageBox(QMessageBox.Icon.Information, "Блочная дедупликация", msg, parent=self)
+        box.setDetailedText("\n".join(lines))
+        box.exec()
+
+    def _delete_dups(self, trash: bool):
+        paths = self._collect_selected_paths(self.dup_table)
+        if not paths:
+            QMessageBox.information(self, "Нет выбора", "Выберите файлы для удаления")
+            return
+        self._confirm_and_delete(paths, self.dup_table, trash)
+
     def _toggle_select_all_junk(self, checked: bool):
-        for row in range(self.junk_table.rowCount()):
-            self.junk_table.setRangeSelected(
-                QTableWidgetSelectionRange(row, 0, row, 3), checked
-            )
+        if checked:
+            self.junk_table.selectAll()
+        else:
+            self.junk_table.clearSelection()
 
     def _toggle_select_all_large(self, checked: bool):
-        for row in range(self.large_table.rowCount()):
-            self.large_table.setRangeSelected(
-                QTableWidgetSelectionRange(row, 0, row, 3), checked
-            )
+        if checked:
+            self.large_table.selectAll()
+        else:
+            self.large_table.clearSelection()
 
-    def _collect_selected_paths(self, table: QTableWidget) -> list[str]:
-        rows = set(item.row() for item in table.selectedItems())
-        paths = []
-        for row in rows:
-            item = table.item(row, 0)
-            if item:
-                path = item.data(Qt.ItemDataRole.UserRole)
-                if path:
-                    paths.append(path)
-        return paths
+    def _collect_selected_paths(self, table: QTableView) -> list[str]:
+        # Walk the selection ranges: "select all" is one range, not a row index per file
+        model = table.model()
+        rows = set()
+        for rng in table.selectionModel().selection():
+            rows.update(range(rng.top(), rng.bottom() + 1))
+        return [model.path_at(row) for row in sorted(rows)]
 
     def _delete_selected(self, trash: bool):
         paths = self._collect_selected_paths(self.junk_table)
@@ -342,7 +469,10 @@ class FilesWidget(QWidget):
             return
         self._confirm_and_delete(paths, self.large_table, trash)
 
-    def _confirm_and_delete(self, paths: list, table: QTableWidget, trash: bool):
+    def _confirm_and_delete(self, paths: list, table: QTableView, trash: bool):
+        if self._deleter and self._deleter.isRunning():
+            QMessageBox.information(self, "Удаление", "Дождитесь окончания текущего удаления")
+            return
         method = "корзину" if trash else "НАВСЕГДА"
         reply = QMessageBox.question(
             self, "Подтверждение удаления",
@@ -352,27 +482,118 @@ class FilesWidget(QWidget):
         if reply != QMessageBox.StandardButton.Yes:
             return
 
-        if trash:
-            ok, failed = delete_to_trash(paths)
+        self.progress_bar.show()
+        self.progress_bar.setValue(0)
+        self._deleter = DeleteWorker(paths, trash)
+        self._deleter.progress.connect(self._on_delete_progress)
+        self._deleter.deletion_done.connect(lambda results: self._on_deleted(results, table))
+        self._deleter.start()
+
+    def _on_delete_progress(self, done: int, total: int, freed: int):
+        self.progress_bar.setValue(int(done / max(total, 1) * 100))
+        self.progress_label.setText(
+            f"Удаление: {done} из {total} · освобождено {format_size(freed)}"
+        )
+
+    def _on_deleted(self, results: list, table: QTableView):
+        self.progress_bar.hide()
+        deleted = self._deleter.plan.removed(results)
+        failed = [f"{r.path}: {r.error}" for r in results if not r.ok]
+        freed = sum(r.freed for r in results)
+
+        self._remove_rows(table, deleted)
+        msg = f"Удалено: {len(deleted)} файлов · освобождено {format_size(freed)}"
+        self.progress_label.setText(msg)
+        if failed:
+            msg += f"\nОшибки ({len(failed)}):\n" + "\n".join(failed[:5])
+            QMessageBox.warning(self, "Частичное удаление", msg)
         else:
-            ok, failed = delete_permanent(paths)
-
-        # Remove deleted rows from table
-        rows_to_remove = []
-        for row in range(table.rowCount()):
-            item = table.item(row, 0)
-            if item and item.data(Qt.ItemDataRole.UserRole) in paths:
-                rows_to_remove.append(row)
-        for row in reversed(rows_to_remove):
-            table.removeRow(row)
-
-        msg = f"Удалено: {ok} файлов"
+            self.status_message.emit(msg)
+
+    def _remove_rows(self, table: QTableView, paths: set[str]):
+        table.model().remove_paths(paths)
+
+    def _quarantine_selected(self, table: QTableView):
+        paths = self._collect_selected_paths(table)
+        if not paths:
+            QMessageBox.information(self, "Нет выбора", "Выберите файлы для удаления")
+            return
+        if self._deleter and self._deleter.isRunning():
+            QMessageBox.information(self, "Удаление", "Дождитесь окончания текущего удаления")
+            return
+        # No confirmation: the move is undone with one click
+        self.progress_bar.show()
+        self.progress_bar.setValue(0)
+        self._deleter = QuarantineWorker(paths)
+        self._deleter.progress.connect(self._on_delete_progress)
+        self._deleter.deletion_done.connect(lambda results: self._on_quarantined(results, table))
+        self._deleter.start()
+
+    def _on_quarantined(self, results: list, table: QTableView):
+        self.progress_bar.hide()
+        moved = self._deleter.plan.removed(results)
+        failed = [f"{r.path}: {r.error}" for r in results if not r.ok]
+        self._remove_rows(table, moved)
+
+        msg = (f"Убрано в карантин: {len(moved)} · "
+               f"удалится окончательно через {GRACE_SECONDS // 60} мин")
+        self.progress_label.setText(msg)
+        self.undo_btn.setVisible(bool(moved))
+        QTimer.singleShot((GRACE_SECONDS + 5) * 1000, self._start_purge)
         if failed:
             msg += f"\nОшибки ({len(failed)}):\n" + "\n".join(failed[:5])
             QMessageBox.warning(self, "Частичное удаление", msg)
         else:
             self.status_message.emit(msg)
 
+    def _undo_quarantine(self):
+        if self._restorer and self._restorer.isRunning():
+            return
+        self._undo_pending = True
+        # A purge must not remove entries while they are moved back: stop it
+        # and restore once its thread is done, without blocking the UI
+        if self._purger and self._purger.isRunning():
+            self.undo_btn.setEnabled(False)
+            self._purger.stop()
+            return      # the purger's finished signal calls _start_restore()
+        self._start_restore()
+
+    def _start_restore(self):
+        if not self._undo_pending:
+            return
+        self._undo_pending = False
+        self.undo_btn.hide()
+        self.undo_btn.setEnabled(True)
+        self._restorer = RestoreWorker()
+        self._restorer.restore_done.connect(self._on_restored)
+        self._restorer.start()
+
+    def _on_restored(self, restored: list, failed: list):
+        msg = (f"Восстановлено: {len(restored)} · "
+               "пересканируйте, чтобы снова увидеть их в списке")
+        self.progress_label.setText(msg)
+        if failed:
+            msg += f"\nНе восстановлено ({len(failed)}):\n" + "\n".join(failed[:5])
+            QMessageBox.warning(self, "Отмена удаления", msg)
+        else:
+            self.status_message.emit(msg)
+
+    def _start_purge(self):
+        if (self._purger and self._purger.isRunning()) or \
+                (self._restorer and self._restorer.isRunning()) or self._undo_pending:
+            return
+        self._purger = PurgeWorker()
+        self._purger.purge_done.connect(self._on_purged)
+        self._purger.finished.connect(self._start_restore)
+        self._purger.start()
+
+    def _on_purged(self, removed: int, freed: int):
+        if removed:
+            self.undo_btn.hide()
+            self.status_message.emit(
+                f"Карантин очищен: {removed} объектов · освобождено {format_size(freed)}"
+            )
+
     def _empty_recycle_bin(self):
         reply = QMessageBox.question(
             self, "Очистить корзину",
@@ -0,0 +1,165 @@
+"""
+Process table model: one row per process, kept across refreshes.
+
+The rows are a ProcessSnapshot (keyed by (pid, create_time), so a recycled
+PID is a new row) fed with ProcessMonitor's deltas: exited processes are
+removed, new ones appended, and only rows whose values changed get
+dataChanged. A keyframe is first diffed against the rows shown. Views and
+the sort/filter proxy keep their selection and scroll position, and a
+refresh costs what changed.
+"""
+from PyQt6.QtCore import QAbstractTableModel, QModelIndex, QSortFilterProxyModel, Qt
+from PyQt6.QtGui import QColor
+
+from app.utils.junk_detector import format_size
+from app.utils.process_info import IMPORTANCE_LABELS, get_process_info
+from app.utils.process_snapshot import ProcessDelta, ProcessSnapshot, proc_key, runs
+
+COLUMNS = ["Процесс", "PID", "CPU %", "CPU 5 мин", "RAM", "Статус", "Категория"]
+(COL_NAME, COL_PID, COL_CPU, COL_AVG_CPU, COL_RAM,
+ COL_STATUS, COL_IMPORTANCE) = range(len(COLUMNS))
+
+PROC_ROLE = Qt.ItemDataRole.UserRole          # the process dict of the row
+SORT_ROLE = Qt.ItemDataRole.UserRole + 1      # raw value to sort by
+IMPORTANCE_ROLE = Qt.ItemDataRole.UserRole + 2
+KEY_ROLE = Qt.ItemDataRole.UserRole + 3       # (pid, create_time); None for a group row
+
+_CENTER = Qt.AlignmentFlag.AlignCenter
+_RIGHT = Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter
+_ALIGN = {COL_PID: _CENTER, COL_CPU: _CENTER, COL_AVG_CPU: _CENTER, COL_RAM: _RIGHT,
+          COL_STATUS: _CENTER, COL_IMPORTANCE: _CENTER}
+_FIELDS = {COL_NAME: "name", COL_PID: "pid", COL_CPU: "cpu", COL_AVG_CPU: "avg_cpu",
+           COL_RAM: "ram", COL_STATUS: "status"}
+_COLORS = {imp: QColor(color) for imp, (_, color) in IMPORTANCE_LABELS.items()}
+_DEFAULT_COLOR = QColor("#e0e0e0")
+
+
+def importance_color(importance: int) -> QColor:
+    return _COLORS.get(importance, _DEFAULT_COLOR)
+
+
+class ProcessTableModel(QAbstractTableModel):
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._snap = ProcessSnapshot()
+        self._importance: dict[tuple, int] = {}
+
+    # ── Qt model interface ───────────────────
+
+    def rowCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._snap)
+
+    def columnCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(COLUMNS)
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if orientation != Qt.Orientation.Horizontal:
+            return None
+        if role == Qt.ItemDataRole.DisplayRole:
+            return COLUMNS[section]
+        if role == Qt.ItemDataRole.ToolTipRole and section == COL_AVG_CPU:
+            return "Средняя загрузка CPU за последние 5 минут"
+        return None
+
+    def data(self, index: QModelIndex, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        row = index.row()
+        key = self._snap.keys[row]
+        col = index.column()
+        if role == Qt.ItemDataRole.DisplayRole:
+            if col == COL_PID:
+                return str(self._snap.get(row, "pid"))
+            if col in (COL_CPU, COL_AVG_CPU):
+                return f"{self._snap.get(row, _FIELDS[col]):.1f}"
+            if col == COL_RAM:
+                return format_size(self._snap.get(row, "ram"))
+            if col == COL_IMPORTANCE:
+                return IMPORTANCE_LABELS.get(self._importance[key], ("Обычный", ""))[0]
+            return self._snap.get(row, _FIELDS[col])
+        if role == SORT_ROLE:
+            if col == COL_NAME:
+                return self._snap.get(row, "name").lower()
+            if col == COL_IMPORTANCE:
+                return self._importance[key]
+            return self._snap.get(row, _FIELDS[col])
+        if role == Qt.ItemDataRole.ForegroundRole:
+            return importance_color(self._importance[key])
+        if role == Qt.ItemDataRole.TextAlignmentRole:
+            return _ALIGN.get(col)
+        if role == IMPORTANCE_ROLE:
+            return self._importance[key]
+        if role == KEY_ROLE:
+            return key
+        if role == PROC_ROLE:
+            return self._snap.row(row)
+        return None
+
+    # ── access ───────────────────────────────
+
+    def proc_at(self, row: int) -> dict:
+        return self._snap.row(row)
+
+    def proc_by_key(self, key: tuple) -> dict | None:
+        return self._snap.row(self._snap.row_of(key)) if key in self._snap else None
+
+    # ── deltas ───────────────────────────────
+
+    def apply(self, delta: ProcessDelta):
+        """Apply a ProcessMonitor delta; a keyframe is reconciled with the rows shown."""
+        snap = self._snap
+        if delta.keyframe:
+            delta = snap.diff(delta.added)
+
+        gone = sorted(snap.row_of(k) for k in delta.removed)
+        # Last run first, so the row numbers of the earlier runs stay valid
+        for first, last in reversed(list(runs(gone))):
+            self.beginRemoveRows(QModelIndex(), first, last)
+            for key in snap.keys[first:last + 1]:
+                del self._importance[key]
+            snap.remove_rows(first, last)
+            self.endRemoveRows()
+        if gone:
+            snap.reindex()
+
+        changed = []
+        for key, fields in delta.changed:
+            snap.set(key, fields)
+            changed.append(snap.row_of(key))
+        last_col = len(COLUMNS) - 1
+        for first, last in runs(sorted(changed)):
+            self.dataChanged.emit(self.index(first, 0), self.index(last, last_col))
+
+        if delta.added:
+            start = len(snap)
+            self.beginInsertRows(QModelIndex(), start, start + len(delta.added) - 1)
+            snap.append(delta.added)
+            for proc in delta.added:
+                self._importance[proc_key(proc)] = get_process_info(proc["name"])[1]
+            self.endInsertRows()
+
+
+class ProcessFilterProxy(QSortFilterProxyModel):
+    """
+    Sorts on raw values and filters by name substring and importance. Works
+    for the tree models too: a row is kept when any of its descendants matches.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._search = ""
+        self._importance = -1     # -1: all
+        self.setSortRole(SORT_ROLE)
+        self.setDynamicSortFilter(True)
+        self.setRecursiveFilteringEnabled(True)
+
+    def set_filter(self, search: str, importance: int):
+        self._search = search.lower()
+        self._importance = importance
+        self.invalidateFilter()
+
+    def filterAcceptsRow(self, source_row: int, source_parent: QModelIndex) -> bool:
+        index = self.sourceModel().index(source_row, 0, source_parent)
+        if self._importance >= 0 and index.data(IMPORTANCE_ROLE) != self._importance:
+            return False
+        return not self._search or self._search in index.data().lower()
@@ -0,0 +1,325 @@
+"""
+Process tree models: parent/child tree, or processes grouped by executable.
+
+Fed with the same ProcessDelta stream as the flat table, and kept up to
+date the same way: a started process is inserted under its parent, an
+exited one removed (its children move to the top level), a changed ppid
+moves the row. Nothing is rebuilt from ppids per tick.
+
+Every node carries totals of its subtree: CPU %, RSS, threads and process
+count. A change in a process's own values is added to it and to each of
+its ancestors, so a tick costs the changed processes times the tree
+depth. A keyframe also recomputes all totals from scratch, which clears
+floating-point drift.
+
+In group mode the tree has two levels: one node per executable (by path,
+or by name when the path is unknown) and its processes under it.
+"""
+import os
+
+from PyQt6.QtCore import QAbstractItemModel, QModelIndex, Qt
+
+from app.utils.junk_detector import format_size
+from app.utils.process_info import get_process_info
+from app.utils.process_snapshot import ProcessDelta, proc_key
+from app.widgets.process_model import (
+    IMPORTANCE_ROLE, KEY_ROLE, SORT_ROLE, importance_color,
+)
+
+TREE_COLUMNS = ["Процесс", "PID", "CPU %", "RAM", "Потоки", "Процессов"]
+(TCOL_NAME, TCOL_PID, TCOL_CPU, TCOL_RAM,
+ TCOL_THREADS, TCOL_COUNT) = range(len(TREE_COLUMNS))
+
+_METRICS = ("cpu", "ram", "threads")     # summed over subtrees, with the count
+_EPSILON = 1e-6
+_CENTER = Qt.AlignmentFlag.AlignCenter
+_RIGHT = Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter
+_ALIGN = {TCOL_PID: _CENTER, TCOL_CPU: _CENTER, TCOL_RAM: _RIGHT,
+          TCOL_THREADS: _CENTER, TCOL_COUNT: _CENTER}
+
+
+class _Node:
+    __slots__ = ("key", "name", "pid", "ppid", "create_time", "exe", "importance",
+                 "parent", "row", "children", "own", "total")
+
+    def __init__(self, key: tuple, name: str, pid: int | None, ppid: int,
+                 create_time: float, exe: str, own: list):
+        self.key = key
+        self.name = name
+        self.pid = pid                   # None for an executable group
+        self.ppid = ppid
+        self.create_time = create_time
+        self.exe = exe
+        self.importance = get_process_info(name)[1]
+        self.parent: _Node | None = None
+        self.row = 0                     # position among the parent's children
+        self.children: list[_Node] = []
+        self.own = own                   # [cpu, ram, threads, processes]
+        self.total = list(own)           # the same over the subtree
+
+
+class ProcessTreeModel(QAbstractItemModel):
+    def __init__(self, group_by_exe: bool = False, parent=None):
+        super().__init__(parent)
+        self._group_by_exe = group_by_exe
+        self._roots: list[_Node] = []
+        self._nodes: dict[tuple, _Node] = {}    # processes and groups
+        self._by_pid: dict[int, _Node] = {}     # processes only
+
+    # ── Qt model interface ───────────────────
+
+    def index(self, row: int, column: int, parent=QModelIndex()) -> QModelIndex:
+        if not self.hasIndex(row, column, parent):
+            return QModelIndex()
+        siblings = parent.internalPointer().children if parent.isValid() else self._roots
+        return self.createIndex(row, column, siblings[row])
+
+    def parent(self, index: QModelIndex) -> QModelIndex:
+        if not index.isValid():
+            return QModelIndex()
+        return self._index(index.internalPointer().parent)
+
+    def rowCount(self, parent=QModelIndex()) -> int:
+        if parent.column() > 0:
+            return 0
+        return len(parent.internalPointer().children) if parent.isValid() else len(self._roots)
+
+    def columnCount(self, parent=QModelIndex()) -> int:
+        return len(TREE_COLUMNS)
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if orientation != Qt.Orientation.Horizontal:
+            return None
+        if role == Qt.ItemDataRole.DisplayRole:
+            return TREE_COLUMNS[section]
+        if role == Qt.ItemDataRole.ToolTipRole and section != TCOL_NAME:
+            return "Сумма по процессу и всем его потомкам"
+        return None
+
+    def data(self, index: QModelIndex, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        node: _Node = index.internalPointer()
+        col = index.column()
+        cpu, ram, threads, count = node.total
+        if role == Qt.ItemDataRole.DisplayRole:
+            if col == TCOL_NAME:
+                return node.name
+            if col == TCOL_PID:
+                return "" if node.pid is None else str(node.pid)
+            if col == TCOL_CPU:
+                return f"{max(cpu, 0.0):.1f}"
+            if col == TCOL_RAM:
+                return format_size(max(int(ram), 0))
+            if col == TCOL_THREADS:
+                return str(int(threads))
+            return str(int(count))
+        if role == SORT_ROLE:
+            if col == TCOL_NAME:
+                return node.name.lower()
+            if col == TCOL_PID:
+                return -1 if node.pid is None else node.pid
+            return node.total[col - TCOL_CPU]
+        if role == Qt.ItemDataRole.ForegroundRole:
+            return importance_color(node.importance)
+        if role == Qt.ItemDataRole.TextAlignmentRole:
+            return _ALIGN.get(col)
+        if role == IMPORTANCE_ROLE:
+            return node.importance
+        if role == KEY_ROLE:
+            return None if node.pid is None else node.key
+        return None
+
+    # ── deltas ───────────────────────────────
+
+    def apply(self, delta: ProcessDelta):
+        """Apply a ProcessMonitor delta; a keyframe is reconciled with the nodes shown."""
+        keyframe = delta.keyframe
+        if keyframe:
+            delta = self._diff(delta.added)
+        added = sorted(delta.added, key=lambda p: p["create_time"])    # parents first
+        if not self._by_pid:
+            self.beginResetModel()
+            for proc in added:
+                self._attach(self._make(proc), None, signal=False)
+            self.endResetModel()
+            return
+
+        touched: set[_Node] = set()
+        for key in delta.removed:
+            self._remove(self._nodes[key], touched)
+        for key, fields in delta.changed:
+            self._change(self._nodes[key], fields, touched)
+        for proc in added:
+            self._attach(self._make(proc), touched)
+        if keyframe:
+            self._recompute(touched)
+        for node in touched:
+            if self._nodes.get(node.key) is node:
+                self.dataChanged.emit(self._index(node), self._index(node, len(TREE_COLUMNS) - 1))
+
+    def _diff(self, procs: list[dict]) -> ProcessDelta:
+        fresh = {proc_key(p): p for p in procs}
+        removed = [node.key for node in self._by_pid.values() if node.key not in fresh]
+        added, changed = [], []
+        for key, proc in fresh.items():
+            node = self._nodes.get(key)
+            if node is None:
+                added.append(proc)
+                continue
+            fields = {f: proc[f] for f in _METRICS if node.own[_METRICS.index(f)] != proc[f]}
+            if node.name != proc["name"]:
+                fields["name"] = proc["name"]
+            if node.ppid != proc["ppid"]:
+                fields["ppid"] = proc["ppid"]
+            if fields:
+                changed.append((key, fields))
+        return ProcessDelta(False, added, removed, changed)
+
+    # ── tree maintenance ─────────────────────
+
+    def _make(self, proc: dict) -> _Node:
+        node = _Node(proc_key(proc), proc["name"], proc["pid"], proc["ppid"],
+                     proc["create_time"], proc["exe"],
+                     [proc["cpu"], proc["ram"], proc["threads"], 1])
+        self._nodes[node.key] = node
+        self._by_pid[node.pid] = node
+        return node
+
+    def _parent_for(self, node: _Node, signal: bool = True) -> _Node | None:
+        if self._group_by_exe:
+            path = node.exe or node.name
+            group = self._nodes.get(("exe", path))
+            if group is None:
+                name = os.path.basename(node.exe) if node.exe else node.name
+                group = _Node(("exe", path), name, None, 0, 0.0, path, [0.0, 0, 0, 0])
+                self._nodes[group.key] = group
+                self._insert(group, None, signal)
+            return group
+        parent = self._by_pid.get(node.ppid)
+        # A parent must predate its child: otherwise the ppid names a process
+        # that exited, and the PID now belongs to another one
+        if parent is None or parent is node or parent.create_time > node.create_time:
+            return None
+        ancestor = parent
+        while ancestor is not None:
+            if ancestor is node:
+                return None
+            ancestor = ancestor.parent
+        return parent
+
+    def _insert(self, node: _Node, parent: _Node | None, signal: bool):
+        siblings = parent.children if parent else self._roots
+        if signal:
+            self.beginInsertRows(self._index(parent), len(siblings), len(siblings))
+        node.parent = parent
+        node.row = len(siblings)
+        siblings.append(node)
+        if signal:
+            self.endInsertRows()
+
+    def _attach(self, node: _Node, touched: set | None, signal: bool = True):
+        parent = self._parent_for(node, signal)
+        self._insert(node, parent, signal)
+        self._add_up(parent, node.total, touched)
+
+    def _remove(self, node: _Node, touched: set):
+        if node.children:
+            # Orphans go to the top level; the next ppid change moves them on
+            kids = node.children
+            for kid in kids:
+                self._add_up(node, kid.total, touched, -1)
+            self.beginMoveRows(self._index(node), 0, len(kids) - 1,
+                               QModelIndex(), len(self._roots))
+            for row, kid in enumerate(kids, len(self._roots)):
+                kid.parent = None
+                kid.row = row
+            self._roots.extend(kids)
+            node.children = []
+            self.endMoveRows()
+        parent = node.parent
+        self._add_up(parent, node.total, touched, -1)
+        siblings = parent.children if parent else self._roots
+        row = node.row
+        self.beginRemoveRows(self._index(parent), row, row)
+        _take(siblings, row)
+        node.parent = None
+        self.endRemoveRows()
+        del self._nodes[node.key]
+        if node.pid is not None and self._by_pid.get(node.pid) is node:
+            del self._by_pid[node.pid]
+        if self._group_by_exe and parent is not None and not parent.children:
+            self._remove(parent, touched)
+
+    def _change(self, node: _Node, fields: dict, touched: set):
+        diff = [0.0, 0, 0, 0]
+        for i, f in enumerate(_METRICS):
+            if f in fields:
+                diff[i] = fields[f] - node.own[i]
+                node.own[i] = fields[f]
+        if any(diff):
+            self._add_up(node, diff, touched)
+        if "name" in fields:
+            node.name = fields["name"]
+            touched.add(node)
+        if "ppid" in fields:
+            node.ppid = fields["ppid"]
+            if not self._group_by_exe:
+                new_parent = self._parent_for(node)
+                if new_parent is not node.parent:
+                    self._move(node, new_parent, touched)
+
+    def _move(self, node: _Node, new_parent: _Node | None, touched: set):
+        old_parent = node.parent
+        self._add_up(old_parent, node.total, touched, -1)
+        siblings = old_parent.children if old_parent else self._roots
+        dest = new_parent.children if new_parent else self._roots
+        row = node.row
+        self.beginMoveRows(self._index(old_parent), row, row, self._index(new_parent), len(dest))
+        _take(siblings, row)
+        node.parent = new_parent
+        node.row = len(dest)
+        dest.append(node)
+        self.endMoveRows()
+        self._add_up(new_parent, node.total, touched)
+
+    def _add_up(self, node: _Node | None, values: list, touched: set | None, sign: int = 1):
+        """Add `values` (times `sign`) to the totals of `node` and its ancestors."""
+        while node is not None:
+            total = node.total
+            for i, v in enumerate(values):
+                total[i] += sign * v
+            if touched is not None:
+                touched.add(node)
+            node = node.parent
+
+    def _recompute(self, touched: set):
+        """Rebuild every total from the processes' own values (post-order)."""
+        stack = [(node, False) for node in self._roots]
+        while stack:
+            node, expanded = stack.pop()
+            if not expanded:
+                stack.append((node, True))
+                stack.extend((kid, False) for kid in node.children)
+                continue
+            total = list(node.own)
+            for kid in node.children:
+                for i, v in enumerate(kid.total):
+                    total[i] += v
+            if any(abs(a - b) > _EPSILON for a, b in zip(total, node.total)):
+                touched.add(node)
+            node.total = total
+
+    # ── helpers ──────────────────────────────
+
+    def _index(self, node: _Node | None, column: int = 0) -> QModelIndex:
+        if node is None:
+            return QModelIndex()
+        return self.createIndex(node.row, column, node)
+
+
+def _take(siblings: list[_Node], row: int):
+    """Remove the node at `row` and renumber the ones after it."""
+    siblings.pop(row)
+    for i in range(row, len(siblings)):
+        siblings[i].row = i
@@ -1,16 +1,65 @@
 import psutil
 from PyQt6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QLabel,
-    QTableWidget, QTableWidgetItem, QPushButton,
+    QTableView, QTreeView, QPushButton,
     QComboBox, QLineEdit, QMessageBox, QSplitter,
-    QTextEdit, QFrame
+    QStackedWidget, QTextEdit, QFrame
 )
-from PyQt6.QtCore import Qt, pyqtSignal, QSortFilterProxyModel
-from PyQt6.QtGui import QFont, QColor
+from PyQt6.QtCore import Qt, QModelIndex, QPointF, pyqtSignal
+from PyQt6.QtGui import QColor, QFont, QPainter, QPen, QPolygonF
 
 from app.workers.process_monitor import ProcessMonitor
+from app.utils.process_registry import ProcessRegistry
 from app.utils.process_info import get_process_info, IMPORTANCE_LABELS
 from app.utils.junk_detector import format_size
+from app.widgets.process_model import (
+    COL_CPU, KEY_ROLE, ProcessFilterProxy, ProcessTableModel,
+)
+from app.widgets.process_tree_model import TCOL_CPU, ProcessTreeModel
+
+REFRESH_MS = 2000
+
+
+class Sparkline(QWidget):
+    """Small line chart of recent samples with a caption and the latest value."""
+    def __init__(self, title: str, color: str, fmt, parent=None):
+        super().__init__(parent)
+        self._title = title
+        self._color = QColor(color)
+        self._fmt = fmt
+        self._values: list = []
+        self.setMinimumHeight(48)
+
+    def set_values(self, values: list):
+        self._values = values
+        self.update()
+
+    def paintEvent(self, event):
+        p = QPainter(self)
+        p.setRenderHint(QPainter.RenderHint.Antialiasing)
+        rect = self.rect().adjusted(1, 1, -1, -1)
+        p.setPen(QColor("#1e1e42"))
+        p.setBrush(QColor("#13132a"))
+        p.drawRoundedRect(rect, 6, 6)
+
+        values = self._values
+        if len(values) >= 2:
+            top = max(max(values), 1)
+            w, h = rect.width() - 8, rect.height() - 22
+            step = w / (len(values) - 1)
+            line = QPolygonF([
+                QPointF(rect.left() + 4 + i * step, rect.bottom() - 4 - v / top * h)
+                for i, v in enumerate(values)
+            ])
+            p.setPen(QPen(self._color, 1.5))
+            p.drawPolyline(line)
+
+        p.setPen(QColor("#8080a0"))
+        latest = self._fmt(values[-1]) if values else "—"
+        peak = f" · макс {self._fmt(max(values))}" if values else ""
+        p.drawText(rect.adjusted(8, 4, -8, 0), Qt.AlignmentFlag.AlignTop,
+                   f"{self._title}: {latest}{peak}")
+        p.end()
 
 
 class ProcessWidget(QWidget):
@@ -19,7 +68,19 @@ class ProcessWidget(QWidget):
     def __init__(self, parent=None):
         super().__init__(parent)
         self._monitor = None
-        self._procs = []
+        self._monitor_wanted = False
+        # Outlives the monitor thread, so CPU % stays measured across tab switches
+        self._registry = ProcessRegistry()
+        # Flat list, process tree and by-executable groups, all fed the same deltas
+        self._model = ProcessTableModel(self)
+        self._tree_model = ProcessTreeModel(parent=self)
+        self._exe_model = ProcessTreeModel(group_by_exe=True, parent=self)
+        self._proxies = []
+        for model in (self._model, self._tree_model, self._exe_model):
+            proxy = ProcessFilterProxy(self)
+            proxy.setSourceModel(model)
+            self._proxies.append(proxy)
+        self._proxy = self._proxies[0]
         self._build_ui()
 
     def _build_ui(self):
@@ -34,6 +95,12 @@ class ProcessWidget(QWidget):
         header.addWidget(title)
         header.addStretch()
 
+        self.view_combo = QComboBox()
+        self.view_combo.addItems(["Список", "Дерево", "По программе"])
+        self.view_combo.setToolTip("Дерево и группы показывают суммарные CPU, RAM и потоки")
+        self.view_combo.currentIndexChanged.connect(self._on_view_mode)
+        header.addWidget(self.view_combo)
+
         self.search_box = QLineEdit()
         self.search_box.setPlaceholderText("Поиск по имени...")
         self.search_box.setFixedWidth(200)
@@ -74,9 +141,9 @@ class ProcessWidget(QWidget):
         # Splitter: table + detail panel
         splitter = QSplitter(Qt.Orientation.Vertical)
 
-        # Process table
-        self.table = QTableWidget(0, 6)
-        self.table.setHorizontalHeaderLabels(["Процесс", "PID", "CPU %", "RAM", "Статус", "Категория"])
+        # Process table: rows persist across refreshes, so selection and scroll do too
+        self.table = QTableView()
+        self.table.setModel(self._proxy)
         hdr = self.table.horizontalHeader()
         hdr.setSectionResizeMode(0, hdr.ResizeMode.Stretch)
         hdr.setSectionResizeMode(1, hdr.ResizeMode.Fixed)
@@ -84,21 +151,31 @@ class ProcessWidget(QWidget):
         hdr.setSectionResizeMode(3, hdr.ResizeMode.Fixed)
         hdr.setSectionResizeMode(4, hdr.ResizeMode.Fixed)
         hdr.setSectionResizeMode(5, hdr.ResizeMode.Fixed)
+        hdr.setSectionResizeMode(6, hdr.ResizeMode.Fixed)
         self.table.setColumnWidth(1, 70)
         self.table.setColumnWidth(2, 70)
-        self.table.setColumnWidth(3, 90)
+        self.table.setColumnWidth(3, 80)
         self.table.setColumnWidth(4, 90)
-        self.table.setColumnWidth(5, 100)
-        self.table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
-        self.table.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectRows)
+        self.table.setColumnWidth(5, 90)
+        self.table.setColumnWidth(6, 100)
+        self.table.setEditTriggers(QTableView.EditTrigger.NoEditTriggers)
+        self.table.setSelectionBehavior(QTableView.SelectionBehavior.SelectRows)
+        self.table.setSelectionMode(QTableView.SelectionMode.SingleSelection)
         self.table.verticalHeader().setVisible(False)
         self.table.setAlternatingRowColors(True)
         self.table.setStyleSheet(
-            "QTableWidget { alternate-background-color: #1e1e38; }"
+            "QTableView { alternate-background-color: #1e1e38; }"
         )
-        self.table.itemSelectionChanged.connect(self._on_selection)
+        self.table.selectionModel().selectionChanged.connect(self._on_selection)
         self.table.setSortingEnabled(True)
-        splitter.addWidget(self.table)
+        self.table.sortByColumn(COL_CPU, Qt.SortOrder.DescendingOrder)
+
+        self.tree_view = self._make_tree_view(self._proxies[1])
+        self.exe_view = self._make_tree_view(self._proxies[2])
+        self.views = QStackedWidget()
+        for view in (self.table, self.tree_view, self.exe_view):
+            self.views.addWidget(view)
+        splitter.addWidget(self.views)
 
         # Detail panel
         detail_widget = QWidget()
@@ -127,9 +204,18 @@ class ProcessWidget(QWidget):
         )
         self.detail_text.setPlaceholderText("Нажмите на процесс чтобы увидеть информацию о нём...")
         detail_layout.addWidget(self.detail_text)
+
+        # Last 5 minutes of the selected process: catches the spikes one refresh misses
+        spark_row = QHBoxLayout()
+        self.cpu_spark = Sparkline("CPU %", "#a060ff", lambda v: f"{v:.1f}")
+        self.ram_spark = Sparkline("RAM", "#3498db", lambda v: format_size(int(v)))
+        self.io_spark = Sparkline("Диск", "#f39c12", lambda v: f"{format_size(int(v))}/с")
+        for spark in (self.cpu_spark, self.ram_spark, self.io_spark):
+            spark_row.addWidget(spark)
+        detail_layout.addLayout(spark_row)
         splitter.addWidget(detail_widget)
 
-        splitter.setSizes([480, 200])
+        splitter.setSizes([440, 260])
         outer.addWidget(splitter, 1)
 
         # Count label
@@ -137,110 +223,107 @@ class ProcessWidget(QWidget):
         self.count_lbl.setStyleSheet("color: #303055; font-size: 8pt; padding: 2px 0;")
         outer.addWidget(self.count_lbl)
 
+    def _make_tree_view(self, proxy: ProcessFilterProxy) -> QTreeView:
+        view = QTreeView()
+        view.setModel(proxy)
+        view.setUniformRowHeights(True)
+        hdr = view.header()
+        hdr.setStretchLastSection(False)
+        hdr.setSectionResizeMode(0, hdr.ResizeMode.Stretch)
+        for col, width in enumerate((70, 70, 90, 70, 80), start=1):
+            hdr.setSectionResizeMode(col, hdr.ResizeMode.Fixed)
+            view.setColumnWidth(col, width)
+        view.setEditTriggers(QTreeView.EditTrigger.NoEditTriggers)
+        view.setSelectionBehavior(QTreeView.SelectionBehavior.SelectRows)
+        view.setSelectionMode(QTreeView.SelectionMode.SingleSelection)
+        view.setAlternatingRowColors(True)
+        view.setStyleSheet("QTreeView { alternate-background-color: #1e1e38; }")
+        view.selectionModel().selectionChanged.connect(self._on_selection)
+        view.setSortingEnabled(True)
+        view.sortByColumn(TCOL_CPU, Qt.SortOrder.DescendingOrder)
+        return view
+
     def on_shown(self):
+        self._monitor_wanted = True
+        # A monitor stopped on hide may still be finishing a poll of the shared
+        # registry, which is not thread-safe: its finished signal starts the next
         if self._monitor is None or not self._monitor.isRunning():
-            self._monitor = ProcessMonitor(interval_ms=2000)
-            self._monitor.data_ready.connect(self._on_data)
-            self._monitor.start()
-
-    def _on_data(self, procs: list):
-        self._procs = procs
-        # Remember selected PID so selection survives table refresh
-        selected_pid = self._selected_pid()
-        self._apply_filter()
-        if selected_pid is not None:
-            self._restore_selection(selected_pid)
-
-    def _selected_pid(self) -> int | None:
-        for item in self.table.selectedItems():
-            proc = self.table.item(item.row(), 0)
-            if proc:
-                data = proc.data(Qt.ItemDataRole.UserRole)
-                if data:
-                    return data.get("pid")
-        return None
-
-    def _restore_selection(self, pid: int):
-        for row in range(self.table.rowCount()):
-            item = self.table.item(row, 0)
-            if item:
-                data = item.data(Qt.ItemDataRole.UserRole)
-                if data and data.get("pid") == pid:
-                    self.table.selectRow(row)
-                    return
+            self._start_monitor()
+
+    def _start_monitor(self):
+        monitor = ProcessMonitor(interval_ms=REFRESH_MS, registry=self._registry)
+        monitor.data_ready.connect(self._on_data)
+        monitor.finished.connect(lambda: self._on_monitor_finished(monitor))
+        self._monitor = monitor
+        monitor.start()
+
+    def _on_monitor_finished(self, monitor: ProcessMonitor):
+        if monitor is self._monitor and self._monitor_wanted:
+            self._start_monitor()
+
+    def _on_data(self, delta):
+        self._model.apply(delta)
+        self._tree_model.apply(delta)
+        self._exe_model.apply(delta)
+        self._update_count()
+        self._update_sparklines()
+
+    def _on_view_mode(self, mode: int):
+        self.views.setCurrentIndex(mode)
+        self._update_count()
+        self._on_selection()
+
+    def _selected_key(self) -> tuple | None:
+        """(pid, create_time) of the process selected in the current view."""
+        rows = self.views.currentWidget().selectionModel().selectedRows()
+        return rows[0].data(KEY_ROLE) if rows else None
+
+    def _selected_proc(self) -> dict | None:
+        key = self._selected_key()
+        return None if key is None else self._model.proc_by_key(key)
+
+    def _update_sparklines(self):
+        key = self._selected_key()
+        series = None if key is None else self._registry.history.series(key)
+        if series is None:
+            series = {"cpu": [], "rss": [], "io": []}
+        self.cpu_spark.set_values(series["cpu"])
+        self.ram_spark.set_values(series["rss"])
+        self.io_spark.set_values([v * 1000 / REFRESH_MS for v in series["io"]])
 
     def _apply_filter(self):
-        search = self.search_box.text().lower()
-        filter_idx = self.filter_combo.currentIndex()
         # 0=All, 1=System(0), 2=Important(1), 3=Normal(2), 4=Unnecessary(3)
-        imp_filter = filter_idx - 1  # -1 means all
-
-        filtered = []
-        for p in self._procs:
-            _, imp = get_process_info(p["name"])
-            if imp_filter >= 0 and imp != imp_filter:
-                continue
-            if search and search not in p["name"].lower():
-                continue
-            filtered.append((p, imp))
-
-        self._fill_table(filtered)
-
-    def _fill_table(self, rows: list):
-        self.table.setSortingEnabled(False)
-        self.table.setRowCount(0)
-
-        for proc, imp in rows:
-            row = self.table.rowCount()
-            self.table.insertRow(row)
-
-            _, color = IMPORTANCE_LABELS.get(imp, ("Обычный", "#e0e0e0"))
-            imp_label, _ = IMPORTANCE_LABELS.get(imp, ("Обычный", "#e0e0e0"))
-
-            name_item = QTableWidgetItem(proc["name"])
-            pid_item = QTableWidgetItem(str(proc["pid"]))
-            pid_item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
-            cpu_item = QTableWidgetItem(f"{proc['cpu']:.1f}")
-            cpu_item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
-            ram_item = QTableWidgetItem(format_size(proc["ram"]))
-            ram_item.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
-            status_item = QTableWidgetItem(proc["status"])
-            status_item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
-            imp_item = QTableWidgetItem(imp_label)
-            imp_item.setTextAlignment(Qt.AlignmentFlag.AlignCenter)
-
-            q_color = QColor(color)
-            for item in [name_item, pid_item, cpu_item, ram_item, status_item, imp_item]:
-                item.setForeground(q_color)
-
-            # Store proc data in name item
-            name_item.setData(Qt.ItemDataRole.UserRole, proc)
-
-            self.table.setItem(row, 0, name_item)
-            self.table.setItem(row, 1, pid_item)
-            self.table.setItem(row, 2, cpu_item)
-            self.table.setItem(row, 3, ram_item)
-            self.table.setItem(row, 4, status_item)
-            self.table.setItem(row, 5, imp_item)
-
-        self.table.setSortingEnabled(True)
-        self.count_lbl.setText(f"Показано {len(rows)} из {len(self._procs)} процессов")
+        for proxy in self._proxies:
+            proxy.set_filter(self.search_box.text(), self.filter_combo.currentIndex() - 1)
+        self._update_count()
+
+    def _update_count(self):
+        proxy = self._proxies[self.views.currentIndex()]
+        if proxy is self._proxy:
+            shown = proxy.rowCount()
+        else:
+            # Tree rows at every depth; executable group rows are not processes
+            shown = 0
+            parents = [QModelIndex()]
+            while parents:
+                parent = parents.pop()
+                for row in range(proxy.rowCount(parent)):
+                    index = proxy.index(row, 0, parent)
+                    if index.data(KEY_ROLE) is not None:
+                        shown += 1
+                    parents.append(index)
+        self.count_lbl.setText(
+            f"Показано {shown} из {self._model.rowCount()} процессов"
+        )
 
     def _on_selection(self):
-        selected = self.table.selectedItems()
-        if not selected:
+        self._update_sparklines()
+        proc = self._selected_proc()
+        if proc is None:
             self.detail_text.clear()
             self.kill_btn.setEnabled(False)
             return
 
-        row = selected[0].row()
-        name_item = self.table.item(row, 0)
-        if not name_item:
-            return
-        proc = name_item.data(Qt.ItemDataRole.UserRole)
-        if not proc:
-            return
-
         desc, imp = get_process_info(proc["name"])
         imp_label, _ = IMPORTANCE_LABELS.get(imp, ("Обычный", "#e0e0e0"))
 
@@ -249,6 +332,7 @@ class ProcessWidget(QWidget):
             f"PID: {proc['pid']}\n"
             f"Пользователь: {proc.get('user', '—')}\n"
             f"Путь: {proc.get('exe', '—') or '—'}\n"
+            f"Командная строка: {proc.get('cmdline') or '—'}\n"
             f"Категория: {imp_label}\n\n"
             f"Описание: {desc}"
         )
@@ -259,15 +343,8 @@ class ProcessWidget(QWidget):
         self.kill_btn.setEnabled(can_kill)
 
     def _kill_selected(self):
-        selected = self.table.selectedItems()
-        if not selected:
-            return
-        row = selected[0].row()
-        name_item = self.table.item(row, 0)
-        if not name_item:
-            return
-        proc = name_item.data(Qt.ItemDataRole.UserRole)
-        if not proc:
+        proc = self._selected_proc()
+        if proc is None:
             return
 
         reply = QMessageBox.question(
@@ -291,7 +368,7 @@ class ProcessWidget(QWidget):
         self.status_message.emit("Список процессов обновлён")
 
     def hideEvent(self, event):
+        self._monitor_wanted = False
         if self._monitor and self._monitor.isRunning():
-            self._monitor.stop()
-            self._monitor = None
+            self._monitor.stop()    # kept until its thread is done, see on_shown()
         super().hideEvent(event)
@@ -10,6 +10,7 @@ from pathlib import Path
 from PyQt6.QtCore import QThread, pyqtSignal
 
 from app.utils.file_description import get_file_info
+from app.utils.fs_walker import Visitor, ancestors, norm_path, walk
 from app.utils.junk_detector import format_size
 
 
@@ -163,36 +164,63 @@ def _folder_matches(folder: str, kws: list[str]) -> bool:
     return any(kw in fl for kw in kws)
 
 
-def _scan_dir(root: str, results: list[FileEntry], running_ref: list[bool], max_depth=12, _d=0):
-    if not running_ref[0] or _d > max_depth:
-        return
-    try:
-        with os.scandir(root) as it:
-            for entry in it:
-                if not running_ref[0]:
-                    return
-                try:
-                    if entry.is_file(follow_symlinks=False):
-                        try:
-                            sz = entry.stat().st_size
-                        except OSError:
-                            sz = 0
-                        desc, emoji, cat = get_file_info(entry.path)
-                        results.append(FileEntry(
-                            path=entry.path,
-                            name=entry.name,
-                            size=sz,
-                            description=desc,
-                            emoji=emoji,
-                            category=cat,
-                        ))
-                    elif entry.is_dir(follow_symlinks=False):
-                        if entry.name not in _SKIP_DIRS:
-                            _scan_dir(entry.path, results, running_ref, max_depth, _d + 1)
-                except (PermissionError, OSError):
-                    pass
-    except (PermissionError, OSError):
-        pass
+class AppFolderVisitor(Visitor):
+    """
+    Collects files of one app during a single walk over the install
+    directory, the search bases and the shortcut folders.
+
+    States: ("collect", depth) inside an app folder, ("base",) in a search
+    base, ("shortcut",) in a shortcut folder, ("pass",) on the way to one.
+    """
+
+    def __init__(self, install_location: str, kws: list[str],
+                 on_folder=None, max_depth: int = 12):
+        self.kws = kws
+        self.max_depth = max_depth
+        self.results: list[FileEntry] = []
+        self._on_folder = on_folder
+        self._roots = [p for p in [install_location, *_SEARCH_BASES, *_SHORTCUT_BASES] if p]
+        self._install = norm_path(install_location) if install_location else ""
+        self._bases = {norm_path(b) for b in _SEARCH_BASES if b}
+        self._shortcuts = {norm_path(b) for b in _SHORTCUT_BASES if b}
+        self._ancestors = ancestors(norm_path(p) for p in self._roots)
+
+    def roots(self) -> list[str]:
+        return self._roots
+
+    def enter_dir(self, path, name, depth, parent):
+        kind = parent[0] if parent else None
+        if kind == "collect":
+            d = parent[1] + 1
+            if d > self.max_depth or name in _SKIP_DIRS:
+                return None
+            return ("collect", d)
+
+        norm = os.path.normcase(path)
+        if norm == self._install or (kind in ("base", "shortcut") and _folder_matches(name, self.kws)):
+            if self._on_folder:
+                self._on_folder(path)
+            return ("collect", 0)
+        if norm in self._bases:
+            return ("base",)
+        if norm in self._shortcuts:
+            return ("shortcut",)
+        if norm in self._ancestors:
+            return ("pass",)
+        return None
+
+    def visit_file(self, path, name, st, state):
+        kind = state[0]
+        if kind == "collect" or (kind == "shortcut" and _folder_matches(name, self.kws)):
+            desc, emoji, cat = get_file_info(path)
+            self.results.append(FileEntry(
+                path=path,
+                name=name,
+                size=st.st_size,
+                description=desc,
+                emoji=emoji,
+                category=cat,
+            ))
 
 
 class AppFileScanner(QThread):
@@ -209,72 +237,21 @@ class AppFileScanner(QThread):
         self._running[0] = False
 
     def run(self):
-        results: list[FileEntry] = []
-        scanned_dirs: set[str] = set()
         app = self._app
         kws = _keywords(app.name)
         if app.publisher:
             kws += _keywords(app.publisher)
         kws = list(dict.fromkeys(kws))  # deduplicate, keep order
 
-        # 1 — Install directory
-        if app.install_location and os.path.isdir(app.install_location):
-            norm = os.path.normcase(app.install_location)
-            if norm not in scanned_dirs:
-                scanned_dirs.add(norm)
-                self.progress.emit(f"Сканирую: {app.install_location}")
-                _scan_dir(app.install_location, results, self._running)
-
-        # 2 — AppData / Program Files folders matching keywords
-        for base in _SEARCH_BASES:
-            if not base or not os.path.isdir(base):
-                continue
-            try:
-                with os.scandir(base) as it:
-                    for entry in it:
-                        if not self._running[0]:
-                            return
-                        if not entry.is_dir(follow_symlinks=False):
-                            continue
-                        norm = os.path.normcase(entry.path)
-                        if norm in scanned_dirs:
-                            continue
-                        if _folder_matches(entry.name, kws):
-                            scanned_dirs.add(norm)
-                            self.progress.emit(f"Сканирую: {entry.path}")
-                            _scan_dir(entry.path, results, self._running)
-            except (PermissionError, OSError):
-                pass
-
-        # 3 — Shortcuts
-        for base in _SHORTCUT_BASES:
-            if not base or not os.path.isdir(base):
-                continue
-            try:
-                with os.scandir(base) as it:
-                    for entry in it:
-                        if not self._running[0]:
-                            return
-                        try:
-                            name_lower = entry.name.lower()
-                            if any(kw in name_lower for kw in kws):
-                                if entry.is_file(follow_symlinks=False):
-                                    sz = entry.stat().st_size
-                                    desc, emoji, cat = get_file_info(entry.path)
-                                    results.append(FileEntry(
-                                        path=entry.path, name=entry.name,
-                                        size=sz, description=desc,
-                                        emoji=emoji, category=cat,
-                                    ))
-                                elif entry.is_dir(follow_symlinks=False):
-                                    norm = os.path.normcase(entry.path)
-                                    if norm not in scanned_dirs:
-                                        scanned_dirs.add(norm)
-                                        _scan_dir(entry.path, results, self._running)
-                        except (PermissionError, OSError):
-                            pass
-            except (PermissionError, OSError):
-                pass
+        install = app.install_location if os.path.isdir(app.install_location or "") else ""
+        visitor = AppFolderVisitor(
+            install, kws, on_folder=lambda p: self.progress.emit(f"Сканирую: {p}"),
+        )
+        # Install dir, AppData / Program Files matches and shortcuts in one walk
+        walk(visitor.roots(), [visitor], lambda: self._running[0])
+        if not self._running[0]:
+            return
+        results = visitor.results
 
         # Deduplicate by path
         seen_paths: set[str] = set()
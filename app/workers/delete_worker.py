@@ -0,0 +1,82 @@
+import threading
+import time
+
+from PyQt6.QtCore import QThread, pyqtSignal
+
+from app.utils.delete_planner import DeletePlan, plan_deletion
+from app.utils.file_utils import BATCH_SIZE, delete_paths
+from app.utils.scan_index import open_index
+
+PROGRESS_INTERVAL = 0.1   # s between progress signals while one big tree is removed
+
+
+def make_plan(paths: list[str], coalesce: bool = True) -> DeletePlan:
+    """
+    Plan the deletion of `paths`, each once, against the scan index if it can
+    be opened; without `coalesce` every path stays an operation of its own.
+    """
+    paths = list(dict.fromkeys(paths))
+    index = open_index() if coalesce else None
+    if index is None:
+        return DeletePlan.identity(paths)
+    with index:
+        return plan_deletion(paths, index)
+
+
+class DeleteWorker(QThread):
+    """
+    Deletes paths off the UI thread in batches; stop() cancels between batches.
+    Fully selected folders are deleted as one operation each (see `plan`), so
+    results and progress count operations, not selected paths. With
+    `coalesce` False the paths are deleted exactly as given.
+    """
+    progress = pyqtSignal(int, int, int)   # (operations done, operations total, bytes freed)
+    batch_done = pyqtSignal(list)          # DeleteResult of one finished batch
+    deletion_done = pyqtSignal(list)       # every DeleteResult, once the worker ends
+
+    def __init__(self, paths: list[str], trash: bool,
+                 batch_size: int = BATCH_SIZE, workers: int | None = None,
+                 coalesce: bool = True):
+        super().__init__()
+        self._paths = paths
+        self._coalesce = coalesce
+        self.plan = DeletePlan.identity(paths)
+        self._trash = trash
+        self._batch_size = batch_size
+        self._workers = workers
+        self._running = False
+        self._lock = threading.Lock()
+        self._done = 0
+        self._freed = 0
+        self._last_emit = 0.0
+
+    def stop(self):
+        self._running = False
+
+    def run(self):
+        self._running = True
+        self._done = self._freed = 0
+        self.plan = make_plan(self._paths, self._coalesce)
+        results = delete_paths(self.plan.ops, self._trash, self._batch_size, self._workers,
+                               on_batch=self._on_batch, on_freed=self._on_freed,
+                               is_running=lambda: self._running,
+                               keep_dirs=self.plan.keep_dirs)
+        self.deletion_done.emit(results)
+
+    def _on_freed(self, n: int):
+        # Called from the deletion threads, often per file; emit at most every PROGRESS_INTERVAL
+        with self._lock:
+            self._freed += n
+            now = time.monotonic()
+            if now - self._last_emit < PROGRESS_INTERVAL:
+                return
+            self._last_emit = now
+            done, freed = self._done, self._freed
+        self.progress.emit(done, len(self.plan.ops), freed)
+
+    def _on_batch(self, results: list):
+        with self._lock:
+            self._done += len(results)
+            done, freed = self._done, self._freed
+        self.batch_done.emit(results)
+        self.progress.emit(done, len(self.plan.ops), freed)
@@ -0,0 +1,126 @@
+import psutil
+from PyQt6.QtCore import QThread, pyqtSignal
+
+from app.utils.chunk_dedup import DEFAULT_CHUNK_WORKERS, estimate_dedup
+from app.utils.duplicates import (
+    DEFAULT_HASH_WORKERS, DuplicateCandidateVisitor, find_duplicates,
+)
+from app.utils.fs_walker import walk
+from app.utils.hash_cache import open_hash_cache
+from app.utils.hashing import DEFAULT_ALGORITHM, check_algorithm
+from app.utils.mounts import EXCLUDED_FSTYPES, MountFilter
+from app.utils.size_accounting import SizeCounter
+from app.workers.file_scanner import SKIP_DIRS
+
+
+DUPLICATE_MIN_BYTES = 1024 * 1024  # 1 MB
+
+
+class DuplicateScanner(QThread):
+    """Finds duplicate files on the drives (or `roots`); emits each group once confirmed."""
+    progress = pyqtSignal(int, str)       # (percent, status_text)
+    group_found = pyqtSignal(list)        # identical files, sorted by path
+    scan_complete = pyqtSignal(dict)      # summary dict
+
+    def __init__(self, roots: list[str] | None = None,
+                 min_bytes: int = DUPLICATE_MIN_BYTES,
+                 algorithm: str = DEFAULT_ALGORITHM,
+                 hash_workers: int = DEFAULT_HASH_WORKERS,
+                 use_cache: bool = True,
+                 verify: bool = False):
+        super().__init__()
+        self._running = False
+        self._roots = roots or self._get_drives()
+        self._min_bytes = min_bytes
+        self._algorithm = check_algorithm(algorithm)
+        self._hash_workers = hash_workers
+        self._use_cache = use_cache
+        self._verify = verify
+        self._groups = 0
+        self._wasted = 0
+
+    def _get_drives(self) -> list[str]:
+        drives = []
+        for part in psutil.disk_partitions(all=False):
+            if "cdrom" not in part.opts and part.fstype and part.fstype not in EXCLUDED_FSTYPES:
+                drives.append(part.mountpoint)
+        return drives
+
+    def stop(self):
+        self._running = False
+
+    def run(self):
+        self._running = True
+        self._groups = self._wasted = 0
+        self.progress.emit(0, "Поиск файлов...")
+        visitor = DuplicateCandidateVisitor(self._min_bytes, skip_dirs=SKIP_DIRS,
+                                            skip_prefixes=("$",))
+        walk(self._roots, [visitor], lambda: self._running,
+             mounts=MountFilter(self._roots))
+        if self._running:
+            self.progress.emit(10, f"Сравниваю {len(visitor.files)} файлов...")
+            # Files unchanged since the last search are not read again
+            cache = open_hash_cache() if self._use_cache else None
+            try:
+                find_duplicates(visitor.files, self._algorithm, self._hash_workers,
+                                on_group=self._on_group, on_progress=self._on_progress,
+                                is_running=lambda: self._running, cache=cache,
+                                verify=self._verify)
+            finally:
+                if cache:
+                    cache.close()
+
+        self.progress.emit(100, "Поиск дубликатов завершён")
+        self.scan_complete.emit({
+            "groups": self._groups,
+            "wasted": self._wasted,
+            "files": len(visitor.files),
+        })
+
+    def _on_group(self, group: list):
+        self._groups += 1
+        self._wasted += group[0]["size"] * (len(group) - 1)
+        self.group_found.emit(group)
+
+    def _on_progress(self, stage: str, done: int, total: int):
+        if done % 100 and done != total:
+            return
+        if stage == "fingerprint":
+            pct, text = 10 + int(done / max(total, 1) * 30), "Сравниваю начало и конец файлов"
+        else:
+            text = "Сравниваю содержимое" if self._verify else "Считаю хеши"
+            pct = 40 + int(done / max(total, 1) * 60)
+        self.progress.emit(min(pct, 99), f"{text}: {done} из {total}")
+
+
+class DedupEstimator(QThread):
+    """Estimates what block-level dedup would save over the files under `roots`."""
+    progress = pyqtSignal(int, str)
+    report_ready = pyqtSignal(object)    # DedupReport
+
+    def __init__(self, roots: list[str], workers: int = DEFAULT_CHUNK_WORKERS):
+        super().__init__()
+        self._roots = roots
+        self._workers = workers
+        self._running = False
+
+    def stop(self):
+        self._running = False
+
+    def run(self):
+        self._running = True
+        self.progress.emit(0, "Поиск файлов...")
+        visitor = DuplicateCandidateVisitor()
+        walk(self._roots, [visitor], lambda: self._running, mounts=MountFilter(self._roots))
+        # Hard links share their blocks already; chunk each inode once
+        links = SizeCounter()
+        files = [f for f in visitor.files
+                 if f["nlink"] <= 1 or links.first((f["dev"], f["ino"]))]
+        report = estimate_dedup(files, self._workers, on_progress=self._on_progress,
+                                is_running=lambda: self._running)
+        self.progress.emit(100, "Анализ завершён")
+        self.report_ready.emit(report)
+
+    def _on_progress(self, done: int, total: int):
+        pct = int(done / max(total, 1) * 100)
+        self.progress.emit(min(pct, 99), f"Разбиваю на блоки: {pct}%")
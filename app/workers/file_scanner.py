@@ -1,14 +1,19 @@
 import os
-import string
 import psutil
-from concurrent.futures import ThreadPoolExecutor, as_completed
 from PyQt6.QtCore import QThread, pyqtSignal
 
-from app.utils.junk_detector import (
-    scan_junk_category, find_large_files, JUNK_CATEGORIES, format_size
+from app.utils.fs_walker import (
+    Visitor, LargeFileVisitor, merge_roots, walk,
 )
+from app.utils.folder_tree import FolderTreeVisitor, save_cached_tree
+from app.utils.junk_detector import JunkVisitor, JUNK_CATEGORIES
+from app.utils.mounts import EXCLUDED_FSTYPES, MountFilter
+from app.utils.scan_index import open_index
 
 
+LARGE_FILE_MIN_BYTES = 200 * 1024 * 1024  # 200 MB
+LARGE_FILE_LIMIT = 500
+
 SKIP_DIRS = frozenset({
     "Windows", "System Volume Information", "$Recycle.Bin",
     "Recovery", "ProgramData", "AppData", "Boot",
@@ -20,18 +25,29 @@ class FileScanner(QThread):
     """Scans all drives for junk files. Emits progress and results."""
     progress = pyqtSignal(int, str)          # (percent, status_text)
     category_done = pyqtSignal(str, list)    # (category_key, file_list)
-    large_files_done = pyqtSignal(list)      # list of large file dicts
+    large_files_batch = pyqtSignal(list)     # large files found so far (incremental)
+    large_files_done = pyqtSignal(list)      # final top-K, largest first
     scan_complete = pyqtSignal(dict)         # summary dict
 
-    def __init__(self):
+    def __init__(self, full_rescan: bool = False,
+                 large_min_bytes: int = LARGE_FILE_MIN_BYTES,
+                 large_limit: int = LARGE_FILE_LIMIT,
+                 one_device: bool = True,
+                 exclude_fstypes: frozenset = EXCLUDED_FSTYPES):
         super().__init__()
         self._running = False
+        self._full_rescan = full_rescan
+        self._large_min_bytes = large_min_bytes
+        self._large_limit = large_limit
+        self._one_device = one_device
+        self._exclude_fstypes = exclude_fstypes
         self._drives = self._get_drives()
 
     def _get_drives(self) -> list[str]:
         drives = []
         for part in psutil.disk_partitions(all=False):
-            if "cdrom" not in part.opts and part.fstype:
+            if ("cdrom" not in part.opts and part.fstype
+                    and part.fstype not in self._exclude_fstypes):
                 drives.append(part.mountpoint)
         return drives
 
@@ -40,39 +56,48 @@ class FileScanner(QThread):
 
     def run(self):
         self._running = True
-        total_junk_size = 0
-        total_junk_count = 0
         categories = list(JUNK_CATEGORIES.keys())
         n_cats = len(categories)
 
-        # Step 1: Scan junk categories (fast, known paths)
-        for i, cat_key in enumerate(categories):
+        def on_category(cat_key: str, files: list):
+            # JunkVisitor.finish() flushes every category; after stop() none are reported
             if not self._running:
-                break
-            pct = int((i / (n_cats + 1)) * 70)
-            label = JUNK_CATEGORIES[cat_key]["label"]
-            self.progress.emit(pct, f"Сканирую: {label}...")
-
-            files = list(scan_junk_category(cat_key))
-            cat_size = sum(f["size"] for f in files)
-            total_junk_size += cat_size
-            total_junk_count += len(files)
+                return
+            # Categories are reported in order, so the next one is the one scanning now
             self.category_done.emit(cat_key, files)
-
-        # Step 2: Scan for large files (across all drives, in parallel)
-        if self._running:
-            self.progress.emit(72, "Поиск больших файлов...")
-            all_large = []
-            with ThreadPoolExecutor(max_workers=len(self._drives) or 1) as exe:
-                futures = {exe.submit(self._scan_large_drive, d): d for d in self._drives}
-                for fut in as_completed(futures):
-                    if not self._running:
-                        break
-                    result = fut.result()
-                    all_large.extend(result)
-            all_large.sort(key=lambda x: x["size"], reverse=True)
-            self.large_files_done.emit(all_large[:500])  # top 500
-
+            i = categories.index(cat_key) + 1
+            if i < n_cats:
+                label = JUNK_CATEGORIES[categories[i]]["label"]
+                self.progress.emit(int(i / (n_cats + 1) * 70), f"Сканирую: {label}...")
+
+        junk = JunkVisitor(categories, on_category_done=on_category)
+        large = LargeFileVisitor(self._large_min_bytes, skip_dirs=SKIP_DIRS,
+                                 skip_prefixes=("$",), max_depth=15,
+                                 limit=self._large_limit,
+                                 on_batch=self.large_files_batch.emit)
+        mounts = MountFilter(self._drives + junk.roots(), one_device=self._one_device,
+                             exclude_fstypes=self._exclude_fstypes)
+
+        # Step 1: junk categories (known paths), reported as each one completes.
+        # Step 2: large files across the drives; directories the first walk
+        # just listed are replayed from the index instead of listed again.
+        index = open_index(full_rescan=self._full_rescan)
+        try:
+            self.progress.emit(0, f"Сканирую: {JUNK_CATEGORIES[categories[0]]['label']}...")
+            walk(junk.roots(), [junk], lambda: self._running, index=index, mounts=mounts)
+            if self._running:
+                self.progress.emit(72, "Поиск больших файлов...")
+                drives = merge_roots(self._drives)
+                progress = _TopLevelProgress(drives, self._on_top_level, 72, 95)
+                walk(drives, [progress, large], lambda: self._running,
+                     index=index, mounts=mounts)
+                self.large_files_done.emit(large.files)
+        finally:
+            if index:
+                index.close()
+
+        total_junk_size = sum(f["size"] for k in categories for f in junk.files.get(k, []))
+        total_junk_count = sum(len(junk.files.get(k, [])) for k in categories)
         self.progress.emit(100, "Сканирование завершено")
         self.scan_complete.emit({
             "junk_size": total_junk_size,
@@ -80,50 +105,58 @@ class FileScanner(QThread):
             "drives": self._drives,
         })
 
-    def _scan_large_drive(self, drive: str) -> list:
-        min_bytes = 200 * 1024 * 1024  # 200 MB
-        results = []
-        self._scan_dir_large(drive, min_bytes, results)
-        return results
+    def _on_top_level(self, pct: int, path: str):
+        self.progress.emit(pct, f"Просканировано: {path}")
 
-    def _scan_dir_large(self, path: str, min_bytes: int, results: list, depth: int = 0):
-        if not self._running or depth > 15:
-            return
-        try:
-            with os.scandir(path) as it:
-                for entry in it:
-                    if not self._running:
-                        return
-                    try:
-                        if entry.is_file(follow_symlinks=False):
-                            try:
-                                size = entry.stat().st_size
-                                if size >= min_bytes:
-                                    results.append({
-                                        "path": entry.path,
-                                        "name": entry.name,
-                                        "size": size,
-                                    })
-                            except (PermissionError, OSError):
-                                pass
-                        elif entry.is_dir(follow_symlinks=False):
-                            if entry.name not in SKIP_DIRS and not entry.name.startswith("$"):
-                                self._scan_dir_large(entry.path, min_bytes, results, depth + 1)
-                    except (PermissionError, OSError):
-                        pass
-        except (PermissionError, OSError):
-            pass
+
+class _TopLevelProgress(Visitor):
+    """
+    Reports progress from `start` to `end` percent as the walk finishes
+    each top-level folder of the roots.
+    """
+
+    def __init__(self, roots: list[str], on_progress, start: int = 0, end: int = 95):
+        self._on_progress = on_progress
+        self._start = start
+        self._end = end
+        self._total = 0
+        self._seen = 0
+        for root in roots:
+            try:
+                with os.scandir(root) as it:
+                    self._total += sum(1 for e in it if e.is_dir(follow_symlinks=False))
+            except (PermissionError, OSError):
+                pass
+
+    def enter_dir(self, path, name, depth, parent):
+        return True if depth <= 1 else None
+
+    def visit_files(self, path, files, state):
+        pass
+
+    def can_use_summary(self, state, large_min):
+        return True
+
+    def leave_dir(self, path, depth, state):
+        if depth == 1:
+            self._seen += 1
+            pct = self._start + int(self._seen / max(self._total, 1) * (self._end - self._start))
+            self._on_progress(min(pct, self._end), path)
 
 
 class DiskScanner(QThread):
-    """Scans folder sizes on disks."""
+    """Builds the folder-size tree of a disk and saves it for the next session."""
     progress = pyqtSignal(int, str)
-    results_ready = pyqtSignal(list)   # list of (path, size_bytes)
+    tree_ready = pyqtSignal(object)    # FolderTree
 
-    def __init__(self, root: str):
+    def __init__(self, root: str, full_rescan: bool = False, one_device: bool = True,
+                 exclude_fstypes: frozenset = EXCLUDED_FSTYPES):
         super().__init__()
         self._root = root
         self._running = False
+        self._full_rescan = full_rescan
+        self._one_device = one_device
+        self._exclude_fstypes = exclude_fstypes
 
     def stop(self):
         self._running = False
@@ -131,38 +164,30 @@ class DiskScanner(QThread):
     def run(self):
         self._running = True
         self.progress.emit(0, f"Сканирую {self._root}...")
-        results = []
         try:
             with os.scandir(self._root) as it:
-                entries = list(it)
-            total = len(entries)
-            for i, entry in enumerate(entries):
-                if not self._running:
-                    break
-                if entry.is_dir(follow_symlinks=False) and entry.name not in SKIP_DIRS:
-                    size = self._dir_size(entry.path)
-                    results.append((entry.path, size))
-                    pct = int((i + 1) / total * 100)
-                    self.progress.emit(pct, f"Считаю размер: {entry.name}")
+                self._total = sum(1 for e in it
+                                  if e.is_dir(follow_symlinks=False) and e.name not in SKIP_DIRS)
         except (PermissionError, OSError):
-            pass
-        results.sort(key=lambda x: x[1], reverse=True)
-        self.results_ready.emit(results)
-
-    def _dir_size(self, path: str) -> int:
-        total = 0
+            self._total = 0
+        self._done = 0
+
+        visitor = FolderTreeVisitor(self._root, skip_dirs=SKIP_DIRS,
+                                    on_folder_done=self._on_folder_done)
+        mounts = MountFilter([self._root], one_device=self._one_device,
+                             exclude_fstypes=self._exclude_fstypes)
+        index = open_index(full_rescan=self._full_rescan)
         try:
-            with os.scandir(path) as it:
-                for entry in it:
-                    if not self._running:
-                        return total
-                    try:
-                        if entry.is_file(follow_symlinks=False):
-                            total += entry.stat().st_size
-                        elif entry.is_dir(follow_symlinks=False):
-                            total += self._dir_size(entry.path)
-                    except (PermissionError, OSError):
-                        pass
-        except (PermissionError, OSError):
-            pass
-        return total
+            walk([self._root], [visitor], lambda: self._running,
+                 index=index, mounts=mounts)
+        finally:
+            if index:
+                index.close()
+        if self._running:
+            save_cached_tree(visitor.tree)
+        self.tree_ready.emit(visitor.tree)
+
+    def _on_folder_done(self, path: str, size: int):
+        self._done += 1
+        pct = int(self._done / max(self._total, 1) * 100)
+        self.progress.emit(min(pct, 100), f"Считаю размер: {os.path.basename(path)}")
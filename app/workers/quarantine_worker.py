@@ -0,0 +1,91 @@
+import ctypes
+
+from PyQt6.QtCore import QThread, pyqtSignal
+
+from app.utils.delete_planner import DeletePlan
+from app.utils.quarantine import open_quarantine
+from app.workers.delete_worker import make_plan
+
+
+class QuarantineWorker(QThread):
+    """Moves paths into quarantine; emits like DeleteWorker so views can share handlers."""
+    progress = pyqtSignal(int, int, int)   # (operations done, operations total, bytes to be freed)
+    deletion_done = pyqtSignal(list)       # every DeleteResult
+
+    def __init__(self, paths: list[str]):
+        super().__init__()
+        self._paths = paths
+        self.plan = DeletePlan.identity(paths)
+        self._running = False
+        self._done = 0
+        self._freed = 0
+
+    def stop(self):
+        self._running = False
+
+    def run(self):
+        self._running = True
+        self._done = self._freed = 0
+        quarantine = open_quarantine()
+        if quarantine is None:
+            self.deletion_done.emit([])
+            return
+        self.plan = make_plan(self._paths)
+        with quarantine:
+            results = quarantine.move(self.plan.ops, on_batch=self._on_batch,
+                                      is_running=lambda: self._running,
+                                      keep_dirs=self.plan.keep_dirs)
+        self.deletion_done.emit(results)
+
+    def _on_batch(self, results: list):
+        self._done += len(results)
+        self._freed += sum(r.freed for r in results)
+        self.progress.emit(self._done, len(self.plan.ops), self._freed)
+
+
+class RestoreWorker(QThread):
+    """Undoes the last quarantine move for whatever has not been purged yet."""
+    restore_done = pyqtSignal(list, list)   # (restored paths, failure messages)
+
+    def run(self):
+        quarantine = open_quarantine()
+        if quarantine is None:
+            self.restore_done.emit([], ["Журнал карантина недоступен"])
+            return
+        with quarantine:
+            restored, failed = quarantine.restore()
+        self.restore_done.emit(restored, failed)
+
+
+class PurgeWorker(QThread):
+    """Empties quarantine entries past their grace period at idle priority."""
+    purge_done = pyqtSignal(int, int)       # (entries removed, bytes freed)
+
+    def __init__(self, older_than: float | None = None):
+        super().__init__()
+        self._older_than = older_than
+        self._running = False
+
+    def stop(self):
+        self._running = False
+
+    def start(self, priority=QThread.Priority.IdlePriority):
+        super().start(priority)
+
+    def run(self):
+        self._running = True
+        # Background mode also lowers this thread's disk I/O priority on Windows
+        try:
+            THREAD_MODE_BACKGROUND_BEGIN = 0x00010000
+            kernel32 = ctypes.windll.kernel32
+            kernel32.SetThreadPriority(kernel32.GetCurrentThread(), THREAD_MODE_BACKGROUND_BEGIN)
+        except Exception:
+            pass
+        quarantine = open_quarantine()
+        if quarantine is None:
+            self.purge_done.emit(0, 0)
+            return
+        with quarantine:
+            removed, freed = quarantine.purge(self._older_than,
+                                              is_running=lambda: self._running)
+        self.purge_done.emit(removed, freed)
@@ -1,6 +1,7 @@
 import sys
 import os
 import ctypes
+import multiprocessing
 from PyQt6.QtWidgets import QApplication
 from PyQt6.QtCore import Qt
 from PyQt6.QtGui import QFont, QIcon
@@ -43,4 +44,5 @@ def main():
 
 
 if __name__ == "__main__":
+    multiprocessing.freeze_support()  # process-pool scans in the frozen EXE
     main()
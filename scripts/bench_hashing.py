@@ -0,0 +1,90 @@
+"""Benchmark: legacy 64 KB f.read() hashing vs. app.utils.hashing (readinto / mmap).
+Usage: python scripts/bench_hashing.py [--sizes 1M,100M,4G] [--algorithm blake2b] [--root DIR]
+
+Writes one synthetic file per size under --root once and reuses it on later
+runs. Each reader hashes every file --repeat times; the best run counts, so
+the numbers reflect a warm page cache (drop it between runs for cold ones).
+"""
+import argparse
+import hashlib
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.utils.hashing import hash_file  # noqa: E402
+
+UNITS = {"K": 1024, "M": 1024 ** 2, "G": 1024 ** 3}
+CHUNK = 64 * 1024
+
+
+def parse_size(text: str) -> int:
+    text = text.strip().upper()
+    if text[-1] in UNITS:
+        return int(float(text[:-1]) * UNITS[text[-1]])
+    return int(text)
+
+
+def build_file(root: str, size: int) -> str:
+    path = os.path.join(root, f"bench_{size}.bin")
+    if os.path.exists(path) and os.path.getsize(path) == size:
+        return path
+    block = os.urandom(8 * 1024 * 1024)
+    with open(path, "wb") as f:
+        left = size
+        while left:
+            n = min(left, len(block))
+            f.write(block[:n])
+            left -= n
+    return path
+
+
+def legacy_hash(path: str, algorithm: str) -> bytes:
+    """The pre-backend reader (junk_detector._md5): a new bytes object per chunk."""
+    h = hashlib.new(algorithm)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK), b""):
+            h.update(chunk)
+    return h.digest()
+
+
+def best_of(repeat: int, fn) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--sizes", default="1M,100M,4G")
+    ap.add_argument("--algorithm", default="blake2b")
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--root", default=os.path.join(tempfile.gettempdir(), "sa_bench_hash"))
+    args = ap.parse_args()
+
+    os.makedirs(args.root, exist_ok=True)
+    readers = [
+        ("legacy f.read 64K", lambda p: legacy_hash(p, args.algorithm)),
+        ("readinto 1M", lambda p: hash_file(p, args.algorithm, mmap_min=None)),
+        ("mmap", lambda p: hash_file(p, args.algorithm, mmap_min=0)),
+    ]
+    print(f"{'size':>8}  " + "  ".join(f"{name:>18}" for name, _ in readers))
+    for text in args.sizes.split(","):
+        size = parse_size(text)
+        path = build_file(args.root, size)
+        digests = {fn(path) for _, fn in readers}
+        assert len(digests) == 1, "readers disagree"
+        cols = []
+        for _, fn in readers:
+            dt = best_of(args.repeat, lambda: fn(path))
+            cols.append(f"{size / dt / 1024 ** 2:12.0f} MB/s")
+        print(f"{text:>8}  " + "  ".join(f"{c:>18}" for c in cols))
+
+
+if __name__ == "__main__":
+    main()
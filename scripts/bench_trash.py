@@ -0,0 +1,87 @@
+"""Benchmark: one send2trash() call per file vs. app.utils.trash batches.
+Usage: python scripts/bench_trash.py [--files 10000] [--batch 200] [--repeat 3] [--root DIR]
+
+Creates --files small files under --root for each run and sends them to the
+recycle bin; the backends take turns and the best of --repeat runs counts.
+On freedesktop systems the entries this benchmark put into the trash are
+removed again afterwards; elsewhere empty the recycle bin yourself.
+"""
+import argparse
+import glob
+import os
+import shutil
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.utils import trash  # noqa: E402
+
+PREFIX = "sa_bench_trash"
+
+
+def build_files(root: str, run: str, count: int) -> list[str]:
+    folder = os.path.join(root, f"{PREFIX}_{run}")
+    os.makedirs(folder, exist_ok=True)
+    paths = []
+    for i in range(count):
+        path = os.path.join(folder, f"{PREFIX}_{run}_{i}.tmp")
+        with open(path, "wb") as f:
+            f.write(b"x" * 512)
+        paths.append(path)
+    return paths
+
+
+def per_item(paths: list[str]):
+    for path in paths:
+        trash.send2trash.send2trash(path)
+
+
+def batched(paths: list[str], batch: int):
+    for i in range(0, len(paths), batch):
+        failed = trash.trash_paths(paths[i:i + batch])
+        assert not failed, next(iter(failed.items()))
+
+
+def cleanup_trash(run: str):
+    if not trash.USE_FREEDESKTOP:
+        return
+    for trash_dir in {trash._freedesktop.home, *(d for d, _ in trash._freedesktop._dirs.values())}:
+        for path in glob.glob(os.path.join(trash_dir, "files", f"{PREFIX}_{run}_*")):
+            os.remove(path)
+        for path in glob.glob(os.path.join(trash_dir, "info", f"{PREFIX}_{run}_*.trashinfo")):
+            os.remove(path)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--files", type=int, default=10_000)
+    ap.add_argument("--batch", type=int, default=200)
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--root", default=os.path.expanduser("~"))
+    args = ap.parse_args()
+
+    runs = [("batched", lambda p: batched(p, args.batch))]
+    if trash.HAS_SEND2TRASH:
+        runs.insert(0, ("send2trash per file", per_item))
+    else:
+        print("send2trash is not installed: only the batched backend is measured")
+
+    best = {label: float("inf") for label, _ in runs}
+    for _ in range(args.repeat):
+        for label, fn in runs:
+            run = label.split()[0]
+            paths = build_files(args.root, run, args.files)
+            t0 = time.perf_counter()
+            try:
+                fn(paths)
+                best[label] = min(best[label], time.perf_counter() - t0)
+            finally:
+                cleanup_trash(run)
+                shutil.rmtree(os.path.join(args.root, f"{PREFIX}_{run}"), ignore_errors=True)
+    for label, dt in best.items():
+        print(f"{label:>20}: {dt:8.2f} s  {args.files / dt:10.0f} files/s")
+
+
+if __name__ == "__main__":
+    main()
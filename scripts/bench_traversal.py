@@ -0,0 +1,140 @@
+"""Benchmark: per-file overhead of the old `yield from` recursion vs. the
+explicit-stack walker, by tree depth.
+Usage: python scripts/bench_traversal.py [--files 20000] [--depths 5 20 50] [--root DIR]
+
+Each tree is a single chain of `depth` directories with the files spread
+evenly over its levels, so only the nesting differs between runs.
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Generator
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.utils.junk_detector import JUNK_CATEGORIES, iter_junk_batches  # noqa: E402
+
+BENCH_KEY = "_bench"
+
+
+def legacy_scan_dir(path: str, extensions: set, recursive: bool, name_patterns: list) -> Generator[dict, None, None]:
+    """junk_detector._scan_dir as it was before the walker."""
+    try:
+        with os.scandir(path) as it:
+            for entry in it:
+                try:
+                    if entry.is_file(follow_symlinks=False):
+                        ext = Path(entry.name).suffix.lower()
+                        if not extensions or ext in extensions:
+                            if not name_patterns or any(entry.name.startswith(p) for p in name_patterns):
+                                try:
+                                    size = entry.stat().st_size
+                                    yield {
+                                        "path": entry.path,
+                                        "name": entry.name,
+                                        "size": size,
+                                    }
+                                except (PermissionError, OSError):
+                                    pass
+                        elif not extensions:
+                            try:
+                                size = entry.stat().st_size
+                                yield {
+                                    "path": entry.path,
+                                    "name": entry.name,
+                                    "size": size,
+                                }
+                            except (PermissionError, OSError):
+                                pass
+                    elif entry.is_dir(follow_symlinks=False) and recursive:
+                        yield from legacy_scan_dir(entry.path, extensions, recursive, name_patterns)
+                except (PermissionError, OSError):
+                    pass
+    except (PermissionError, OSError):
+        pass
+
+
+def build_chain(root: str, depth: int, n_files: int) -> str:
+    base = os.path.join(root, f"depth{depth}_{n_files}")
+    if os.path.isdir(base):
+        return base
+    per_level = max(1, n_files // depth)
+    d = base
+    for level in range(depth):
+        d = os.path.join(d, f"l{level}")
+        os.makedirs(d, exist_ok=True)
+        for f in range(per_level):
+            with open(os.path.join(d, f"f{f}.tmp"), "wb") as fh:
+                fh.write(b"x")
+    return base
+
+
+def best_of(runs: int, fn) -> tuple[float, int]:
+    best, count = float("inf"), 0
+    for _ in range(runs):
+        t0 = time.perf_counter()
+        count = fn()
+        best = min(best, time.perf_counter() - t0)
+    return best, count
+
+
+def run_legacy(base: str) -> int:
+    return sum(1 for _ in legacy_scan_dir(base, {".tmp"}, True, []))
+
+
+def run_stack(base: str) -> int:
+    JUNK_CATEGORIES[BENCH_KEY] = {"name": "bench", "paths": [base], "extensions": {".tmp"}}
+    try:
+        return sum(len(b) for b in iter_junk_batches(BENCH_KEY))
+    finally:
+        del JUNK_CATEGORIES[BENCH_KEY]
+
+
+def recursion_check(root: str, depth: int = 200):
+    # Real trees can't nest past PATH_MAX, so lower the limit instead
+    base = build_chain(root, depth, depth)
+    old_limit = sys.getrecursionlimit()
+    sys.setrecursionlimit(depth)
+    try:
+        run_legacy(base)
+        legacy = "ok"
+    except RecursionError:
+        legacy = "RecursionError"
+    try:
+        stack = f"{run_stack(base)} files"
+    except RecursionError:
+        stack = "RecursionError"
+    finally:
+        sys.setrecursionlimit(old_limit)
+    print(f"depth {depth}, recursion limit {depth}: legacy {legacy}, stack {stack}")
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--files", type=int, default=20_000)
+    ap.add_argument("--depths", type=int, nargs="+", default=[5, 20, 50])
+    ap.add_argument("--runs", type=int, default=3)
+    ap.add_argument("--root", default=os.path.join(tempfile.gettempdir(), "sa_bench_depth"))
+    ap.add_argument("--clean", action="store_true", help="remove the trees afterwards")
+    args = ap.parse_args()
+
+    os.makedirs(args.root, exist_ok=True)
+    print(f"{'depth':>6} {'files':>8} {'legacy us/file':>15} {'stack us/file':>14}")
+    for depth in args.depths:
+        base = build_chain(args.root, depth, args.files)
+        t_old, n_old = best_of(args.runs, lambda: run_legacy(base))
+        t_new, n_new = best_of(args.runs, lambda: run_stack(base))
+        assert n_old == n_new, (n_old, n_new)
+        print(f"{depth:>6} {n_new:>8} {t_old / n_new * 1e6:>15.2f} {t_new / n_new * 1e6:>14.2f}")
+    recursion_check(args.root)
+
+    if args.clean:
+        shutil.rmtree(args.root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""Benchmark: the old recursive large-file and folder-size walks vs. fs_walker.walk().
+Usage: python scripts/bench_walker.py [--files 1000000] [--repeat 5] [--root DIR]
+
+Builds a synthetic tree (100 files per directory, three directory levels)
+once under --root and reuses it on later runs; the best of --repeat runs
+counts. Drop the OS page cache between runs for cold-cache numbers.
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from app.utils.fs_walker import FolderSizeVisitor, LargeFileVisitor, walk  # noqa: E402
+
+FILES_PER_DIR = 100
+
+
+def build_tree(root: str, n_files: int):
+    marker = os.path.join(root, f".bench_{n_files}")
+    if os.path.exists(marker):
+        return
+    n_dirs = max(1, n_files // FILES_PER_DIR)
+    fanout = max(2, round(n_dirs ** (1 / 3)) + 1)
+    made = 0
+    for i in range(fanout):
+        for j in range(fanout):
+            for k in range(fanout):
+                if made >= n_dirs:
+                    break
+                d = os.path.join(root, f"d{i}", f"d{j}", f"d{k}")
+                os.makedirs(d, exist_ok=True)
+                for f in range(FILES_PER_DIR):
+                    with open(os.path.join(d, f"f{f}.bin"), "wb") as fh:
+                        fh.write(b"x" * (f % 7))
+                made += 1
+    open(marker, "w").close()
+
+
+def legacy_large(path: str, min_bytes: int, results: list) -> list:
+    """The pre-walker FileScanner._scan_dir_large recursion."""
+    try:
+        with os.scandir(path) as it:
+            for entry in it:
+                try:
+                    if entry.is_file(follow_symlinks=False):
+                        size = entry.stat().st_size
+                        if size >= min_bytes:
+                            results.append({"path": entry.path, "name": entry.name, "size": size})
+                    elif entry.is_dir(follow_symlinks=False):
+                        legacy_large(entry.path, min_bytes, results)
+                except (PermissionError, OSError):
+                    pass
+    except (PermissionError, OSError):
+        pass
+    return results
+
+
+def legacy_size(path: str) -> int:
+    """The pre-walker DiskScanner._dir_size recursion."""
+    total = 0
+    try:
+        with os.scandir(path) as it:
+            for entry in it:
+                try:
+                    if entry.is_file(follow_symlinks=False):
+                        total += entry.stat().st_size
+                    elif entry.is_dir(follow_symlinks=False):
+                        total += legacy_size(entry.path)
+                except (PermissionError, OSError):
+                    pass
+    except (PermissionError, OSError):
+        pass
+    return total
+
+
+def timed(label: str, fn, repeat: int):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        total = fn()
+        best = min(best, time.perf_counter() - t0)
+    print(f"{label:<28} {best:8.2f} s   total={total}")
+    return best
+
+
+def run_walker(root: str, large: bool = True, sizes: bool = True) -> int:
+    size_v = FolderSizeVisitor(root)
+    large_v = LargeFileVisitor(5)
+    walk([root], [v for v, on in ((size_v, sizes), (large_v, large)) if on])
+    return sum(s for _, s in size_v.results()) if sizes else len(large_v.files)
+
+
+def main():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--files", type=int, default=1_000_000)
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--root", default=os.path.join(tempfile.gettempdir(), "sa_bench_tree"))
+    args = ap.parse_args()
+
+    os.makedirs(args.root, exist_ok=True)
+    print(f"Building/reusing tree with {args.files} files in {args.root} ...")
+    build_tree(args.root, args.files)
+
+    # The old scanners walked the tree once per job; walk() serves both in one pass
+    old_large = timed("legacy large files", lambda: len(legacy_large(args.root, 5, [])), args.repeat)
+    old_size = timed("legacy folder sizes", lambda: legacy_size(args.root), args.repeat)
+    new_large = timed("walk() large files", lambda: run_walker(args.root, sizes=False), args.repeat)
+    new_size = timed("walk() folder sizes", lambda: run_walker(args.root, large=False), args.repeat)
+    both = timed("walk() both", lambda: run_walker(args.root), args.repeat)
+    print(f"large files: {old_large / new_large:.2f}x   folder sizes: {old_size / new_size:.2f}x   "
+          f"both vs two legacy walks: {(old_large + old_size) / both:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
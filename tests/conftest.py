@@ -0,0 +1,25 @@
+import os
+
+import pytest
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+
+@pytest.fixture
+def make_files(tmp_path):
+    """Create files from {relative path: size in bytes} under tmp_path; returns tmp_path."""
+    def make(spec: dict[str, int], root=None):
+        root = root or tmp_path
+        for rel, size in spec.items():
+            path = os.path.join(root, rel)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, "wb") as fh:
+                fh.write(b"x" * size)
+        return root
+    return make
+
+
+@pytest.fixture(scope="session")
+def qapp():
+    from PyQt6.QtWidgets import QApplication
+    return QApplication.instance() or QApplication([])
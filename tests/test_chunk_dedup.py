@@ -0,0 +1,62 @@
+import os
+import random
+import tempfile
+
+import pytest
+
+from app.utils.chunk_dedup import MAX_CHUNK, MIN_CHUNK, ChunkStore, chunk_segment, estimate_dedup
+
+
+@pytest.fixture
+def data():
+    return random.Random(0).randbytes(1024 * 1024)
+
+
+def write(path, data: bytes) -> dict:
+    path.write_bytes(data)
+    return {"path": str(path), "size": len(data)}
+
+
+def test_chunks_cover_the_segment_within_bounds(tmp_path, data):
+    f = write(tmp_path / "a", data)
+    chunks = chunk_segment(f["path"], 0, f["size"])
+    sizes = [size for _, size in chunks]
+    assert sum(sizes) == len(data)
+    assert all(MIN_CHUNK <= s <= MAX_CHUNK for s in sizes[:-1])
+    assert chunk_segment(f["path"], 1000, 5000)[-1][1] <= 5000
+    assert sum(s for _, s in chunk_segment(f["path"], 1000, 5000)) == 5000
+
+
+def test_boundaries_follow_content_not_offsets(tmp_path, data):
+    a = write(tmp_path / "a", data)
+    b = write(tmp_path / "b", b"inserted" * 100 + data)
+    first = {d for d, _ in chunk_segment(a["path"], 0, a["size"])}
+    second = {d for d, _ in chunk_segment(b["path"], 0, b["size"])}
+    assert len(first & second) >= len(first) - 2
+
+
+def test_store_keeps_first_owner_across_a_spill(tmp_path, monkeypatch):
+    monkeypatch.setattr(tempfile, "tempdir", str(tmp_path))
+    store = ChunkStore(max_entries=2)
+    try:
+        assert store.owner(b"a", 1) is None
+        assert store.owner(b"b", 2) is None     # second entry: moves to disk
+        assert store.spilled and os.listdir(tmp_path)
+        assert store.owner(b"c", 3) is None
+        assert store.owner(b"a", 4) == 1
+        assert store.owner(b"c", 5) == 3
+    finally:
+        store.close()
+    assert os.listdir(tmp_path) == []
+
+
+def test_estimate_finds_copies_and_nothing_in_unique_data(tmp_path, data):
+    (tmp_path / "x").mkdir()
+    files = [write(tmp_path / "x" / "a", data), write(tmp_path / "x" / "b", data),
+             write(tmp_path / "u", random.Random(1).randbytes(256 * 1024))]
+    report = estimate_dedup(files, workers=1, max_entries=50)
+    assert report.total == 2 * len(data) + 256 * 1024
+    assert report.saved == len(data)
+    assert report.spilled
+    assert report.folders[0] == (str(tmp_path / "x"), 2 * len(data), len(data))
+    assert report.pairs == [(files[1]["path"], files[0]["path"], len(data))]
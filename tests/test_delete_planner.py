@@ -0,0 +1,102 @@
+import os
+import sys
+
+import pytest
+
+from app.utils.delete_planner import COALESCE_MIN, DeletePlan, plan_deletion
+from app.utils.file_utils import DeleteResult
+from app.utils.fs_walker import FolderSizeVisitor, walk
+from app.utils.scan_index import ScanIndex
+
+N = COALESCE_MIN + 2
+
+
+@pytest.fixture
+def cache(make_files, tmp_path):
+    """tmp_path/cache with N files and a sub-folder of N more, indexed; returns (root, index)."""
+    spec = {f"cache/f{i}": 1 for i in range(N)}
+    spec.update({f"cache/sub/g{i}": 1 for i in range(N)})
+    spec["other/keep"] = 1
+    make_files(spec)
+    index = ScanIndex(":memory:")
+    walk([str(tmp_path)], [FolderSizeVisitor()], index=index)
+    yield tmp_path / "cache", index
+    index.close()
+
+
+def files_in(folder) -> list[str]:
+    return sorted(str(p) for p in folder.rglob("*") if p.is_file())
+
+
+def reindex(index, root):
+    walk([str(root)], [FolderSizeVisitor()], index=index)
+
+
+def test_fully_selected_subtree_becomes_one_kept_directory(cache):
+    root, index = cache
+    paths = files_in(root)
+    plan = plan_deletion(paths, index)
+    assert plan.ops == [str(root)]
+    assert plan.keep_dirs == frozenset({str(root)})
+    assert sorted(plan.covered[str(root)]) == paths
+
+
+def test_partial_selection_stays_per_file(cache):
+    root, index = cache
+    paths = [p for p in files_in(root) if not p.endswith("g0")]
+    assert plan_deletion(paths, index).ops == paths
+
+
+def test_covered_sub_folder_alone_is_coalesced(cache):
+    root, index = cache
+    paths = files_in(root / "sub") + files_in(root)[:2]
+    plan = plan_deletion(paths, index)
+    assert plan.ops[0] == str(root / "sub")
+    assert sorted(plan.ops[1:]) == sorted(p for p in paths if os.sep + "sub" + os.sep not in p)
+
+
+def test_selected_directory_counts_as_covering_its_subtree(cache):
+    root, index = cache
+    paths = [p for p in files_in(root) if os.sep + "sub" + os.sep not in p] + [str(root / "sub")]
+    assert plan_deletion(paths, index).ops == [str(root)]
+
+
+def test_small_selections_are_not_planned(cache):
+    root, index = cache
+    paths = files_in(root)[:COALESCE_MIN - 1]
+    assert plan_deletion(paths, index).ops == paths
+    assert plan_deletion(files_in(root), None).ops == files_in(root)
+
+
+def test_entry_added_since_the_scan_breaks_coverage(cache, make_files):
+    root, index = cache
+    paths = files_in(root)
+    make_files({"new": 1}, root / "sub")
+    assert str(root) not in plan_deletion(paths, index).ops
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="symlinks need privileges on Windows")
+def test_unselected_symlink_breaks_coverage(cache):
+    root, index = cache
+    os.symlink(root / "f0", root / "sub" / "link")
+    reindex(index, root)
+    paths = [p for p in files_in(root) if not p.endswith("link")]
+    assert str(root / "sub") not in plan_deletion(paths, index).ops
+    assert plan_deletion(paths + [str(root / "sub" / "link")], index).ops == [str(root)]
+
+
+def test_duplicate_paths_do_not_fake_coverage(cache):
+    root, index = cache
+    paths = files_in(root)
+    paths = paths[1:] + [paths[1]]
+    assert str(root) not in plan_deletion(paths, index).ops
+
+
+def test_removed_maps_results_back_to_selected_paths(cache):
+    root, index = cache
+    paths = files_in(root)
+    plan = plan_deletion(paths, index)
+    assert plan.removed([DeleteResult(str(root), True, 0)]) == set(paths)
+    assert plan.removed([DeleteResult(str(root), False, 0, "busy")]) == set()
+    identity = DeletePlan.identity(paths)
+    assert identity.removed([DeleteResult(paths[0], True, 1)]) == {paths[0]}
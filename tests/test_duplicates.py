@@ -0,0 +1,94 @@
+import os
+import sys
+
+import pytest
+
+from app.utils.duplicates import (
+    BLOCK, DuplicateCandidateVisitor, compare_files, find_duplicates,
+)
+from app.utils.fs_walker import walk
+from app.utils.hash_cache import HashCache
+
+
+@pytest.fixture
+def write(tmp_path):
+    """Write `data` to tmp_path/name; returns the walker-style file dict."""
+    def make(name: str, data: bytes) -> dict:
+        path = tmp_path / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(data)
+        return {"path": str(path), "name": path.name, "size": len(data)}
+    return make
+
+
+def paths(groups):
+    return sorted(sorted(os.path.basename(f["path"]) for f in g) for g in groups)
+
+
+@pytest.mark.parametrize("verify", [False, True])
+def test_identical_files_are_grouped(write, verify):
+    files = [write("a", b"same"), write("b", b"same"), write("c", b"diff"), write("d", b"other!")]
+    assert paths(find_duplicates(files, verify=verify)) == [["a", "b"]]
+
+
+@pytest.mark.parametrize("verify", [False, True])
+def test_equal_head_and_tail_but_different_middle(write, verify):
+    head, tail = b"h" * BLOCK, b"t" * BLOCK
+    files = [write("a", head + b"1" * BLOCK + tail),
+             write("b", head + b"2" * BLOCK + tail),
+             write("c", head + b"1" * BLOCK + tail)]
+    assert paths(find_duplicates(files, verify=verify)) == [["a", "c"]]
+
+
+def test_empty_files_are_never_duplicates(write):
+    assert find_duplicates([write("a", b""), write("b", b"")]) == []
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="hard links are detected from the walk on POSIX")
+def test_hard_links_to_one_file_are_not_duplicates(write, tmp_path):
+    write("a", b"data")
+    os.link(tmp_path / "a", tmp_path / "b")
+    visitor = DuplicateCandidateVisitor()
+    walk([str(tmp_path)], [visitor])
+    assert find_duplicates(visitor.files) == []
+
+
+def test_groups_are_streamed_and_algorithm_is_selectable(write):
+    files = [write(n, d) for n, d in (("a", b"x1"), ("b", b"x1"), ("c", b"yy2"), ("d", b"yy2"))]
+    streamed = []
+    result = find_duplicates(files, algorithm="md5", on_group=streamed.append)
+    assert paths(streamed) == paths(result) == [["a", "b"], ["c", "d"]]
+    with pytest.raises(ValueError):
+        find_duplicates(files, algorithm="no-such-hash")
+
+
+def test_cached_digests_are_reused(write, tmp_path):
+    big = b"z" * (3 * BLOCK)
+    write("a", big)
+    write("b", big)
+    visitor = DuplicateCandidateVisitor()
+    walk([str(tmp_path)], [visitor])
+    with HashCache(":memory:") as cache:
+        first = find_duplicates(visitor.files, cache=cache)
+        assert cache.hits == 0
+        assert paths(find_duplicates(visitor.files, cache=cache)) == paths(first) == [["a", "b"]]
+        assert cache.hits == 4      # fingerprint and full hash of both files
+
+
+def test_compare_files_splits_by_content(write):
+    files = [write(str(i), data) for i, data in enumerate([b"aa", b"bb", b"aa", b"bb", b"cc"])]
+    assert paths(compare_files(files, block=1)) == [["0", "2"], ["1", "3"]]
+
+
+def test_compare_files_over_max_open_keeps_copies_of_the_first(write):
+    files = [write(str(i), b"same" if i % 2 == 0 else b"diff") for i in range(7)]
+    assert paths(compare_files(files, max_open=3)) == [["0", "2", "4", "6"]]
+
+
+def test_candidate_visitor_skips_small_files_and_skipped_dirs(write, tmp_path):
+    write("big", b"12345")
+    write("small", b"1")
+    write("skip/big2", b"12345")
+    visitor = DuplicateCandidateVisitor(min_bytes=2, skip_dirs=frozenset({"skip"}))
+    walk([str(tmp_path)], [visitor])
+    assert [f["name"] for f in visitor.files] == ["big"]
@@ -0,0 +1,66 @@
+import os
+
+from app.utils import file_utils
+from app.utils.file_utils import delete_paths, delete_permanent
+from app.workers.delete_worker import make_plan
+
+
+def test_files_and_directories_are_deleted_with_their_sizes(make_files):
+    root = make_files({"f": 10, "d/a": 5, "d/sub/b": 7})
+    results = delete_paths([str(root / "f"), str(root / "d")], trash=False)
+    assert {(os.path.basename(r.path), r.ok, r.freed) for r in results} == {("f", True, 10),
+                                                                           ("d", True, 12)}
+    assert os.listdir(root) == []
+
+
+def test_each_path_is_deleted_once(make_files):
+    root = make_files({"f": 3, "g": 4})
+    f, g = str(root / "f"), str(root / "g")
+    results = delete_paths([f, g, f, f], trash=False, batch_size=1)
+    assert [r.path for r in sorted(results)] == [f, g]
+    assert make_plan([f, g, f], coalesce=False).ops == [f, g]
+
+
+def test_missing_path_counts_as_deleted(tmp_path):
+    [result] = delete_paths([str(tmp_path / "gone")], trash=False)
+    assert result.ok and result.freed == 0
+
+
+def test_failures_are_reported_per_path(make_files, monkeypatch):
+    root = make_files({"ok": 1, "locked": 1})
+    unlink = os.unlink
+
+    def refuse(path, *args, **kwargs):
+        if os.path.basename(path) == "locked":
+            raise PermissionError(13, "Permission denied", path)
+        unlink(path, *args, **kwargs)
+
+    monkeypatch.setattr(file_utils.os, "unlink", refuse)
+    count, failed = delete_permanent([str(root / "ok"), str(root / "locked")])
+    assert count == 1
+    assert len(failed) == 1 and "locked" in failed[0]
+
+
+def test_batches_are_reported_and_stop_is_honoured(make_files):
+    root = make_files({f"f{i}": 1 for i in range(5)})
+    paths = sorted(str(p) for p in root.iterdir())
+    batches = []
+    results = delete_paths(paths, trash=False, batch_size=2, workers=1,
+                           on_batch=batches.append, is_running=lambda: not batches)
+    assert len(batches) == 1
+    assert [r.path for r in results] == paths[:2]
+    assert sorted(os.listdir(root)) == ["f2", "f3", "f4"]
+
+
+def test_freed_bytes_are_reported(make_files):
+    root = make_files({"a": 100, "d/b": 50})
+    freed = []
+    delete_paths([str(root / "a"), str(root / "d")], trash=False, on_freed=freed.append)
+    assert sum(freed) == 150
+
+
+def test_keep_dirs_are_emptied_not_removed(make_files):
+    root = make_files({"d/a": 1, "d/sub/b": 1})
+    [result] = delete_paths([str(root / "d")], trash=False, keep_dirs=frozenset({str(root / "d")}))
+    assert result.ok and result.freed == 2
+    assert os.listdir(root / "d") == []
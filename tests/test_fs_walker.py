@@ -0,0 +1,89 @@
+import os
+import sys
+
+import pytest
+
+from app.utils.fs_walker import (
+    FolderSizeVisitor, LargeFileVisitor, Visitor, iter_walk, merge_roots, walk,
+)
+
+
+class Recorder(Visitor):
+    """Records the files it is handed, optionally refusing some directory names."""
+
+    def __init__(self, skip=()):
+        self.skip = set(skip)
+        self.listed: list[str] = []
+        self.files: list[str] = []
+
+    def enter_dir(self, path, name, depth, parent):
+        return None if name in self.skip else True
+
+    def visit_files(self, path, files, state):
+        self.listed.append(path)
+        self.files.extend(name for _, name, _ in files)
+
+
+def test_folder_sizes_per_top_level_folder(make_files):
+    root = make_files({"a/f": 10, "a/deep/g": 5, "b/h": 30, "top": 100})
+    sizes = FolderSizeVisitor(str(root))
+    walk([str(root)], [sizes])
+    assert sizes.results() == [(os.path.join(root, "b"), 30), (os.path.join(root, "a"), 15)]
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="scandir reports no link count on Windows")
+def test_hard_linked_file_counted_once(make_files):
+    root = make_files({"a/f": 40, "b/g": 1})
+    os.link(os.path.join(root, "a", "f"), os.path.join(root, "b", "f2"))
+    sizes = FolderSizeVisitor(str(root))
+    large = LargeFileVisitor(10)
+    walk([str(root)], [sizes, large])
+    assert sum(size for _, size in sizes.results()) == 41
+    assert len(large.files) == 1
+
+
+def test_large_files_limit_keeps_the_largest_in_order(make_files):
+    root = make_files({"a": 5, "b": 50, "c": 20, "d/e": 50, "d/f": 1})
+    large = LargeFileVisitor(2, limit=3)
+    walk([str(root)], [large])
+    assert [(f["name"], f["size"]) for f in large.files] == [("b", 50), ("e", 50), ("c", 20)]
+    assert all("allocated" in f for f in large.files)
+
+
+def test_subtree_refused_by_one_visitor_still_reaches_the_other(make_files):
+    root = make_files({"keep/f": 1, "skip/g": 1})
+    picky, all_files = Recorder(skip={"skip"}), Recorder()
+    walk([str(root)], [picky, all_files])
+    assert picky.files == ["f"]
+    assert sorted(all_files.files) == ["f", "g"]
+
+
+def test_subtree_refused_by_every_visitor_is_not_listed(make_files):
+    root = make_files({"keep/f": 1, "skip/g": 1})
+    visitor = Recorder(skip={"skip"})
+    walk([str(root)], [visitor])
+    assert os.path.join(root, "skip") not in visitor.listed
+
+
+def test_nested_roots_are_listed_once(make_files):
+    root = make_files({"a/b/f": 1})
+    nested = os.path.join(root, "a", "b")
+    assert merge_roots([nested, str(root), str(root)]) == [str(root)]
+    visitor = Recorder()
+    walk([nested, str(root)], [visitor])
+    assert visitor.files == ["f"]
+    assert len(visitor.listed) == len(set(visitor.listed))
+
+
+def test_stop_ends_the_walk(make_files):
+    root = make_files({f"d{i}/f": 1 for i in range(10)})
+    visitor = Recorder()
+    walk([str(root)], [visitor], is_running=lambda: len(visitor.listed) < 3)
+    assert len(visitor.listed) == 3
+
+
+def test_iter_walk_yields_every_directory(make_files):
+    root = make_files({"a/b/f": 1, "c/g": 1})
+    seen = list(iter_walk([str(root)], [Recorder()]))
+    expected = {str(root)} | {os.path.join(root, p) for p in ("a", os.path.join("a", "b"), "c")}
+    assert set(seen) == expected
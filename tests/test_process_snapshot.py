@@ -0,0 +1,75 @@
+import random
+
+from app.utils.process_snapshot import ProcessDelta, ProcessSnapshot, proc_key, runs
+
+
+def proc(pid, create_time=1.0, **fields) -> dict:
+    row = {"pid": pid, "ppid": 1, "name": f"p{pid}", "cpu": 0.0, "avg_cpu": 0.0, "ram": 1000,
+           "threads": 1, "status": "running", "user": "u", "exe": f"/bin/p{pid}",
+           "cmdline": "", "create_time": create_time}
+    row.update(fields)
+    return row
+
+
+def state(snapshot: ProcessSnapshot) -> dict:
+    return {proc_key(r): r for r in snapshot.rows()}
+
+
+def random_states(seed: int, ticks: int):
+    rnd = random.Random(seed)
+    procs = {pid: proc(pid) for pid in range(1, 30)}
+    for _ in range(ticks):
+        for pid in rnd.sample(sorted(procs), min(5, len(procs) - 1)):
+            del procs[pid]
+        for _ in range(5):
+            pid = rnd.randrange(1, 60)
+            procs[pid] = proc(pid, create_time=rnd.random())   # new, or a reused PID
+        for p in rnd.sample(list(procs.values()), min(8, len(procs))):
+            p.update(cpu=rnd.random() * 100, ram=rnd.randrange(1 << 30), status="sleeping",
+                     ppid=rnd.randrange(1, 60))
+        yield [dict(p) for p in procs.values()]
+
+
+def test_diff_then_apply_reaches_the_target_state():
+    mirror = ProcessSnapshot()
+    for target in random_states(0, 50):
+        delta = mirror.diff(target)
+        mirror.apply(delta)
+        assert state(mirror) == {proc_key(p): p for p in target}
+        assert not mirror.diff(target)
+
+
+def test_keyframe_resyncs_a_consumer_that_missed_deltas():
+    source, consumer = ProcessSnapshot(), ProcessSnapshot()
+    for tick, target in enumerate(random_states(1, 20)):
+        delta = source.diff(target)
+        source.apply(delta)
+        if tick % 3:
+            continue    # lost on the way
+        consumer.apply(ProcessDelta(True, source.rows(), [], []))
+        assert state(consumer) == state(source)
+
+
+def test_only_volatile_fields_are_reported():
+    snapshot = ProcessSnapshot()
+    snapshot.append([proc(5)])
+    delta = snapshot.diff([proc(5, exe="/other", cpu=3.0, ppid=9)])
+    assert delta.changed == [((5, 1.0), {"ppid": 9, "cpu": 3.0})]
+
+
+def test_reused_pid_is_a_new_process():
+    snapshot = ProcessSnapshot()
+    snapshot.append([proc(5, create_time=1.0)])
+    delta = snapshot.diff([proc(5, create_time=2.0)])
+    assert delta.removed == [(5, 1.0)]
+    assert [proc_key(p) for p in delta.added] == [(5, 2.0)]
+
+
+def test_empty_delta_is_false():
+    assert not ProcessDelta(False, [], [], [])
+    assert ProcessDelta(True, [], [], [])
+
+
+def test_runs_groups_consecutive_rows():
+    assert list(runs([1, 2, 3, 5, 7, 8])) == [(1, 3), (5, 5), (7, 8)]
+    assert list(runs([])) == []
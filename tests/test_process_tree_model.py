@@ -0,0 +1,133 @@
+import random
+
+import pytest
+from PyQt6.QtCore import QModelIndex, qInstallMessageHandler
+from PyQt6.QtTest import QAbstractItemModelTester
+
+from app.utils.process_snapshot import ProcessDelta, ProcessSnapshot, proc_key
+from app.widgets.process_model import KEY_ROLE, SORT_ROLE
+from app.widgets.process_tree_model import TCOL_COUNT, TCOL_CPU, ProcessTreeModel
+
+
+def proc(pid, ppid, create_time, cpu=0.0, exe="") -> dict:
+    return {"pid": pid, "ppid": ppid, "name": f"p{pid % 7}", "cpu": cpu, "avg_cpu": 0.0,
+            "ram": 1000 * pid, "threads": 1, "status": "running", "user": "u",
+            "exe": exe or f"/bin/p{pid % 7}", "cmdline": "", "create_time": create_time}
+
+
+def random_states(seed: int, ticks: int):
+    """Full process lists of a machine where processes start, exit, work and get reparented."""
+    rnd = random.Random(seed)
+    clock = iter(range(1, 1_000_000))
+    procs = {1: proc(1, 0, next(clock))}
+    for pid in range(2, 25):
+        procs[pid] = proc(pid, rnd.choice(list(procs)), next(clock))
+    next_pid = 25
+    for _ in range(ticks):
+        for pid in rnd.sample(sorted(procs), min(4, len(procs) - 1)):
+            del procs[pid]
+        for _ in range(4):
+            procs[next_pid] = proc(next_pid, rnd.choice(list(procs)), next(clock))
+            next_pid += 1
+        for p in rnd.sample(list(procs.values()), min(6, len(procs))):
+            p["cpu"] = round(rnd.random() * 10, 1)
+            p["threads"] = rnd.randrange(1, 20)
+        for p in rnd.sample(list(procs.values()), 2):
+            if p["ppid"] not in procs:
+                p["ppid"] = 1       # orphans are adopted by init
+        yield [dict(p) for p in procs.values()]
+
+
+@pytest.fixture
+def qt_warnings(qapp):
+    messages = []
+    qInstallMessageHandler(lambda mode, context, message: messages.append(message))
+    yield messages
+    qInstallMessageHandler(None)
+
+
+def walk_model(model, parent=QModelIndex()):
+    """Check subtree totals through the model interface; returns the process keys."""
+    keys = []
+    for row in range(model.rowCount(parent)):
+        index = model.index(row, 0, parent)
+        assert model.parent(index) == parent
+        child_keys = walk_model(model, index)
+        key = index.data(KEY_ROLE)
+        own = 0 if key is None else 1
+        count = model.index(row, TCOL_COUNT, parent).data(SORT_ROLE)
+        children = [model.index(r, TCOL_COUNT, index).data(SORT_ROLE)
+                    for r in range(model.rowCount(index))]
+        assert count == own + sum(children)
+        cpu = model.index(row, TCOL_CPU, parent).data(SORT_ROLE)
+        child_cpu = sum(model.index(r, TCOL_CPU, index).data(SORT_ROLE)
+                        for r in range(model.rowCount(index)))
+        assert cpu >= child_cpu - 1e-6
+        keys.extend(child_keys)
+        if key is not None:
+            keys.append(key)
+    return keys
+
+
+@pytest.mark.parametrize("group_by_exe", [False, True])
+def test_deltas_keep_the_model_consistent(qt_warnings, group_by_exe):
+    model = ProcessTreeModel(group_by_exe=group_by_exe)
+    tester = QAbstractItemModelTester(model, QAbstractItemModelTester.FailureReportingMode.Warning)
+    snapshot = ProcessSnapshot()
+    for tick, target in enumerate(random_states(0, 12)):
+        if tick % 4 == 3:
+            delta = ProcessDelta(True, target, [], [])
+        else:
+            delta = snapshot.diff(target)
+        snapshot.apply(delta)
+        model.apply(delta)
+        assert qt_warnings == []
+        assert sorted(walk_model(model)) == sorted(proc_key(p) for p in target)
+    del tester
+
+
+def test_child_is_shown_under_its_parent(qapp):
+    model = ProcessTreeModel()
+    model.apply(ProcessDelta(True, [proc(1, 0, 1.0, cpu=1.0), proc(2, 1, 2.0, cpu=2.0)], [], []))
+    assert model.rowCount() == 1
+    root = model.index(0, 0)
+    assert root.data(KEY_ROLE) == (1, 1.0)
+    assert model.index(0, 0, root).data(KEY_ROLE) == (2, 2.0)
+    assert model.index(0, TCOL_CPU).data(SORT_ROLE) == pytest.approx(3.0)
+
+
+def test_reused_parent_pid_does_not_adopt_older_processes(qapp):
+    model = ProcessTreeModel()
+    # pid 1 started after pid 2, so it cannot be pid 2's parent
+    model.apply(ProcessDelta(True, [proc(2, 1, 1.0), proc(1, 0, 2.0)], [], []))
+    assert model.rowCount() == 2
+
+
+def test_exited_parent_moves_children_to_the_top(qt_warnings):
+    model = ProcessTreeModel()
+    tester = QAbstractItemModelTester(model, QAbstractItemModelTester.FailureReportingMode.Warning)
+    snapshot = ProcessSnapshot()
+    for state in ([proc(1, 0, 1.0), proc(2, 1, 2.0), proc(3, 2, 3.0), proc(4, 2, 4.0)],
+                  [proc(1, 0, 1.0), proc(3, 2, 3.0), proc(4, 2, 4.0)]):
+        delta = snapshot.diff(state)
+        snapshot.apply(delta)
+        model.apply(delta)
+    assert sorted(model.index(r, 0).data(KEY_ROLE) for r in range(model.rowCount())) == [
+        (1, 1.0), (3, 3.0), (4, 4.0)]
+    assert qt_warnings == []
+    del tester
+
+
+def test_group_mode_drops_empty_groups(qapp):
+    model = ProcessTreeModel(group_by_exe=True)
+    snapshot = ProcessSnapshot()
+    for state in ([proc(1, 0, 1.0, exe="/a"), proc(2, 0, 2.0, exe="/b"), proc(3, 0, 3.0, exe="/b")],
+                  [proc(2, 0, 2.0, exe="/b"), proc(3, 0, 3.0, exe="/b")]):
+        delta = snapshot.diff(state)
+        snapshot.apply(delta)
+        model.apply(delta)
+    assert model.rowCount() == 1
+    group = model.index(0, 0)
+    assert group.data(KEY_ROLE) is None
+    assert model.rowCount(group) == 2
+    assert model.index(0, TCOL_COUNT).data(SORT_ROLE) == 2
@@ -0,0 +1,117 @@
+import os
+import sqlite3
+
+import pytest
+
+from app.utils import quarantine as quarantine_mod
+from app.utils.fs_walker import FolderSizeVisitor, walk
+from app.utils.quarantine import QUARANTINE_NAME, Quarantine
+
+
+@pytest.fixture
+def qdb(tmp_path, monkeypatch):
+    """A Quarantine whose directory is tmp_path/QUARANTINE_NAME instead of the filesystem root."""
+    monkeypatch.setattr(quarantine_mod, "device_root", lambda path, dev: str(tmp_path))
+    db = str(tmp_path / "journal" / "quarantine.db")
+    q = Quarantine(db)
+    yield q, db
+    q.close()
+
+
+def test_move_and_restore(make_files, tmp_path, qdb):
+    q, _ = qdb
+    root = make_files({"data/f": 10, "data/d/g": 5})
+    results = q.move([str(root / "data" / "f"), str(root / "data" / "d")])
+    assert [(r.ok, r.freed) for r in results] == [(True, 10), (True, 0)]
+    assert os.listdir(root / "data") == []
+    assert len(os.listdir(tmp_path / QUARANTINE_NAME)) == 2
+    assert q.pending() == (2, 10)
+
+    restored, failed = q.restore()
+    assert sorted(restored) == [str(root / "data" / "d"), str(root / "data" / "f")]
+    assert failed == []
+    assert (root / "data" / "d" / "g").read_bytes() == b"x" * 5
+    assert q.pending() == (0, 0)
+
+
+def test_journal_row_is_committed_before_the_rename(make_files, qdb, monkeypatch):
+    q, db = qdb
+    root = make_files({"f": 1})
+    rename = os.rename
+    journaled = []
+
+    def check(src, dst):
+        # Another connection only sees committed rows
+        with sqlite3.connect(db) as other:
+            journaled.append(other.execute(
+                "SELECT COUNT(*) FROM items WHERE original = ? AND stored = ?", (src, dst)
+            ).fetchone()[0])
+        rename(src, dst)
+
+    monkeypatch.setattr(quarantine_mod.os, "rename", check)
+    q.move([str(root / "f")])
+    assert journaled == [1]
+
+
+def test_failed_move_leaves_no_journal_row(make_files, qdb, monkeypatch):
+    q, _ = qdb
+    root = make_files({"f": 1})
+
+    def refuse(src, dst):
+        raise PermissionError(13, "Permission denied", src)
+
+    monkeypatch.setattr(quarantine_mod.os, "rename", refuse)
+    [result] = q.move([str(root / "f")])
+    assert not result.ok
+    assert q.pending() == (0, 0)
+    assert (root / "f").exists()
+
+
+def test_restore_undoes_only_the_last_batch(make_files, qdb):
+    q, _ = qdb
+    root = make_files({"a": 1, "b": 1})
+    q.move([str(root / "a")])
+    q.move([str(root / "b")])
+    assert q.restore()[0] == [str(root / "b")]
+    assert not (root / "a").exists()
+    assert q.restore()[0] == [str(root / "a")]
+
+
+def test_restore_keeps_entries_whose_path_is_taken(make_files, qdb):
+    q, _ = qdb
+    root = make_files({"f": 1})
+    q.move([str(root / "f")])
+    make_files({"f": 2}, root)
+    restored, failed = q.restore()
+    assert restored == [] and len(failed) == 1
+    assert q.pending() == (1, 1)
+
+
+def test_kept_directory_is_emptied_then_restored(make_files, qdb):
+    q, _ = qdb
+    root = make_files({"d/f": 3})
+    q.move([str(root / "d")], keep_dirs=frozenset({str(root / "d")}))
+    assert os.listdir(root / "d") == []
+    assert q.restore()[0] == [str(root / "d")]
+    assert (root / "d" / "f").exists()
+
+
+def test_purge_frees_entries_for_good(make_files, tmp_path, qdb):
+    q, _ = qdb
+    root = make_files({"data/f": 10, "data/d/g": 5})
+    q.move([str(root / "data" / "f"), str(root / "data" / "d")])
+    assert q.purge() == (0, 0)      # still within the grace period
+    assert q.purge(older_than=0) == (2, 15)
+    assert q.pending() == (0, 0)
+    assert not (tmp_path / QUARANTINE_NAME).exists()
+    assert q.restore() == ([], [])
+
+
+def test_walks_do_not_count_quarantined_items(make_files, tmp_path, qdb):
+    q, _ = qdb
+    root = make_files({"data/f": 10, "data/g": 1})
+    q.move([str(root / "data" / "f")])
+    sizes = FolderSizeVisitor(str(tmp_path))
+    walk([str(tmp_path)], [sizes])
+    assert dict(sizes.results())[str(root / "data")] == 1
+    assert str(tmp_path / QUARANTINE_NAME) not in dict(sizes.results())
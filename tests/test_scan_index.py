@@ -0,0 +1,104 @@
+import os
+import shutil
+
+import pytest
+
+from app.utils.fs_walker import FolderSizeVisitor, LargeFileVisitor, Visitor, walk
+from app.utils.scan_index import ScanIndex
+
+
+class Counter(Visitor):
+    """Counts fresh listings and replays; accepts summaries unless told not to."""
+
+    def __init__(self, summaries=True):
+        self.summaries = summaries
+        self.listed = 0
+        self.replayed = 0
+
+    def enter_dir(self, path, name, depth, parent):
+        return True
+
+    def visit_files(self, path, files, state):
+        self.listed += 1
+
+    def can_use_summary(self, state, large_min):
+        return self.summaries
+
+    def visit_summary(self, path, summary, state):
+        self.replayed += 1
+
+
+@pytest.fixture
+def index():
+    idx = ScanIndex(":memory:", large_min=50)
+    yield idx
+    idx.close()
+
+
+def keep_mtime(path, change):
+    """Run `change`, then put the directory mtime back as if nothing was added or removed."""
+    st = os.stat(path)
+    change()
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns))
+
+
+def scan(root, index, *visitors):
+    sizes = FolderSizeVisitor(str(root))
+    large = LargeFileVisitor(50)
+    walk([str(root)], [sizes, large, *visitors], index=index)
+    return sizes.results(), [(f["name"], f["size"]) for f in large.files]
+
+
+def test_unchanged_tree_is_replayed_with_the_same_results(make_files, index):
+    root = make_files({"a/f": 10, "a/big": 60, "b/c/g": 5})
+    first = scan(root, index)
+    counter = Counter()
+    assert scan(root, index, counter) == first
+    assert counter.listed == 0 and counter.replayed == 4
+
+
+def test_changed_directory_is_listed_again(make_files, index):
+    root = make_files({"a/f": 10, "b/g": 5})
+    scan(root, index)
+    make_files({"a/new": 7}, root)
+    counter = Counter()
+    sizes, _ = scan(root, index, counter)
+    assert dict(sizes)[os.path.join(root, "a")] == 17
+    assert counter.listed == 1
+
+
+def test_large_file_changed_in_place_is_noticed(make_files, index):
+    root = make_files({"a/big": 60, "a/small": 1})
+    scan(root, index)
+    keep_mtime(os.path.join(root, "a"), lambda: make_files({"a/big": 90}, root))
+    assert scan(root, index)[1] == [("big", 90)]
+    keep_mtime(os.path.join(root, "a"), lambda: make_files({"a/big": 3}, root))
+    assert scan(root, index)[1] == []
+
+
+def test_removed_subtree_is_dropped_from_the_index(make_files, index):
+    root = make_files({"a/b/c/f": 1, "d/g": 1})
+    scan(root, index)
+    assert index.get(os.path.join(root, "a", "b", "c")) is not None
+    shutil.rmtree(os.path.join(root, "a"))
+    scan(root, index)
+    assert index.get(os.path.join(root, "a")) is None
+    assert index.get(os.path.join(root, "a", "b", "c")) is None
+
+
+def test_visitor_without_summaries_forces_listing(make_files, index):
+    root = make_files({"a/f": 1})
+    scan(root, index)
+    counter = Counter(summaries=False)
+    scan(root, index, counter)
+    assert counter.listed == 2 and counter.replayed == 0
+
+
+def test_full_rescan_ignores_the_index(make_files):
+    root = make_files({"a/f": 1})
+    with ScanIndex(":memory:") as idx:
+        scan(root, idx)
+        idx.full_rescan = True
+        counter = Counter()
+        scan(root, idx, counter)
+    assert counter.listed == 2
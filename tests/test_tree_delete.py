@@ -0,0 +1,77 @@
+import os
+import sys
+
+import pytest
+
+from app.utils import tree_delete
+from app.utils.tree_delete import HAS_DIR_FD, TreeDeleteError, remove_tree, tree_size
+
+TREE = {"a": 1, "d1/b": 2, "d1/x/y/c": 3, "d2/d": 4, "d3/e": 5}
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_tree_is_removed_and_its_bytes_counted(make_files, tmp_path, workers):
+    make_files(TREE, tmp_path / "t")
+    freed = []
+    assert tree_size(str(tmp_path / "t")) == 15
+    assert remove_tree(str(tmp_path / "t"), workers=workers, on_freed=freed.append) == 15
+    assert sum(freed) == 15
+    assert not (tmp_path / "t").exists()
+
+
+def test_keep_root_leaves_the_empty_directory(make_files, tmp_path):
+    make_files(TREE, tmp_path / "t")
+    assert remove_tree(str(tmp_path / "t"), keep_root=True) == 15
+    assert os.listdir(tmp_path / "t") == []
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="symlinks need privileges on Windows")
+def test_symlinks_are_removed_not_followed(make_files, tmp_path):
+    make_files({"outside/keep": 9, "t/f": 1})
+    os.symlink(tmp_path / "outside", tmp_path / "t" / "link")
+    remove_tree(str(tmp_path / "t"))
+    assert (tmp_path / "outside" / "keep").exists()
+    assert not (tmp_path / "t").exists()
+
+
+@pytest.mark.skipif(not HAS_DIR_FD, reason="the dir_fd walk only")
+@pytest.mark.parametrize("workers", [1, 2])
+def test_failed_entries_do_not_stop_the_rest(make_files, tmp_path, monkeypatch, workers):
+    make_files({"d1/bad": 1, "d1/ok": 1, "d2/bad": 1, "d2/deep/ok": 1, "ok": 1}, tmp_path / "t")
+    unlink = os.unlink
+
+    def refuse(name, *args, **kwargs):
+        if name == "bad":
+            raise PermissionError(13, "Permission denied", name)
+        unlink(name, *args, **kwargs)
+
+    monkeypatch.setattr(tree_delete.os, "unlink", refuse)
+    with pytest.raises(TreeDeleteError) as info:
+        remove_tree(str(tmp_path / "t"), workers=workers)
+    assert len(info.value.errors) == 2      # no "not empty" noise from the directories above
+    left = sorted(os.path.relpath(os.path.join(d, f), tmp_path / "t")
+                  for d, _, files in os.walk(tmp_path / "t") for f in files)
+    assert left == [os.path.join("d1", "bad"), os.path.join("d2", "bad")]
+    assert not (tmp_path / "t" / "d2" / "deep").exists()
+
+
+@pytest.mark.skipif(not HAS_DIR_FD, reason="the dir_fd walk only")
+def test_single_failure_is_raised_as_is(make_files, tmp_path, monkeypatch):
+    make_files({"d/bad": 1, "d/ok": 1}, tmp_path / "t")
+    unlink = os.unlink
+
+    def refuse(name, *args, **kwargs):
+        if name == "bad":
+            raise PermissionError(13, "Permission denied", name)
+        unlink(name, *args, **kwargs)
+
+    monkeypatch.setattr(tree_delete.os, "unlink", refuse)
+    with pytest.raises(PermissionError):
+        remove_tree(str(tmp_path / "t"))
+    assert os.listdir(tmp_path / "t" / "d") == ["bad"]
+
+
+def test_tree_size_of_a_file_and_a_missing_path(make_files, tmp_path):
+    make_files({"f": 7})
+    assert tree_size(str(tmp_path / "f")) == 7
+    assert tree_size(str(tmp_path / "missing")) == 0